@@ -0,0 +1,104 @@
+"""event fingerprints per session and subject
+
+Revision ID: 8a15cabdc35a
+Revises: 034fa4544ad9
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8a15cabdc35a'
+down_revision: Union[str, None] = '034fa4544ad9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# md5 del evento partido en dos mitades de 64 bits, plegadas con XOR por (sesión, sujeto)
+FOLD_SELECT = """
+    select session_id, subject_id, {sign}count(*),
+           bit_xor(('x' || substr(d, 1, 16))::bit(64)::bigint),
+           bit_xor(('x' || substr(d, 17, 16))::bit(64)::bigint)
+    from (select session_id, subject_id, cleansed.event_digest(source_type, t_start_ms, processed_payload) as d
+          from {source}) e
+    group by session_id, subject_id
+"""
+
+UPSERT_FOLD = """
+    insert into cleansed.event_fingerprints as f (session_id, subject_id, event_count, digest_hi, digest_lo)
+    {select}
+    on conflict (session_id, subject_id) do update
+       set event_count = f.event_count + excluded.event_count,
+           digest_hi = f.digest_hi # excluded.digest_hi,
+           digest_lo = f.digest_lo # excluded.digest_lo,
+           updated_at = now();
+"""
+
+
+def upgrade() -> None:
+    # 1. TABLA DE HUELLAS (subject_id nulo agrupa los eventos sin sujeto)
+    op.create_table(
+        'event_fingerprints',
+        sa.Column('fingerprint_id', sa.UUID(), nullable=False, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('session_id', sa.UUID(), nullable=False),
+        sa.Column('subject_id', sa.UUID(), nullable=True),
+        sa.Column('event_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('digest_hi', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('digest_lo', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['session_id'], ['operational.sessions.session_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['subject_id'], ['operational.subjects.subject_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('fingerprint_id'),
+        sa.UniqueConstraint('session_id', 'subject_id', name='uq_event_fingerprints_scope', postgresql_nulls_not_distinct=True),
+        schema='cleansed'
+    )
+
+    # 2. DIGEST CANÓNICO DE UN EVENTO (jsonb::text ya normaliza el orden de las llaves)
+    op.execute(sa.text("""
+        CREATE OR REPLACE FUNCTION cleansed.event_digest(source_type text, t_start_ms bigint, payload jsonb)
+        RETURNS text LANGUAGE sql IMMUTABLE AS $$
+            SELECT md5(source_type || '|' || t_start_ms::text || '|' || coalesce(payload::text, 'null'));
+        $$;
+    """))
+
+    # 3. TRIGGERS POR SENTENCIA: una promoción de N eventos hace un upsert por sujeto
+    fold_old = UPSERT_FOLD.format(select=FOLD_SELECT.format(sign="-", source="old_events"))
+    fold_new = UPSERT_FOLD.format(select=FOLD_SELECT.format(sign="", source="new_events"))
+    op.execute(sa.text(f"""
+        CREATE OR REPLACE FUNCTION cleansed.fold_event_fingerprints()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF tg_op IN ('DELETE', 'UPDATE') THEN
+                {fold_old}
+            END IF;
+            IF tg_op IN ('INSERT', 'UPDATE') THEN
+                {fold_new}
+            END IF;
+            RETURN NULL;
+        END;
+        $$;
+    """))
+    # Las tablas de transición solo admiten un evento por trigger
+    op.execute(sa.text("""
+        CREATE TRIGGER trg_event_fingerprints_insert AFTER INSERT ON cleansed.biometric_events
+            REFERENCING NEW TABLE AS new_events
+            FOR EACH STATEMENT EXECUTE FUNCTION cleansed.fold_event_fingerprints();
+        CREATE TRIGGER trg_event_fingerprints_update AFTER UPDATE ON cleansed.biometric_events
+            REFERENCING OLD TABLE AS old_events NEW TABLE AS new_events
+            FOR EACH STATEMENT EXECUTE FUNCTION cleansed.fold_event_fingerprints();
+        CREATE TRIGGER trg_event_fingerprints_delete AFTER DELETE ON cleansed.biometric_events
+            REFERENCING OLD TABLE AS old_events
+            FOR EACH STATEMENT EXECUTE FUNCTION cleansed.fold_event_fingerprints();
+    """))
+
+    # 4. BACKFILL desde la capa Silver existente
+    op.execute(sa.text(UPSERT_FOLD.format(select=FOLD_SELECT.format(sign="", source="cleansed.biometric_events"))))
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DROP TRIGGER IF EXISTS trg_event_fingerprints_insert ON cleansed.biometric_events"))
+    op.execute(sa.text("DROP TRIGGER IF EXISTS trg_event_fingerprints_update ON cleansed.biometric_events"))
+    op.execute(sa.text("DROP TRIGGER IF EXISTS trg_event_fingerprints_delete ON cleansed.biometric_events"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cleansed.fold_event_fingerprints()"))
+    op.drop_table('event_fingerprints', schema='cleansed')
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cleansed.event_digest(text, bigint, jsonb)"))
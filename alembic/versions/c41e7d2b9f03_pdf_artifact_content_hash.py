@@ -0,0 +1,44 @@
+"""pdf artifacts keyed by content hash with size
+
+Revision ID: c41e7d2b9f03
+Revises: 8a15cabdc35a
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7d2b9f03'
+down_revision: Union[str, None] = '8a15cabdc35a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('pdf_artifacts', sa.Column('size_bytes', sa.BigInteger(), nullable=True), schema='artifacts')
+    # La revisión inicial no creó generated_at (el SQL de 05_final_storage_and_reports sí); el upsert lo refresca
+    op.execute(sa.text("ALTER TABLE artifacts.pdf_artifacts ADD COLUMN IF NOT EXISTS generated_at timestamptz DEFAULT now()"))
+
+    # El único global sobre sha256_hash rechazaba cada regeneración (se hasheaba la ruta, no el PDF).
+    # Nombre según el origen del esquema: alembic (por defecto de Postgres) o 05_final_storage_and_reports.sql
+    op.execute(sa.text("ALTER TABLE artifacts.pdf_artifacts DROP CONSTRAINT IF EXISTS pdf_artifacts_sha256_hash_key"))
+    op.execute(sa.text("ALTER TABLE artifacts.pdf_artifacts DROP CONSTRAINT IF EXISTS unq_pdf_hash"))
+
+    # Las filas previas conservan su hash de ruta y size_bytes nulo: no apuntan a ningún blob
+    op.create_unique_constraint('uq_pdf_artifacts_report_hash', 'pdf_artifacts', ['report_id', 'sha256_hash'], schema='artifacts')
+    op.create_index('ix_pdf_artifacts_sha256_hash', 'pdf_artifacts', ['sha256_hash'], schema='artifacts')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pdf_artifacts_sha256_hash', table_name='pdf_artifacts', schema='artifacts')
+    op.drop_constraint('uq_pdf_artifacts_report_hash', 'pdf_artifacts', schema='artifacts', type_='unique')
+    # Un blob compartido por varios reportes no cabe en el único global: se conserva la fila más reciente
+    op.execute(sa.text("""
+        DELETE FROM artifacts.pdf_artifacts a
+        USING artifacts.pdf_artifacts b
+        WHERE a.sha256_hash = b.sha256_hash
+          AND (a.generated_at, a.artifact_id) < (b.generated_at, b.artifact_id)
+    """))
+    op.create_unique_constraint('pdf_artifacts_sha256_hash_key', 'pdf_artifacts', ['sha256_hash'], schema='artifacts')
+    op.drop_column('pdf_artifacts', 'size_bytes', schema='artifacts')
@@ -0,0 +1,26 @@
+"""pdf artifacts record the render variant they came from
+
+Revision ID: e7b3a19c5d20
+Revises: c41e7d2b9f03
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3a19c5d20'
+down_revision: Union[str, None] = 'c41e7d2b9f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Las filas previas quedan con variant_key nulo: la primera /generate-pdf-url de cada reporte las repone
+    op.add_column('pdf_artifacts', sa.Column('variant_key', sa.String(length=64), nullable=True), schema='artifacts')
+    op.create_index('ix_pdf_artifacts_report_variant', 'pdf_artifacts', ['report_id', 'variant_key'], schema='artifacts')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pdf_artifacts_report_variant', table_name='pdf_artifacts', schema='artifacts')
+    op.drop_column('pdf_artifacts', 'variant_key', schema='artifacts')
@@ -0,0 +1,96 @@
+"""
+Benchmark del planificador de OpenAI contra fake_openai_server.py (levantado en un hilo).
+
+Lanza en paralelo llamadas batch (orquestador) e interactivas (/generate-pdf) sobre
+el mismo modelo, sin y con LlmScheduler, y compara los 429 que recibe el servidor,
+los fallos y la latencia por prioridad.
+
+Uso:  python bench_llm_scheduler.py [--rpm 120] [--tpm 60000] [--batch 30] [--interactive 6]
+"""
+import argparse
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+
+from fake_openai_server import create_app
+from src.infrastructure.openai.openai_adapter import OpenAIAdapter
+from src.infrastructure.openai.llm_scheduler import LlmScheduler, RateLimitedAIAdapter
+
+MODEL = "gpt-4o"
+PAYLOAD = "x" * 8000  # ~2000 tokens de prompt
+
+
+def start_server(rpm: int, tpm: int, latency: float, output_tokens: int) -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = uvicorn.Config(create_app(rpm, tpm, latency, output_tokens), host="127.0.0.1", port=port, log_level="error")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def run_round(base_url: str, args, scheduled: bool):
+    httpx.post(f"{base_url}/stats/reset")
+    # Sin planificador: los reintentos ciegos del cliente oficial (max_retries=2)
+    raw = OpenAIAdapter(api_key="fake", base_url=f"{base_url}/v1", max_retries=0 if scheduled else 2)
+    adapters = {"batch": raw, "interactive": raw}
+    if scheduled:
+        scheduler = LlmScheduler({MODEL: (args.rpm, args.tpm)}, expected_output_tokens=args.output_tokens, max_attempts=6)
+        adapters = {p: RateLimitedAIAdapter(raw, scheduler, priority=p) for p in adapters}
+
+    results = {"batch": [], "interactive": []}
+    failures = {"batch": 0, "interactive": 0}
+
+    def call(priority: str):
+        start = time.perf_counter()
+        try:
+            adapters[priority].generate_report("Eres un analista.", PAYLOAD, MODEL)
+            results[priority].append(time.perf_counter() - start)
+        except Exception:
+            failures[priority] += 1
+
+    with ThreadPoolExecutor(max_workers=args.batch + args.interactive) as pool:
+        # El lote arranca primero; las interactivas llegan cuando ya hay cola
+        futures = [pool.submit(call, "batch") for _ in range(args.batch)]
+        time.sleep(0.5)
+        futures += [pool.submit(call, "interactive") for _ in range(args.interactive)]
+        for f in futures:
+            f.result()
+
+    server_stats = httpx.get(f"{base_url}/stats").json()
+    label = "scheduler" if scheduled else "sin scheduler"
+    print(f"\n[{label}] 429 recibidos por el servidor: {server_stats['rejected_429']}  aceptados: {server_stats['accepted']}")
+    for priority in ("interactive", "batch"):
+        latencies = results[priority]
+        median = statistics.median(latencies) if latencies else float("nan")
+        worst = max(latencies) if latencies else float("nan")
+        print(f"  {priority:<12} ok={len(latencies):<4} fallidas={failures[priority]:<4} mediana={median:6.2f}s  máx={worst:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rpm", type=int, default=120)
+    parser.add_argument("--tpm", type=int, default=60000)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--output-tokens", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=30)
+    parser.add_argument("--interactive", type=int, default=6)
+    args = parser.parse_args()
+
+    base_url = start_server(args.rpm, args.tpm, args.latency, args.output_tokens)
+    print(f"Servidor falso en {base_url}: {args.rpm} RPM / {args.tpm} TPM, "
+          f"{args.batch} batch + {args.interactive} interactivas de ~{len(PAYLOAD) // 4 + args.output_tokens} tokens")
+    run_round(base_url, args, scheduled=False)
+    run_round(base_url, args, scheduled=True)
+
+
+if __name__ == "__main__":
+    main()
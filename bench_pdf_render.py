@@ -0,0 +1,75 @@
+"""
+Benchmark del render PDF de los informes del orquestador.
+
+Compara, sobre el mismo content_json:
+  - markdown: JSON -> Markdown -> markdown2 (HTML) -> BeautifulSoup -> flowables
+  - json:     JSON -> flowables directos (src/infrastructure/pdf/report_flowables.py)
+
+Uso:  python bench_pdf_render.py [iteraciones]
+"""
+import sys
+import time
+import statistics
+
+from src.application.services.report_templates import render_individual_markdown, render_group_markdown
+from src.infrastructure.pdf.reportlab_adapter import ReportLabAdapter
+from src.infrastructure.pdf.report_flowables import build_report_flowables
+
+LOREM = ("El participante mantiene un tono de voz estable con variaciones de intensidad en los momentos "
+         "de desacuerdo, acompañado de pausas breves antes de argumentar y contacto visual sostenido. ")
+
+
+def sample_individual(n_items: int = 4) -> dict:
+    return {
+        "header": {"nombre": "Participante Demo", "edad": "29", "genero": "F", "ciudad": "Bogotá", "rol": "Líder"},
+        "analisis_tecnico": {"voz": LOREM * 3, "postura": LOREM * 2, "emociones": LOREM * 3},
+        "aspectos_positivos": [{"nombre": f"Fortaleza {i}", "justificacion": LOREM, "ref": 4.5} for i in range(n_items)],
+        "aspectos_negativos": [{"nombre": f"Limitante {i}", "justificacion": LOREM, "ref": 2.5} for i in range(n_items)],
+        "afinidad": {"nivel": "Alta", "rol_ideal": "Coordinador de equipo"},
+        "hitos": [{"tiempo": f"0{i}:30", "titulo": f"Hito {i}", "descripcion": LOREM, "ref": 4.0} for i in range(n_items)],
+        "observacion_final": LOREM * 4,
+    }
+
+
+def sample_group(n_items: int = 4) -> dict:
+    return {
+        "analisis_colectivo": {"voz": LOREM * 2, "sincronia": LOREM * 2, "clima_emocional": LOREM * 2},
+        "aspectos_positivos": [{"nombre": f"Fortaleza {i}", "justificacion": LOREM, "ref": 4.0} for i in range(n_items)],
+        "aspectos_negativos": [{"nombre": f"Limitante {i}", "justificacion": LOREM, "ref": 2.0} for i in range(n_items)],
+        "interaccion": {"patron": "Cooperativo", "liderazgo": LOREM},
+        "hitos_grupales": [{"tiempo": f"0{i}:10", "evento": f"Evento {i}", "descripcion": LOREM} for i in range(n_items)],
+        "conclusion_grupal": LOREM * 4,
+    }
+
+
+def timed(fn, iterations: int):
+    fn()  # calentamiento (fuentes, imports perezosos)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), statistics.mean(samples)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    adapter = ReportLabAdapter()
+
+    cases = [
+        ("individual", sample_individual(), render_individual_markdown),
+        ("group", sample_group(), render_group_markdown),
+    ]
+
+    print(f"Iteraciones por caso: {iterations}")
+    print(f"{'informe':<12}{'ruta':<10}{'mediana ms':>12}{'media ms':>12}")
+    for kind, data, to_markdown in cases:
+        markdown_median, markdown_mean = timed(lambda: adapter._render(to_markdown(data)), iterations)
+        json_median, json_mean = timed(lambda: adapter._build(build_report_flowables(kind, data)), iterations)
+        print(f"{kind:<12}{'markdown':<10}{markdown_median:>12.2f}{markdown_mean:>12.2f}")
+        print(f"{kind:<12}{'json':<10}{json_median:>12.2f}{json_mean:>12.2f}")
+        print(f"{'':<12}{'speedup':<10}{markdown_median / json_median:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
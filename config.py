@@ -97,4 +97,119 @@ Genera un análisis grupal en formato JSON puro. Analiza patrones de liderazgo,
 
 ## CONTEXTO DE LA SESIÓN
 {{contexto_grupal}}
-"""
\ No newline at end of file
+"""
+# --- CONFIGURACIÓN DE RENDIMIENTO (API) ---
+# Tamaño del pool que ejecuta los trabajos de /jobs/pdf fuera del event loop
+PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", "4"))
+# Máximo de trabajos en cola o ejecución antes de rechazar con 429
+PDF_JOB_MAX_PENDING = int(os.getenv("PDF_JOB_MAX_PENDING", "100"))
+# Tiempo que se conservan los trabajos terminados para consulta/descarga
+PDF_JOB_TTL_SECONDS = int(os.getenv("PDF_JOB_TTL_SECONDS", "3600"))
+
+# --- RENDER PDF EN PROCESOS (PDF_RENDER_POOL_SIZE=0 lo desactiva) ---
+PDF_RENDER_POOL_SIZE = int(os.getenv("PDF_RENDER_POOL_SIZE", "0"))
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "120"))
+PDF_RENDER_MAX_JOBS_PER_WORKER = int(os.getenv("PDF_RENDER_MAX_JOBS_PER_WORKER", "50"))
+
+# --- CACHÉ DE RENDER PDF (direccionado por contenido) ---
+# Cada motor usa su propio subdirectorio (reportlab/, xhtml2pdf/) con su propio límite
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join("artifacts", ".render_cache"))
+RENDER_CACHE_MAX_MB = int(os.getenv("RENDER_CACHE_MAX_MB", "256"))
+# Los PDF en bytes (/generate-pdf) se sirven desde memoria; el disco solo con PDF_PERSIST_TO_DISK
+RENDER_CACHE_MEMORY_MB = int(os.getenv("RENDER_CACHE_MEMORY_MB", "32"))
+
+# --- ALMACÉN DE PDF DIRECCIONADO POR CONTENIDO (blobs por sha256) ---
+# "local": disco + URLs firmadas con HMAC servidas en /files | "s3": S3/MinIO con URLs prefirmadas (boto3, incluido en requirements.txt)
+ARTIFACT_STORAGE_BACKEND = os.getenv("ARTIFACT_STORAGE_BACKEND", "local").lower()
+ARTIFACT_STORE_DIR = os.getenv("ARTIFACT_STORE_DIR", os.path.join("artifacts", "blobs"))
+# Vigencia de las URLs de /generate-pdf-url
+ARTIFACT_URL_TTL_SECONDS = int(os.getenv("ARTIFACT_URL_TTL_SECONDS", "900"))
+# Backend local: clave HMAC propia de las URLs de /files (nunca la API key; vacía: clave aleatoria por proceso)
+# y origen público de /files (vacío: URL relativa). Con varios workers o reinicios, la clave debe fijarse aquí
+ARTIFACT_URL_SIGNING_KEY = os.getenv("ARTIFACT_URL_SIGNING_KEY") or None
+ARTIFACT_PUBLIC_BASE_URL = os.getenv("ARTIFACT_PUBLIC_BASE_URL", "").rstrip("/")
+# Backend s3 (credenciales: AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY). MinIO local: http://localhost:9000
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "be-labs-artifacts")
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "pdf/")
+ARTIFACT_S3_ENDPOINT_URL = os.getenv("ARTIFACT_S3_ENDPOINT_URL") or None
+ARTIFACT_S3_PUBLIC_ENDPOINT_URL = os.getenv("ARTIFACT_S3_PUBLIC_ENDPOINT_URL") or None
+ARTIFACT_S3_REGION = os.getenv("ARTIFACT_S3_REGION", "us-east-1")
+
+# --- CACHÉ DE RESPUESTAS LLM (/generate-pdf) ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join("artifacts", ".llm_cache"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Guardar también en artifacts/ los PDF servidos en memoria por /generate-pdf
+PDF_PERSIST_TO_DISK = os.getenv("PDF_PERSIST_TO_DISK", "false").lower() == "true"
+
+# --- INGESTA BRONZE ---
+# Filas por transacción al cargar audit.ingestion_staging
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+
+# --- ORQUESTADOR ---
+# Llamadas LLM/PDF simultáneas por sesión (1 = secuencial)
+ORCHESTRATOR_MAX_CONCURRENCY = int(os.getenv("ORCHESTRATOR_MAX_CONCURRENCY", "4"))
+# Presupuesto aproximado de tokens del resumen de telemetría enviado al LLM (0 = eventos crudos)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+
+# --- LECTURAS SILVER ---
+# Filas por lote del cursor del lado del servidor al leer cleansed.biometric_events
+DB_STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "500"))
+
+# --- POOL ASYNC (asyncpg) PARA LA API ---
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "80"))
+ASYNC_DB_POOL_TIMEOUT = int(os.getenv("ASYNC_DB_POOL_TIMEOUT", "30"))
+# Sentencias preparadas cacheadas por conexión (0 si hay PgBouncer en modo transaction)
+ASYNC_DB_STATEMENT_CACHE_SIZE = int(os.getenv("ASYNC_DB_STATEMENT_CACHE_SIZE", "100"))
+
+# --- CLIENTE HTTP SUPABASE (PostgREST) ---
+SUPABASE_HTTP_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_HTTP_TIMEOUT_SECONDS", "10"))
+SUPABASE_HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "50"))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
+
+# --- ORIGEN DE LOS INFORMES PARA /generate-pdf ---
+# "supabase": vista vw_reports vía PostgREST | "sql": la misma consulta sobre DATABASE_URL
+REPORT_REPOSITORY_BACKEND = os.getenv("REPORT_REPOSITORY_BACKEND", "supabase").lower()
+
+# --- CACHÉ DE LECTURA DE INFORMES (en memoria) ---
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true"
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "1000"))
+REPORT_CACHE_MAX_MB = int(os.getenv("REPORT_CACHE_MAX_MB", "64"))
+# Segundos en que una entrada se sirve sin ninguna llamada remota; luego se revalida por generated_at
+REPORT_CACHE_FRESH_SECONDS = float(os.getenv("REPORT_CACHE_FRESH_SECONDS", "30"))
+
+# --- DOSSIER DE SESIÓN (POST /sessions/{id}/dossier) ---
+# Informes de la sesión generados en paralelo
+DOSSIER_MAX_CONCURRENCY = int(os.getenv("DOSSIER_MAX_CONCURRENCY", "4"))
+
+# --- MODO DE INFORME (/generate-pdf) ---
+# "template": plantillas deterministas sobre content_json, sin LLM | "narrative": el LLM redacta el informe
+PDF_REPORT_MODE = os.getenv("PDF_REPORT_MODE", "template").lower()
+
+# --- LÍMITES DE OPENAI (planificador RPM/TPM compartido) ---
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+# Límites de la cuenta por modelo (peticiones y tokens por minuto)
+LLM_RPM_INDIVIDUAL = int(os.getenv("LLM_RPM_INDIVIDUAL", "500"))
+LLM_TPM_INDIVIDUAL = int(os.getenv("LLM_TPM_INDIVIDUAL", "200000"))
+LLM_RPM_GRUPAL = int(os.getenv("LLM_RPM_GRUPAL", "500"))
+LLM_TPM_GRUPAL = int(os.getenv("LLM_TPM_GRUPAL", "30000"))
+# Tokens de salida que se reservan por llamada (OpenAI también los descuenta del TPM)
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1500"))
+# Intentos por llamada ante 429 (respetando Retry-After)
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+# Vacío: API oficial. Para pruebas de carga: http://localhost:8099/v1 (fake_openai_server.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# --- COALESCENCIA DE GENERACIONES EN CURSO (single-flight) ---
+# "local": solo dentro del proceso | "postgres": además pg_advisory_lock entre workers
+SINGLE_FLIGHT_BACKEND = os.getenv("SINGLE_FLIGHT_BACKEND", "local").lower()
+# Espera máxima por el lock de otro worker antes de generar sin coordinarse
+SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS = int(os.getenv("SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS", "300"))
+# Conexiones propias del lock (fuera del pool de la app): una por generación en curso entre workers
+SINGLE_FLIGHT_LOCK_POOL_SIZE = int(os.getenv("SINGLE_FLIGHT_LOCK_POOL_SIZE", "5"))
+# Espera máxima de una petición duplicada por la generación en curso dentro del mismo proceso
+SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS = int(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS", "300"))
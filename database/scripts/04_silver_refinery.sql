@@ -12,3 +12,90 @@ create table if not exists cleansed.biometric_events (
     t_start_ms bigint not null,
     cleansed_at timestamptz default now()
 );
+
+
+-------------------incremental content fingerprints per (session, subject)------------------
+-- each event contributes md5(source_type | t_start_ms | payload) split into two 64-bit halves;
+-- the halves are xor-folded and counted, so inserts and deletes update the row without
+-- rereading the session (xor is its own inverse). subject_id null groups events without subject.
+create table if not exists cleansed.event_fingerprints (
+    fingerprint_id uuid primary key default gen_random_uuid(),
+    session_id uuid not null references operational.sessions(session_id) on delete cascade,
+    subject_id uuid references operational.subjects(subject_id) on delete cascade,
+    event_count bigint not null default 0,
+    digest_hi bigint not null default 0,
+    digest_lo bigint not null default 0,
+    updated_at timestamptz default now(),
+    constraint uq_event_fingerprints_scope unique nulls not distinct (session_id, subject_id)
+);
+
+create or replace function cleansed.event_digest(source_type text, t_start_ms bigint, payload jsonb)
+returns text language sql immutable as $$
+    select md5(source_type || '|' || t_start_ms::text || '|' || coalesce(payload::text, 'null'));
+$$;
+
+create or replace function cleansed.fold_event_fingerprints()
+returns trigger language plpgsql as $$
+begin
+    -- old_events / new_events: transition tables of the statement (one upsert per subject, not per row)
+    if tg_op in ('DELETE', 'UPDATE') then
+        insert into cleansed.event_fingerprints as f (session_id, subject_id, event_count, digest_hi, digest_lo)
+        select session_id, subject_id, -count(*),
+               bit_xor(('x' || substr(d, 1, 16))::bit(64)::bigint),
+               bit_xor(('x' || substr(d, 17, 16))::bit(64)::bigint)
+        from (select session_id, subject_id, cleansed.event_digest(source_type, t_start_ms, processed_payload) as d
+              from old_events) o
+        group by session_id, subject_id
+        on conflict (session_id, subject_id) do update
+           set event_count = f.event_count + excluded.event_count,
+               digest_hi = f.digest_hi # excluded.digest_hi,
+               digest_lo = f.digest_lo # excluded.digest_lo,
+               updated_at = now();
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into cleansed.event_fingerprints as f (session_id, subject_id, event_count, digest_hi, digest_lo)
+        select session_id, subject_id, count(*),
+               bit_xor(('x' || substr(d, 1, 16))::bit(64)::bigint),
+               bit_xor(('x' || substr(d, 17, 16))::bit(64)::bigint)
+        from (select session_id, subject_id, cleansed.event_digest(source_type, t_start_ms, processed_payload) as d
+              from new_events) n
+        group by session_id, subject_id
+        on conflict (session_id, subject_id) do update
+           set event_count = f.event_count + excluded.event_count,
+               digest_hi = f.digest_hi # excluded.digest_hi,
+               digest_lo = f.digest_lo # excluded.digest_lo,
+               updated_at = now();
+    end if;
+    return null;
+end;
+$$;
+
+-- transition tables only allow one event per trigger
+drop trigger if exists trg_event_fingerprints_insert on cleansed.biometric_events;
+create trigger trg_event_fingerprints_insert after insert on cleansed.biometric_events
+    referencing new table as new_events
+    for each statement execute function cleansed.fold_event_fingerprints();
+
+drop trigger if exists trg_event_fingerprints_update on cleansed.biometric_events;
+create trigger trg_event_fingerprints_update after update on cleansed.biometric_events
+    referencing old table as old_events new table as new_events
+    for each statement execute function cleansed.fold_event_fingerprints();
+
+drop trigger if exists trg_event_fingerprints_delete on cleansed.biometric_events;
+create trigger trg_event_fingerprints_delete after delete on cleansed.biometric_events
+    referencing old table as old_events
+    for each statement execute function cleansed.fold_event_fingerprints();
+
+-- backfill: recomputes from the events already in silver (idempotent)
+insert into cleansed.event_fingerprints as f (session_id, subject_id, event_count, digest_hi, digest_lo)
+select session_id, subject_id, count(*),
+       bit_xor(('x' || substr(d, 1, 16))::bit(64)::bigint),
+       bit_xor(('x' || substr(d, 17, 16))::bit(64)::bigint)
+from (select session_id, subject_id, cleansed.event_digest(source_type, t_start_ms, processed_payload) as d
+      from cleansed.biometric_events) e
+group by session_id, subject_id
+on conflict (session_id, subject_id) do update
+   set event_count = excluded.event_count,
+       digest_hi = excluded.digest_hi,
+       digest_lo = excluded.digest_lo,
+       updated_at = now();
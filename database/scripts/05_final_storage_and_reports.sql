@@ -16,12 +16,33 @@ create table if not exists artifacts.reports (
 create table if not exists artifacts.pdf_artifacts (
     artifact_id uuid primary key default gen_random_uuid(),
     report_id uuid not null references artifacts.reports(report_id) on delete cascade,
-    blob_path text not null,       
-    sha256_hash text not null,     
+    blob_path text not null,       -- ruta del blob direccionado por contenido
+    sha256_hash text not null,     -- sha256 de los bytes del PDF
+    size_bytes bigint,
+    variant_key text,              -- sha256 de (versión del reporte, modo, motor/plantillas)
     generated_at timestamptz default now(),
-    constraint unq_pdf_hash unique (sha256_hash)
+    -- un mismo blob puede pertenecer a varios reportes; regenerar el mismo PDF hace upsert
+    constraint uq_pdf_artifacts_report_hash unique (report_id, sha256_hash)
 );
 
 -- Índices para búsqueda rápida desde el Backend
 create index if not exists idx_reports_json on artifacts.reports using gin (content_json);
-create index if not exists idx_reports_session on artifacts.reports (session_id);
\ No newline at end of file
+create index if not exists idx_reports_session on artifacts.reports (session_id);
+create index if not exists ix_pdf_artifacts_sha256_hash on artifacts.pdf_artifacts (sha256_hash);
+alter table artifacts.pdf_artifacts add column if not exists variant_key text;
+create index if not exists ix_pdf_artifacts_report_variant on artifacts.pdf_artifacts (report_id, variant_key);
+-- Vista plana consumida por la API (/generate-pdf) vía PostgREST.
+-- generated_at permite invalidar los cachés cuando el reporte se regenera.
+create or replace view public.vw_reports as
+select
+    r.report_id,
+    r.session_id,
+    r.subject_id,
+    r.kind,
+    r.content_json,
+    r.generated_at,
+    s.app_session_id,
+    c.title as case_title
+from artifacts.reports r
+join operational.sessions s on s.session_id = r.session_id
+join operational.cases c on c.case_id = s.case_id;
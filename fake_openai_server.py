@@ -0,0 +1,151 @@
+"""
+Servidor OpenAI falso (POST /v1/chat/completions) con límites RPM/TPM configurables.
+
+Repone la cuota de forma continua como la API real: al agotarla responde 429
+con Retry-After / retry-after-ms y las cabeceras x-ratelimit-*. Soporta stream=True.
+Sirve para probar el planificador de src/infrastructure/openai/llm_scheduler.py
+sin gastar tokens.
+
+Uso:  python fake_openai_server.py --port 8099 --rpm 30 --tpm 20000 --latency 1.5
+      OPENAI_BASE_URL=http://localhost:8099/v1 uvicorn src.main_api:app
+Contadores: GET /stats   Reinicio: POST /stats/reset
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Respuesta válida para el orquestador (JSON) y legible para /generate-pdf (Markdown)
+CANNED_CONTENT = json.dumps({
+    "header": {"nombre": "Participante", "rol": "N/A"},
+    "observacion_final": "Respuesta generada por fake_openai_server.py",
+}, ensure_ascii=False)
+
+
+class ReplenishingLimiter:
+    """
+    Requests and tokens per model, replenished continuously like the real API:
+    a full minute's quota is available at once and refills at limit / 60 per second.
+    """
+
+    def __init__(self, rpm: int, tpm: int, output_tokens: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.output_tokens = output_tokens
+        self.levels = {}
+        self.accepted = 0
+        self.rejected = 0
+
+    def estimate_tokens(self, body: dict) -> int:
+        prompt = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+        return prompt // 4 + int(body.get("max_tokens") or self.output_tokens)
+
+    def check(self, model: str, tokens: int):
+        """Returns (retry_after or None, reason or None, remaining requests, remaining tokens)."""
+        now = time.monotonic()
+        requests, token_level, updated = self.levels.get(model, (self.rpm, self.tpm, now))
+        elapsed = now - updated
+        requests = min(self.rpm, requests + elapsed * self.rpm / 60)
+        token_level = min(self.tpm, token_level + elapsed * self.tpm / 60)
+        tokens = min(tokens, self.tpm)
+
+        retry_after, reason = None, None
+        if requests < 1:
+            retry_after, reason = (1 - requests) * 60 / self.rpm, "requests"
+        elif token_level < tokens:
+            retry_after, reason = (tokens - token_level) * 60 / self.tpm, "tokens"
+
+        if reason:
+            self.rejected += 1
+        else:
+            requests -= 1
+            token_level -= tokens
+            self.accepted += 1
+        self.levels[model] = (requests, token_level, now)
+        return retry_after, reason, int(requests), int(token_level)
+
+
+def create_app(rpm: int, tpm: int, latency: float, output_tokens: int) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    limiter = ReplenishingLimiter(rpm, tpm, output_tokens)
+
+    def limit_headers(remaining_requests: int, remaining_tokens: int) -> dict:
+        return {
+            "x-ratelimit-limit-requests": str(rpm),
+            "x-ratelimit-limit-tokens": str(tpm),
+            "x-ratelimit-remaining-requests": str(max(0, remaining_requests)),
+            "x-ratelimit-remaining-tokens": str(max(0, remaining_tokens)),
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "gpt-4o")
+        tokens = limiter.estimate_tokens(body)
+        retry_after, reason, remaining_requests, remaining_tokens = limiter.check(model, tokens)
+        headers = limit_headers(remaining_requests, remaining_tokens)
+
+        if retry_after is not None:
+            headers["retry-after"] = str(math.ceil(retry_after))
+            headers["retry-after-ms"] = str(int(retry_after * 1000))
+            return JSONResponse(status_code=429, headers=headers, content={"error": {
+                "message": f"Rate limit reached for {model} on {reason}. Please try again in {retry_after:.3f}s.",
+                "type": reason,
+                "code": "rate_limit_exceeded",
+            }})
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        if body.get("stream"):
+            async def events():
+                pieces = [CANNED_CONTENT[i:i + 16] for i in range(0, len(CANNED_CONTENT), 16)]
+                for piece in pieces:
+                    await asyncio.sleep(latency / len(pieces))
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+        await asyncio.sleep(latency)
+        return JSONResponse(headers=headers, content={
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": CANNED_CONTENT}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": tokens - output_tokens, "completion_tokens": output_tokens, "total_tokens": tokens},
+        })
+
+    @app.get("/stats")
+    async def stats():
+        return {"rpm": rpm, "tpm": tpm, "accepted": limiter.accepted, "rejected_429": limiter.rejected}
+
+    @app.post("/stats/reset")
+    async def reset():
+        limiter.levels.clear()
+        limiter.accepted = limiter.rejected = 0
+        return {"reset": True}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--rpm", type=int, default=30, help="peticiones por minuto y modelo")
+    parser.add_argument("--tpm", type=int, default=20000, help="tokens por minuto y modelo")
+    parser.add_argument("--latency", type=float, default=1.0, help="segundos por respuesta")
+    parser.add_argument("--output-tokens", type=int, default=1500, help="tokens de salida asumidos sin max_tokens")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.rpm, args.tpm, args.latency, args.output_tokens), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,213 @@
 import uuid
 import json
-from typing import Optional
-from src.domain.ports import ReportRepositoryPort, AIPort, PDFPort
+import hashlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+from src.domain.ports import ReportRepositoryPort, RepositoryPort, AIPort, PDFPort, LLMCachePort, ArtifactStoragePort
+from src.application.services.report_templates import render_report_markdown, has_template, TEMPLATE_VERSION
+from src.application.services.single_flight import SingleFlight
+
+# "template": Markdown determinista desde content_json, sin LLM.
+# "narrative": el LLM redacta el informe a partir de content_json (opt-in).
+REPORT_MODES = ("template", "narrative")
 
 class GeneratePdfUseCase:
     """
     Orchestrates the PDF generation process for both Individual and Group reports.
     Uses flat metadata from the improved Supabase view.
+    The default "template" mode renders content_json through versioned templates;
+    the LLM is only called in "narrative" mode.
+    Concurrent requests for the same report (double clicks, client retries)
+    share one in-flight generation through SingleFlight.
     """
     
     def __init__(self, 
                  report_repo: ReportRepositoryPort, 
                  ai_service: AIPort, 
-                 pdf_service: PDFPort):
+                 pdf_service: PDFPort,
+                 llm_cache: Optional[LLMCachePort] = None,
+                 default_mode: str = "template",
+                 single_flight: Optional[SingleFlight] = None,
+                 artifact_store: Optional[ArtifactStoragePort] = None,
+                 artifact_repo: Optional[RepositoryPort] = None):
         self.report_repo = report_repo
         self.ai_service = ai_service
         self.pdf_service = pdf_service
+        self.llm_cache = llm_cache
+        self.default_mode = default_mode
+        self._resolve_mode(default_mode)
+        self.single_flight = single_flight or SingleFlight()
+        self.artifact_store = artifact_store
+        # pdf_artifacts: qué blob corresponde a cada (versión del reporte, modo)
+        self.artifact_repo = artifact_repo
 
-    def execute(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> Optional[str]:
+    def execute(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None, mode: Optional[str] = None) -> Optional[str]:
         """
         Generates a PDF for the given session. 
         Infects real metadata (Session ID, Case Title) directly from the report_data.
         """
+        def run():
+            markdown_content, filename = self._build_markdown(session_id, subject_id, mode)
+            return self.pdf_service.create_pdf(markdown_content, filename)
+        return self._coalesced("file", session_id, subject_id, mode, run)
+
+    def execute_bytes(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None, mode: Optional[str] = None) -> Tuple[str, bytes]:
+        """
+        Same pipeline as execute, but the PDF is rendered in memory.
+        Returns (filename, pdf_bytes) so the API can stream it without touching disk.
+        """
+        return self._coalesced("bytes", session_id, subject_id, mode, lambda: self._render_bytes(session_id, subject_id, mode))
+
+    def execute_artifact(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None, mode: Optional[str] = None,
+                         report_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Returns the stored PDF for this report version and mode, rendering it only
+        when pdf_artifacts has no blob for it yet; new blobs are recorded there.
+        Returns {"filename", "sha256", "size_bytes", "blob_path", "created"}; the
+        caller hands out a signed URL to the blob. `report_data` skips the fetch
+        when the caller already has the report.
+        """
+        if self.artifact_store is None:
+            raise RuntimeError("GeneratePdfUseCase sin artifact_store configurado")
+
+        def run():
+            report = self._load_report(session_id, subject_id, report_data)
+            effective_mode = self._effective_mode(report, mode)
+            variant_key = self._variant_key(report, effective_mode)
+            stored = self._stored_artifact(report, variant_key)
+            if stored is not None:
+                return {"filename": f"{report['filename']}_{effective_mode}.pdf", **stored, "created": False}
+
+            filename, pdf_bytes = self._render_bytes(session_id, subject_id, mode, report)
+            blob = self.artifact_store.put_bytes(pdf_bytes)
+            if self.artifact_repo is not None and variant_key is not None:
+                try:
+                    self.artifact_repo.save_pdf_artifact(
+                        uuid.UUID(report["report_id"]), blob["blob_path"],
+                        sha256_hash=blob["sha256"], size_bytes=blob["size_bytes"], variant_key=variant_key
+                    )
+                except Exception as e:
+                    # El blob ya está guardado: la URL se entrega igual, la próxima llamada re-renderiza
+                    print(f"⚠️ No se pudo registrar el artefacto del reporte {report['report_id']}: {e}")
+            return {"filename": filename, **blob}
+        return self._coalesced("artifact", session_id, subject_id, mode, run)
+
+    def _effective_mode(self, report: Dict[str, Any], mode: Optional[str]) -> str:
+        # Igual que _render_template: sin plantilla para el reporte, el modo plantilla cae a narrativo
+        if self._resolve_mode(mode) == "template" and has_template(report["kind"], report["content_json"]):
+            return "template"
+        return "narrative"
+
+    def _variant_key(self, report: Dict[str, Any], effective_mode: str) -> Optional[str]:
+        """Identifies one rendered PDF of a report version; None when the version is unknown."""
+        if not report["generated_at"]:
+            return None
+        parts = (report["report_id"], str(report["generated_at"]), effective_mode,
+                 self.pdf_service.render_identity(), f"templates:{TEMPLATE_VERSION}")
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _stored_artifact(self, report: Dict[str, Any], variant_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if self.artifact_repo is None or variant_key is None:
+            return None
+        try:
+            stored = self.artifact_repo.get_pdf_artifact(uuid.UUID(report["report_id"]), variant_key)
+        except Exception as e:
+            print(f"⚠️ No se pudo consultar pdf_artifacts para el reporte {report['report_id']}: {e}")
+            return None
+        # La fila sin blob (almacén limpiado a mano) no sirve: se re-renderiza
+        if stored is None or not self.artifact_store.exists(stored["sha256"]):
+            return None
+        return stored
+
+    def _render_bytes(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], mode: Optional[str],
+                      report_data: Optional[Dict[str, Any]] = None) -> Tuple[str, bytes]:
+        # Sin coalescer: lo llaman execute_bytes y execute_artifact, que ya tienen el lock del reporte
+        markdown_content, filename = self._build_markdown(session_id, subject_id, mode, report_data)
+        pdf_bytes = self.pdf_service.render_pdf_bytes(markdown_content, filename)
+        return f"{filename}.pdf", pdf_bytes
+
+    def execute_stream(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None, mode: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Streaming variant for progressive previews. Yields ("delta", text) while
+        the LLM writes the Markdown, then renders the PDF as soon as the stream
+        completes and yields ("done", {"filename", "size_bytes", "cached", "mode"}).
+        In template mode the whole Markdown arrives as a single delta.
+        The Markdown and the PDF land in the LLM and render caches, so a later
+        /generate-pdf for the same report is served without a new LLM call.
+        """
+        report = self._load_report(session_id, subject_id)
+
+        templated = self._render_template(report, mode)
+        if templated is not None:
+            yield "delta", templated
+            filename = f"{report['filename']}_template"
+            pdf_bytes = self.pdf_service.render_pdf_bytes(templated, filename)
+            yield "done", {"filename": f"{filename}.pdf", "size_bytes": len(pdf_bytes), "cached": False, "mode": "template"}
+            return
+
+        spec = self._prepare_prompt(report)
+
+        cached = self._cached_markdown(spec)
+        if cached is not None:
+            markdown_content = cached
+            yield "delta", cached
+        else:
+            parts = []
+            for delta in self.ai_service.stream_report(spec["system_prompt"], spec["user_payload"], spec["model"]):
+                parts.append(delta)
+                yield "delta", delta
+            markdown_content = "".join(parts)
+            self._store_markdown(spec, markdown_content)
+
+        pdf_bytes = self.pdf_service.render_pdf_bytes(markdown_content, spec["filename"])
+        yield "done", {"filename": f"{spec['filename']}.pdf", "size_bytes": len(pdf_bytes), "cached": cached is not None, "mode": "narrative"}
+
+    def _coalesced(self, output: str, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], mode: Optional[str], run):
+        """
+        Runs `run` once per (output, report, mode) among concurrent callers.
+        The cross-process lock ignores `output`: a file and a bytes request for the
+        same report serialize, and the second one hits the LLM and render caches.
+        """
+        mode = self._resolve_mode(mode)
+        lock_key = f"pdf:{session_id}:{subject_id}:{mode}"
+        return self.single_flight.do(("pdf", output, str(session_id), str(subject_id), mode), run, lock_key=lock_key)
+
+    def _build_markdown(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], mode: Optional[str] = None,
+                        report_data: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """Fetches the report (unless given) and produces its Markdown. Returns (markdown, filename_prefix)."""
+        def run():
+            report = self._load_report(session_id, subject_id, report_data)
+            templated = self._render_template(report, mode)
+            if templated is not None:
+                return templated, f"{report['filename']}_template"
+            spec = self._prepare_prompt(report)
+            return self._generate_markdown(spec), spec["filename"]
+        # Un execute y un execute_bytes simultáneos del mismo reporte comparten la llamada al LLM
+        key = ("pdf", "markdown", str(session_id), str(subject_id), self._resolve_mode(mode))
+        return self.single_flight.do(key, run)
+
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        mode = mode or self.default_mode
+        if mode not in REPORT_MODES:
+            raise ValueError(f"Modo de informe desconocido: {mode} (válidos: {', '.join(REPORT_MODES)})")
+        return mode
+
+    def _render_template(self, report: Dict[str, Any], mode: Optional[str]) -> Optional[str]:
+        """Template-mode Markdown, or None when the report must go through the LLM."""
+        if self._resolve_mode(mode) != "template":
+            return None
+        metadata = {"app_session_id": report["app_session_id"], "case_title": report["case_title"]}
+        markdown_content = render_report_markdown(report["kind"], report["content_json"], metadata)
+        if markdown_content is None:
+            # Tipo sin plantilla o JSON no estructurado: se conserva la ruta narrativa
+            print(f"⚠️ Sin plantilla v{TEMPLATE_VERSION} para el reporte {report['report_id']} ({report['kind']}). Usando modo narrativo...")
+        return markdown_content
+
+    def _load_report(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID],
+                     report_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetches (unless given) and validates the report; returns its content plus the flat view metadata."""
         # 1. FETCH DATA
-        report_data = self.report_repo.get_report_content(session_id, subject_id)
+        if report_data is None:
+            report_data = self.report_repo.get_report_content(session_id, subject_id)
         
         if not report_data:
             tipo_err = "Grupal" if subject_id is None else f"Individual para {subject_id}"
@@ -38,8 +222,20 @@ class GeneratePdfUseCase:
 
         # --- JUGADA MBAPPE ACTUALIZADA (DATOS PLANOS) ---
         # Ahora los datos vienen directos desde la vista mejorada de Supabase
-        app_sid = report_data.get("app_session_id", "No proporcionado")
-        case_title = report_data.get("case_title", "Análisis de Caso")
+        return {
+            "content_json": content_json,
+            "kind": report_kind,
+            "report_id": str(report_id),
+            "generated_at": report_data.get("generated_at"),
+            "app_session_id": report_data.get("app_session_id", "No proporcionado"),
+            "case_title": report_data.get("case_title", "Análisis de Caso"),
+            # NOMBRE DEL ARCHIVO PDF (sin modo: se agrega según la ruta efectiva, plantilla o narrativa)
+            "filename": f"informe_{report_kind}_{str(report_id)[:8]}",
+        }
+
+    def _prepare_prompt(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds the LLM request for narrative mode plus the PDF filename prefix."""
+        report_kind = report["kind"]
 
         # 2. SELECCIONAR PROMPT SEGÚN EL TIPO
         if report_kind == "individual":
@@ -69,25 +265,58 @@ El informe debe contener:
 Usa formato Markdown con headers, listas y tablas. NO uses emojis."""
 
         # 3. PREPARAR INPUT PARA IA (Metadatos + JSON)
-        json_str = json.dumps(content_json, ensure_ascii=False, indent=2)
+        json_str = json.dumps(report["content_json"], ensure_ascii=False, indent=2)
         
         # Bloque de contexto para que la IA no invente datos
         contexto_real = f"""
 DATOS REALES PARA EL ENCABEZADO DEL INFORME (USA ESTOS EXACTAMENTE):
-- ID de Sesión: {app_sid}
-- Título del Caso: {case_title}
+- ID de Sesión: {report['app_session_id']}
+- Título del Caso: {report['case_title']}
 - Tipo de Reporte: {report_kind.upper()}
 """
 
-        # LLAMADA A IA
+        return {
+            "system_prompt": system_prompt,
+            "user_payload": f"{contexto_real}\n\nGenera el informe basándote en estos datos biométricos:\n\n{json_str}",
+            "model": "gpt-4o",
+            "report_id": report["report_id"],
+            "generated_at": report["generated_at"],
+            "filename": f"{report['filename']}_narrative",
+        }
+
+    def _generate_markdown(self, spec: Dict[str, Any]) -> str:
+        """
+        Calls the LLM only on a cache miss. Entries are scoped by report_id and
+        versioned by generated_at, so regenerating the report invalidates them.
+        """
+        # LLAMADA A IA (cache-aside: el mismo reporte no se vuelve a pagar)
+        cached = self._cached_markdown(spec)
+        if cached is not None:
+            return cached
+
         markdown_content = self.ai_service.generate_report(
-            system_prompt=system_prompt,
-            user_json_data=f"{contexto_real}\n\nGenera el informe basándote en estos datos biométricos:\n\n{json_str}",
-            model="gpt-4o"
+            system_prompt=spec["system_prompt"], user_json_data=spec["user_payload"], model=spec["model"]
         )
-        
-        # 4. GENERAR ARCHIVO PDF
-        filename = f"informe_{report_kind}_{str(report_id)[:8]}"
-        pdf_path = self.pdf_service.create_pdf(markdown_content, filename)
-        
-        return pdf_path
+        self._store_markdown(spec, markdown_content)
+        return markdown_content
+
+    def _cache_key(self, spec: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        temperature = getattr(self.ai_service, "temperature", None)
+        key = self.llm_cache.make_key(spec["system_prompt"], spec["user_payload"], spec["model"], temperature)
+        version = str(spec["generated_at"]) if spec["generated_at"] else None
+        return key, version
+
+    def _cached_markdown(self, spec: Dict[str, Any]) -> Optional[str]:
+        if not self.llm_cache:
+            return None
+        key, version = self._cache_key(spec)
+        cached = self.llm_cache.get(key, scope=spec["report_id"], version=version)
+        if cached is not None:
+            print(f"✅ [CACHÉ LLM] Markdown del reporte {spec['report_id']} recuperado. Saltando OpenAI...")
+        return cached
+
+    def _store_markdown(self, spec: Dict[str, Any], markdown_content: str):
+        if not self.llm_cache:
+            return
+        key, version = self._cache_key(spec)
+        self.llm_cache.set(key, markdown_content, scope=spec["report_id"], version=version)
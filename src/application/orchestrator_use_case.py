@@ -1,22 +1,134 @@
 import json
 import uuid
 import hashlib
-from config import SYSTEM_PROMPT, GROUP_SYSTEM_PROMPT, MODELO_INDIVIDUAL, MODELO_GRUPAL
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from config import SYSTEM_PROMPT, GROUP_SYSTEM_PROMPT, MODELO_INDIVIDUAL, MODELO_GRUPAL, ORCHESTRATOR_MAX_CONCURRENCY, PROMPT_TOKEN_BUDGET
+from src.application.services.telemetry_summarizer import TelemetrySummarizer
+from src.application.services.report_templates import render_individual_markdown, render_group_markdown
+from src.application.services.single_flight import SingleFlight
+from src.domain.ports import ArtifactStoragePort
+
+# Huella de un sujeto sin eventos (mismo formato que format_fingerprint)
+EMPTY_FINGERPRINT = "v1:0:" + "0" * 32
+
+
+class _SessionEvents:
+    """
+    Lectura perezosa y única (thread-safe) de la capa Silver: solo se paga si algún reporte no está en caché.
+    No se usa iter_cleansed_events por reporte: el grupal necesita la línea de tiempo completa de todos
+    modos, así que una sola consulta (get_session_events_indexed) lee cada fila una vez, mientras que
+    hashear y resumir desde N+1 cursores leería la sesión dos veces con N+1 consultas.
+    """
+
+    def __init__(self, db, session_id: uuid.UUID):
+        self._db = db
+        self._session_id = session_id
+        self._lock = threading.Lock()
+        self._loaded: Optional[Tuple[Dict[uuid.UUID, list], list]] = None
+
+    def for_subject(self, subject_id: uuid.UUID) -> list:
+        return self._load()[0].get(subject_id, [])
+
+    def timeline(self) -> list:
+        return self._load()[1]
+
+    def _load(self):
+        with self._lock:
+            if self._loaded is None:
+                self._loaded = self._db.get_session_events_indexed(self._session_id)
+            return self._loaded
+
 
 class OrchestratorUseCase:
-    def __init__(self, db_adapter, ai_adapter, pdf_adapter):
+    def __init__(self, db_adapter, ai_adapter, pdf_adapter, max_concurrency: int = ORCHESTRATOR_MAX_CONCURRENCY,
+                 summarizer: Optional[TelemetrySummarizer] = None, single_flight: Optional[SingleFlight] = None,
+                 artifact_store: Optional[ArtifactStoragePort] = None):
         self.db = db_adapter
         self.ai = ai_adapter
         self.pdf = pdf_adapter
+        # Número máximo de análisis (LLM + PDF) simultáneos por sesión
+        self.max_concurrency = max_concurrency
+        # Resumen previo al LLM; PROMPT_TOKEN_BUDGET=0 envía los eventos crudos
+        if summarizer is None and PROMPT_TOKEN_BUDGET > 0:
+            summarizer = TelemetrySummarizer(token_budget=PROMPT_TOKEN_BUDGET)
+        self.summarizer = summarizer
+        # Dos corridas simultáneas de la misma sesión (reintentos del cliente) comparten cada reporte en curso
+        self.single_flight = single_flight or SingleFlight()
+        # Blobs direccionados por contenido: un PDF idéntico se guarda una sola vez
+        self.artifact_store = artifact_store
+
+    def _build_llm_payload(self, events: list) -> str:
+        """Serializa lo que recibe el modelo: el resumen acotado o, sin summarizer, los eventos crudos."""
+        if self.summarizer:
+            return json.dumps(self.summarizer.summarize(events), ensure_ascii=False)
+        return json.dumps(events)
 
-    def _generate_data_hash(self, prompt: str, events: list) -> str:
+    def _payload_identity(self) -> str:
+        # Cambiar el modo de payload cambia el prompt efectivo: debe invalidar el caché
+        return self.summarizer.identity() if self.summarizer else ""
+
+    def _generate_data_hash(self, prompt: str, events: Iterable[dict]) -> str:
         """
         Genera una huella única basada en el prompt y los datos biométricos.
         Garantiza que si el JSON de entrada o el prompt cambian, el hash cambie.
+        Acepta cualquier iterable y hashea evento por evento (sin armar el JSON
+        completo); el resultado es idéntico al de json.dumps(lista).
+        """
+        hasher = hashlib.sha256(prompt.encode())
+        hasher.update(b"[")
+        for i, event in enumerate(events):
+            if i:
+                hasher.update(b", ")
+            # sort_keys=True es vital para que el orden de los campos no afecte el hash
+            hasher.update(json.dumps(event, sort_keys=True).encode())
+        hasher.update(b"]")
+        return hasher.hexdigest()
+
+    def _fingerprint_hash(self, prompt: str, fingerprint: str) -> str:
+        """Huella del reporte a partir de la huella incremental de sus eventos (sin leerlos)."""
+        return hashlib.sha256(f"{prompt}\nfingerprint:{fingerprint}".encode()).hexdigest()
+
+    def _find_cached_report(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str,
+                            prompt: str, fingerprint: Optional[str], load_events: Callable[[], List[dict]]):
+        """
+        Returns (existing report or None, hash to store with a new report).
+        With a fingerprint the check is one small-row lookup. Reports stored before
+        fingerprints existed are matched once by the full event hash and re-stamped.
+        """
+        fingerprint_hash = None
+        if fingerprint is not None:
+            fingerprint_hash = self._fingerprint_hash(prompt, fingerprint)
+            existing = self.db.get_report_by_hash(session_id, subject_id, kind, fingerprint_hash)
+            if existing:
+                return existing, fingerprint_hash
+
+        legacy_hash = self._generate_data_hash(prompt, load_events())
+        existing = self.db.get_report_by_hash(session_id, subject_id, kind, legacy_hash)
+        if fingerprint_hash is None:
+            return existing, legacy_hash
+        if existing:
+            # La próxima corrida lo encuentra por huella sin tocar cleansed.biometric_events
+            self.db.update_report_hash(existing.report_id, fingerprint_hash)
+        return existing, fingerprint_hash
+
+    def _publish_pdf(self, report_id: uuid.UUID, kind: str, report_data: dict, markdown_content: str,
+                     filename_prefix: str) -> Tuple[str, Optional[str]]:
+        """
+        Renders the report and registers it in pdf_artifacts; returns (path, sha256).
+        With an artifact store the bytes go straight to the content-addressed blob
+        (no named copy in artifacts/); without one the named file is the artifact.
         """
-        # sort_keys=True es vital para que el orden de los campos no afecte el hash
-        input_string = prompt + json.dumps(events, sort_keys=True)
-        return hashlib.sha256(input_string.encode()).hexdigest()
+        if self.artifact_store is None:
+            # El PDF se arma directo desde el JSON y, con caché de render, un reporte sin cambios no se re-renderiza
+            pdf_path = self.pdf.create_pdf_from_json(kind, report_data, markdown_content, filename_prefix)
+            self.db.save_pdf_artifact(report_id, pdf_path)
+            return pdf_path, None
+        pdf_bytes = self.pdf.render_pdf_bytes_from_json(kind, report_data, markdown_content, filename_prefix)
+        blob = self.artifact_store.put_bytes(pdf_bytes)
+        self.db.save_pdf_artifact(report_id, blob["blob_path"], sha256_hash=blob["sha256"], size_bytes=blob["size_bytes"])
+        return blob["blob_path"], blob["sha256"]
 
     def run_full_session_process(self, app_session_id: str, json_file_path: str):
         # 1. Obtener la sesión y sus participantes
@@ -25,70 +137,117 @@ class OrchestratorUseCase:
             raise Exception(f"No se encontró la sesión con app_id: {app_session_id}")
 
         participants = self.db.get_participants_with_roles(session_db.session_id)
-        final_reports_meta = []
 
-        # --- 1. FASE INDIVIDUAL ---
-        for p in participants:
-            # Obtener datos limpios de la capa Silver para este sujeto
-            events = self.db.get_cleansed_events(session_db.session_id, p['subject_id'])
-            
-            mapping = {
-                "metadata_sujeto": f"Nombre: {p['name']}, Edad: {p['age']}, Genero: {p['gender']}, Ciudad: {p['city']}, Rol: {p['role']}"
-            }
-            prompt_individual = SYSTEM_PROMPT.format(**mapping)
+        # Huellas incrementales (una fila por sujeto): con caché caliente no se leen eventos.
+        # Si falta algún reporte, una sola lectura de la capa Silver alimenta ambas fases:
+        # índice por sujeto para los individuales y línea de tiempo completa para el grupal
+        fingerprints, session_fingerprint = self.db.get_event_fingerprints(session_db.session_id)
+        events = _SessionEvents(self.db, session_db.session_id)
+
+        def subject_fingerprint(p):
+            if session_fingerprint is None:
+                return None
+            # Huellas mantenidas para la sesión: un sujeto sin fila no tiene eventos
+            return fingerprints.get(p['subject_id'], EMPTY_FINGERPRINT)
+
+        if self.max_concurrency <= 1:
+            individual_meta = [
+                self._process_individual(session_db, p, subject_fingerprint(p), events)
+                for p in participants
+            ]
+            group_meta = self._process_group(session_db, app_session_id, participants, session_fingerprint, events)
+            return individual_meta + [group_meta]
+
+        # Fases individual y grupal en paralelo: el grupal no depende de los individuales,
+        # así que el tiempo total se acerca a la llamada más lenta y no a la suma
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="orchestrator") as executor:
+            individual_futures = [
+                executor.submit(self._process_individual, session_db, p, subject_fingerprint(p), events)
+                for p in participants
+            ]
+            group_future = executor.submit(self._process_group, session_db, app_session_id, participants, session_fingerprint, events)
+            final_reports_meta = [f.result() for f in individual_futures]
+            final_reports_meta.append(group_future.result())
+
+        return final_reports_meta
+
+    def _coalesced(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str, fingerprint: Optional[str], run):
+        """
+        One in-flight generation per report. The in-process key includes the
+        fingerprint (new events must not reuse an older run); the cross-process
+        lock does not, since the waiting worker re-checks the cache by hash.
+        """
+        key = ("report", str(session_id), str(subject_id), kind, fingerprint)
+        return self.single_flight.do(key, run, lock_key=f"report:{session_id}:{subject_id}:{kind}")
+
+    def _process_individual(self, session_db, p, fingerprint: Optional[str], events: _SessionEvents):
+        return self._coalesced(
+            session_db.session_id, p['subject_id'], "individual", fingerprint,
+            lambda: self._generate_individual(session_db, p, fingerprint, events)
+        )
+
+    def _process_group(self, session_db, app_session_id: str, participants, fingerprint: Optional[str], events: _SessionEvents):
+        return self._coalesced(
+            session_db.session_id, None, "group", fingerprint,
+            lambda: self._generate_group(session_db, app_session_id, participants, fingerprint, events)
+        )
+
+    def _generate_individual(self, session_db, p, fingerprint: Optional[str], events: _SessionEvents):
+        """Cache check, LLM analysis, persistence and PDF for one participant."""
+        mapping = {
+            "metadata_sujeto": f"Nombre: {p['name']}, Edad: {p['age']}, Genero: {p['gender']}, Ciudad: {p['city']}, Rol: {p['role']}"
+        }
+        prompt_individual = SYSTEM_PROMPT.format(**mapping)
+        
+        # --- VERIFICACIÓN DE CACHÉ ---
+        existing_report, current_hash = self._find_cached_report(
+            session_db.session_id, p['subject_id'], "individual",
+            prompt_individual + self._payload_identity(), fingerprint, lambda: events.for_subject(p['subject_id'])
+        )
+
+        if existing_report:
+            print(f"✅ [RECOPILACIÓN] Reporte de {p['name']} recuperado de DB. Saltando OpenAI...")
+            report_data = existing_report.content_json
+            markdown_content = existing_report.content_markdown
+            report_id = existing_report.report_id
+        else:
+            print(f"🤖 [IA] Generando nuevo análisis para: {p['name']}...")
+            raw_resp = self.ai.generate_report(prompt_individual, self._build_llm_payload(events.for_subject(p['subject_id'])), model=MODELO_INDIVIDUAL)
             
-            # --- VERIFICACIÓN DE CACHÉ ---
-            current_hash = self._generate_data_hash(prompt_individual, events)
-            existing_report = self.db.get_report_by_hash(
-                session_db.session_id, p['subject_id'], "individual", current_hash
+            try:
+                clean_json = raw_resp.replace("```json", "").replace("```", "").strip()
+                report_data = json.loads(clean_json)
+            except json.JSONDecodeError:
+                report_data = {"error": "Invalid JSON", "raw": raw_resp}
+
+            markdown_content = render_individual_markdown(report_data)
+
+            # Persistencia con el nuevo hash
+            report_id = self.db.save_report_meta(
+                session_id=session_db.session_id,
+                subject_id=p['subject_id'],
+                kind="individual",
+                markdown=markdown_content, 
+                json_data=report_data,
+                prompt_hash=current_hash
             )
 
-            if existing_report:
-                print(f"✅ [RECOPILACIÓN] Reporte de {p['name']} recuperado de DB. Saltando OpenAI...")
-                report_data = existing_report.content_json
-                markdown_content = existing_report.content_markdown
-                report_id = existing_report.report_id
-            else:
-                print(f"🤖 [IA] Generando nuevo análisis para: {p['name']}...")
-                raw_resp = self.ai.generate_report(prompt_individual, json.dumps(events), model=MODELO_INDIVIDUAL)
-                
-                try:
-                    clean_json = raw_resp.replace("```json", "").replace("```", "").strip()
-                    report_data = json.loads(clean_json)
-                except json.JSONDecodeError:
-                    report_data = {"error": "Invalid JSON", "raw": raw_resp}
-
-                markdown_content = self._json_to_markdown_individual(report_data)
-
-                # Persistencia con el nuevo hash
-                report_id = self.db.save_report_meta(
-                    session_id=session_db.session_id,
-                    subject_id=p['subject_id'],
-                    kind="individual",
-                    markdown=markdown_content, 
-                    json_data=report_data,
-                    prompt_hash=current_hash
-                )
-
-            # El PDF se genera siempre para asegurar que el archivo físico exista
-            pdf_path = self.pdf.create_pdf(markdown_content, f"Reporte_Individual_{p['app_id']}")
-            self.db.save_pdf_artifact(report_id, pdf_path)
-            final_reports_meta.append({"name": p['name'], "path": pdf_path})
+        pdf_path, sha256 = self._publish_pdf(report_id, "individual", report_data, markdown_content, f"Reporte_Individual_{p['app_id']}")
+        return {"name": p['name'], "path": pdf_path, "sha256": sha256}
 
-        # --- 2. FASE GRUPAL ---
+    def _generate_group(self, session_db, app_session_id: str, participants, fingerprint: Optional[str], events: _SessionEvents):
+        """Cache check, LLM analysis, persistence and PDF for the group report."""
         print(f"--- Procesando Informe Grupal de la sesión: {app_session_id} ---")
         
-        # Obtener TODOS los eventos (subject_id=None)
-        group_events = self.db.get_cleansed_events(session_db.session_id, subject_id=None)
-        
         contexto = {
             "contexto_grupal": f"Sesión: {app_session_id}, Caso: {session_db.case_id}, Participantes: {len(participants)}"
         }
         prompt_grupal = GROUP_SYSTEM_PROMPT.format(**contexto)
 
         # VERIFICACIÓN DE CACHÉ GRUPAL
-        group_hash = self._generate_data_hash(prompt_grupal, group_events)
-        existing_group = self.db.get_report_by_hash(session_db.session_id, None, "group", group_hash)
+        existing_group, group_hash = self._find_cached_report(
+            session_db.session_id, None, "group", prompt_grupal + self._payload_identity(), fingerprint, events.timeline
+        )
 
         if existing_group:
             print(f"✅ [RECOPILACIÓN] Reporte GRUPAL recuperado de DB. Saltando OpenAI...")
@@ -97,7 +256,7 @@ class OrchestratorUseCase:
             report_id_group = existing_group.report_id
         else:
             print(f"🤖 [IA] Generando nuevo análisis GRUPAL...")
-            raw_resp_group = self.ai.generate_report(prompt_grupal, json.dumps(group_events), model=MODELO_GRUPAL)
+            raw_resp_group = self.ai.generate_report(prompt_grupal, self._build_llm_payload(events.timeline()), model=MODELO_GRUPAL)
             
             try:
                 clean_json_group = raw_resp_group.replace("```json", "").replace("```", "").strip()
@@ -105,7 +264,7 @@ class OrchestratorUseCase:
             except json.JSONDecodeError:
                 group_data = {"error": "Invalid Group JSON", "raw": raw_resp_group}
             
-            markdown_grupal = self._json_to_markdown_group(group_data)
+            markdown_grupal = render_group_markdown(group_data)
             
             report_id_group = self.db.save_report_meta(
                 session_id=session_db.session_id,
@@ -116,109 +275,5 @@ class OrchestratorUseCase:
                 prompt_hash=group_hash
             )
 
-        pdf_path_group = self.pdf.create_pdf(markdown_grupal, f"Reporte_Grupal_{app_session_id}")
-        self.db.save_pdf_artifact(report_id_group, pdf_path_group)
-        final_reports_meta.append({"name": "REPORTE GRUPAL", "path": pdf_path_group})
-
-        return final_reports_meta
-
-    def _json_to_markdown_individual(self, data):
-        """Reconstruye el Markdown visual completo para individuos."""
-        head = data.get("header", {})
-        tec = data.get("analisis_tecnico", {})
-        afin = data.get("afinidad", {})
-        
-        md = f"""
-# INFORME DE EVALUACIÓN PSICOPROFESIOGRÁFICA – CÁMARA GESELL
-**CÉLULA DE INFORMES | BE-LABS ANALYTICS**
-
-### FICHA DE IDENTIFICACIÓN
-- **Nombre:** {head.get('nombre', 'N/A')}
-- **Edad:** {head.get('edad', 'N/A')}
-- **Género:** {head.get('genero', 'N/A')}
-- **Ciudad:** {head.get('ciudad', 'N/A')}
-- **Rol en Sesión:** {head.get('rol', 'N/A')}
-
----
-## 1. ANÁLISIS DE SEÑALES TÉCNICAS (EVIDENCIA BIOMÉTRICA)
-### A. Perfil de Voz y Prosodia [VOZ]
-{tec.get('voz', 'N/A')}
-
-### B. Conducta y Postura [VISIÓN – CUERPO]
-{tec.get('postura', 'N/A')}
-
-### C. Emociones y Micro-expresiones [VISIÓN – ROSTRO]
-{tec.get('emociones', 'N/A')}
-
----
-## 2. ASPECTOS POSITIVOS DOMINANTES
-"""
-        for item in data.get("aspectos_positivos", []):
-            md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
-
-        md += "\n---\n## 3. ASPECTOS NEGATIVOS O LIMITANTES\n"
-        for item in data.get("aspectos_negativos", []):
-            md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
-
-        md += f"""
----
-## 4. AFINIDAD CON EL ROL Y ROL IDEAL
-- **Afinidad:** {afin.get('nivel', 'N/A')}
-- **Rol Ideal:** {afin.get('rol_ideal', 'N/A')}
-
----
-## 5. HITOS CRONOLÓGICOS DESTACADOS
-"""
-        for h in data.get("hitos", []):
-            md += f"• **[{h.get('tiempo')}] – {h.get('titulo')}:** {h.get('descripcion')} (Ref: {h.get('ref')})\n"
-
-        md += f"""
----
-## 6. OBSERVACIÓN GENERAL Y RECOMENDACIÓN
-{data.get('observacion_final', 'N/A')}
-"""
-        return md
-
-    def _json_to_markdown_group(self, data):
-        """Reconstruye el Markdown visual completo para grupos."""
-        col = data.get("analisis_colectivo", {})
-        inter = data.get("interaccion", {})
-        
-        md = f"""
-# INFORME GRUPAL - ANÁLISIS COLECTIVO GESELL
-**CÉLULA DE INFORMES | BE-LABS ANALYTICS**
-
----
-## 1. DINÁMICA DE GRUPO
-- **Perfil de Voz Colectivo:** {col.get('voz', 'N/A')}
-- **Sincronía y Ritmo:** {col.get('sincronia', 'N/A')}
-- **Clima Emocional General:** {col.get('clima_emocional', 'N/A')}
-
----
-## 2. ASPECTOS POSITIVOS DEL GRUPO
-"""
-        for item in data.get("aspectos_positivos", []):
-            md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
-
-        md += "\n## 3. ASPECTOS NEGATIVOS O LIMITANTES DEL GRUPO\n"
-        for item in data.get("aspectos_negativos", []):
-            md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
-
-        md += f"""
----
-## 4. INTERACCIÓN Y LIDERAZGO
-- **Patrón de Interacción:** {inter.get('patron', 'N/A')}
-- **Liderazgo Identificado:** {inter.get('liderazgo', 'N/A')}
-
----
-## 5. HITOS GRUPALES DESTACADOS
-"""
-        for h in data.get("hitos_grupales", []):
-            md += f"• **[{h.get('tiempo')}] {h.get('evento')}:** {h.get('descripcion')}\n"
-
-        md += f"""
----
-## 6. CONCLUSIÓN GENERAL Y OBSERVACIONES DEL GRUPO
-{data.get('conclusion_grupal', 'N/A')}
-"""
-        return md
\ No newline at end of file
+        pdf_path_group, sha256 = self._publish_pdf(report_id_group, "group", group_data, markdown_grupal, f"Reporte_Grupal_{app_session_id}")
+        return {"name": "REPORTE GRUPAL", "path": pdf_path_group, "sha256": sha256}
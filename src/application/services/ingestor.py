@@ -1,22 +1,37 @@
-import json
-from src.infrastructure.persistence.models import IngestionStaging
+import time
+from itertools import islice
+from config import INGEST_BATCH_SIZE
+from src.application.services.session_file_reader import SessionFileReader
 
 class TelemetryIngestor:
-    def __init__(self, db_adapter):
+    def __init__(self, db_adapter, batch_size: int = INGEST_BATCH_SIZE):
         self.db = db_adapter
+        self.batch_size = batch_size
 
     def ingest_from_file(self, session_id, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_json = json.load(f)
-        
-        # We extract the individual events (reports_flat)
-        reports = full_json["json"]["reports_flat"]
-        print(f"Received {len(reports)} events. Sending to Staging (Audit)...")
+        # We stream the individual events (reports_flat) without loading the whole export;
+        # the duplicated individual_sections subtree is skipped, never materialised
+        reports = SessionFileReader(file_path).iter_reports_flat()
+        print(f"Streaming events to Staging (Audit) in batches of {self.batch_size}...")
 
-        for r in reports:
-            self.db.save_staging_data(
-                session_id=session_id,
-                source=r["source_cell"],
-                payload=r
-            )
-        print("Ingestion completed in the Bronze layer.")
\ No newline at end of file
+        # One transaction per batch instead of one per observation
+        start = time.perf_counter()
+        total_rows = 0
+        batches = 0
+        while True:
+            batch = [(r["source_cell"], r) for r in islice(reports, self.batch_size)]
+            if not batch:
+                break
+            total_rows += self.db.save_staging_batch(session_id, batch)
+            batches += 1
+        elapsed = time.perf_counter() - start
+
+        summary = {
+            "rows": total_rows,
+            "batches": batches,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(total_rows / elapsed, 1) if elapsed > 0 else None,
+        }
+        print(f"Ingestion completed in the Bronze layer: {summary['rows']} rows in {summary['batches']} batches "
+              f"({summary['seconds']}s, {summary['rows_per_second']} rows/s).")
+        return summary
@@ -0,0 +1,115 @@
+import os
+import time
+import uuid
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional
+
+
+class JobQueueFullError(Exception):
+    """Raised when the pool already holds the maximum number of pending jobs."""
+    pass
+
+
+class PdfJobManager:
+    """
+    Runs PDF generation jobs on a bounded thread pool so the API event loop
+    never waits on the LLM, Supabase or the renderer.
+    Jobs move through: queued -> running -> done | failed.
+    Finished jobs expire after `ttl_seconds`, and their output file is removed
+    once no remaining job points to it.
+    """
+
+    def __init__(self,
+                 runner: Callable[..., str],
+                 max_workers: int = 4,
+                 max_pending: int = 100,
+                 ttl_seconds: int = 3600):
+        self.runner = runner
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None, **options) -> Dict[str, Any]:
+        """Queues a job; `options` (e.g. mode) are passed through to the runner."""
+        with self._lock:
+            self._purge_expired()
+            pending = sum(1 for j in self._jobs.values() if j["status"] in ("queued", "running"))
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"Hay {pending} trabajos pendientes, intenta más tarde")
+
+            job_id = str(uuid.uuid4())
+            job = {
+                "job_id": job_id,
+                "status": "queued",
+                "session_id": str(session_id),
+                "subject_id": str(subject_id) if subject_id else None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result_path": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+
+        self.executor.submit(self._run, job_id, session_id, subject_id, options)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a snapshot of the job with its timings, or None if unknown/expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            snapshot = dict(job)
+
+        snapshot["timings"] = self._timings(snapshot)
+        for field in ("created_at", "started_at", "finished_at"):
+            if snapshot[field] is not None:
+                snapshot[field] = datetime.fromtimestamp(snapshot[field], tz=timezone.utc).isoformat()
+        return snapshot
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], options: Dict[str, Any]):
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            pdf_path = self.runner(session_id, subject_id, **options)
+            self._update(job_id, status="done", result_path=pdf_path, finished_at=time.time())
+        except Exception as e:
+            print(f"Error en trabajo PDF {job_id}: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _purge_expired(self):
+        # Solo se eliminan trabajos terminados; los pendientes nunca expiran
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and now - job["finished_at"] > self.ttl_seconds
+        ]
+        expired_paths = {self._jobs.pop(job_id)["result_path"] for job_id in expired}
+        # Varios trabajos del mismo reporte comparten archivo: solo se borra si ya nadie lo referencia
+        live_paths = {job["result_path"] for job in self._jobs.values()}
+        for path in expired_paths - live_paths - {None}:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _timings(job: Dict[str, Any]) -> Dict[str, Optional[int]]:
+        now = time.time()
+        created, started, finished = job["created_at"], job["started_at"], job["finished_at"]
+        queued_ms = int(((started or now) - created) * 1000)
+        running_ms = int(((finished or now) - started) * 1000) if started else None
+        total_ms = int(((finished or now) - created) * 1000)
+        return {"queued_ms": queued_ms, "running_ms": running_ms, "total_ms": total_ms}
@@ -0,0 +1,139 @@
+from typing import Any, Callable, Dict, Optional
+
+# Plantillas deterministas: content_json (JSON_SCHEMA_INDIVIDUAL / JSON_SCHEMA_GRUPAL) -> Markdown.
+# Subir TEMPLATE_VERSION al cambiar cualquier texto de las plantillas.
+TEMPLATE_VERSION = "1"
+
+_BRAND = "**CÉLULA DE INFORMES | BE-LABS ANALYTICS**"
+
+
+def _cover(title: str, metadata: Optional[Dict[str, Any]]) -> str:
+    md = f"""
+# {title}
+{_BRAND}
+"""
+    # Metadatos planos de vw_reports; el orquestador no los pasa y su salida no cambia
+    if metadata:
+        md += f"""
+### DATOS DE LA SESIÓN
+- **ID de Sesión:** {metadata.get('app_session_id') or 'N/A'}
+- **Título del Caso:** {metadata.get('case_title') or 'N/A'}
+"""
+    return md
+
+
+def render_individual_markdown(data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Reconstruye el Markdown visual completo para individuos."""
+    head = data.get("header", {})
+    tec = data.get("analisis_tecnico", {})
+    afin = data.get("afinidad", {})
+
+    md = _cover("INFORME DE EVALUACIÓN PSICOPROFESIOGRÁFICA – CÁMARA GESELL", metadata)
+    md += f"""
+### FICHA DE IDENTIFICACIÓN
+- **Nombre:** {head.get('nombre', 'N/A')}
+- **Edad:** {head.get('edad', 'N/A')}
+- **Género:** {head.get('genero', 'N/A')}
+- **Ciudad:** {head.get('ciudad', 'N/A')}
+- **Rol en Sesión:** {head.get('rol', 'N/A')}
+
+---
+## 1. ANÁLISIS DE SEÑALES TÉCNICAS (EVIDENCIA BIOMÉTRICA)
+### A. Perfil de Voz y Prosodia [VOZ]
+{tec.get('voz', 'N/A')}
+
+### B. Conducta y Postura [VISIÓN – CUERPO]
+{tec.get('postura', 'N/A')}
+
+### C. Emociones y Micro-expresiones [VISIÓN – ROSTRO]
+{tec.get('emociones', 'N/A')}
+
+---
+## 2. ASPECTOS POSITIVOS DOMINANTES
+"""
+    for item in data.get("aspectos_positivos", []):
+        md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
+
+    md += "\n---\n## 3. ASPECTOS NEGATIVOS O LIMITANTES\n"
+    for item in data.get("aspectos_negativos", []):
+        md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
+
+    md += f"""
+---
+## 4. AFINIDAD CON EL ROL Y ROL IDEAL
+- **Afinidad:** {afin.get('nivel', 'N/A')}
+- **Rol Ideal:** {afin.get('rol_ideal', 'N/A')}
+
+---
+## 5. HITOS CRONOLÓGICOS DESTACADOS
+"""
+    for h in data.get("hitos", []):
+        md += f"• **[{h.get('tiempo')}] – {h.get('titulo')}:** {h.get('descripcion')} (Ref: {h.get('ref')})\n"
+
+    md += f"""
+---
+## 6. OBSERVACIÓN GENERAL Y RECOMENDACIÓN
+{data.get('observacion_final', 'N/A')}
+"""
+    return md
+
+
+def render_group_markdown(data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Reconstruye el Markdown visual completo para grupos."""
+    col = data.get("analisis_colectivo", {})
+    inter = data.get("interaccion", {})
+
+    md = _cover("INFORME GRUPAL - ANÁLISIS COLECTIVO GESELL", metadata)
+    md += f"""
+---
+## 1. DINÁMICA DE GRUPO
+- **Perfil de Voz Colectivo:** {col.get('voz', 'N/A')}
+- **Sincronía y Ritmo:** {col.get('sincronia', 'N/A')}
+- **Clima Emocional General:** {col.get('clima_emocional', 'N/A')}
+
+---
+## 2. ASPECTOS POSITIVOS DEL GRUPO
+"""
+    for item in data.get("aspectos_positivos", []):
+        md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
+
+    md += "\n## 3. ASPECTOS NEGATIVOS O LIMITANTES DEL GRUPO\n"
+    for item in data.get("aspectos_negativos", []):
+        md += f"• **{item.get('nombre')}:** {item.get('justificacion')} (Ref: {item.get('ref')})\n"
+
+    md += f"""
+---
+## 4. INTERACCIÓN Y LIDERAZGO
+- **Patrón de Interacción:** {inter.get('patron', 'N/A')}
+- **Liderazgo Identificado:** {inter.get('liderazgo', 'N/A')}
+
+---
+## 5. HITOS GRUPALES DESTACADOS
+"""
+    for h in data.get("hitos_grupales", []):
+        md += f"• **[{h.get('tiempo')}] {h.get('evento')}:** {h.get('descripcion')}\n"
+
+    md += f"""
+---
+## 6. CONCLUSIÓN GENERAL Y OBSERVACIONES DEL GRUPO
+{data.get('conclusion_grupal', 'N/A')}
+"""
+    return md
+
+
+_TEMPLATES: Dict[str, Callable[..., str]] = {
+    "individual": render_individual_markdown,
+    "group": render_group_markdown,
+}
+
+
+def has_template(report_kind: str, content_json: Any) -> bool:
+    """True when render_report_markdown can render this report without the LLM."""
+    return report_kind in _TEMPLATES and isinstance(content_json, dict)
+
+
+def render_report_markdown(report_kind: str, content_json: Any, metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Markdown for a known report kind, or None when there is no template for it."""
+    if not has_template(report_kind, content_json):
+        return None
+    return _TEMPLATES[report_kind](content_json, metadata)
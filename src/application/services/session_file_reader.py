@@ -0,0 +1,238 @@
+import re
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[,}\]\s]')
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+_TOO_LARGE = object()
+
+
+class _JsonScanner:
+    """
+    Minimal incremental JSON scanner over a text file.
+    Values are decoded with the C decoder straight from the buffer. Values the
+    caller skips are only decoded while they fit in `max_skip_chars`; larger
+    subtrees are walked child by child, so memory is bounded by the largest
+    value read plus the skip window, not by the file size.
+    """
+
+    def __init__(self, f, chunk_size: int = 64 * 1024, max_skip_chars: int = 1024 * 1024):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_skip_chars = max_skip_chars
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Descarta lo ya consumido para que el buffer no crezca con el archivo
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _ensure(self, n: int = 1) -> bool:
+        while len(self.buf) - self.pos < n:
+            if not self._fill():
+                return False
+        return True
+
+    def peek(self) -> str:
+        while True:
+            if not self._ensure():
+                return ""
+            c = self.buf[self.pos]
+            if c in _WHITESPACE:
+                self.pos += 1
+                continue
+            return c
+
+    def expect(self, ch: str):
+        c = self.peek()
+        if c != ch:
+            raise ValueError(f"JSON inválido: se esperaba '{ch}' y se encontró '{c or 'EOF'}'")
+        self.pos += 1
+
+    def read_string(self) -> str:
+        return self.read_value()
+
+    def read_value(self) -> Any:
+        return self._decode(limit=None)
+
+    def skip_value(self):
+        first = self.peek()
+        if self._decode(limit=self.max_skip_chars) is not _TOO_LARGE:
+            return
+        # Subárbol demasiado grande para decodificar de una vez: se recorre por hijos
+        if first == "{":
+            for _ in self.iter_object():
+                self.skip_value()
+        elif first == "[":
+            for _ in self.iter_array():
+                self.skip_value()
+        else:
+            self._scan_value(capture=False)
+
+    def _decode(self, limit: Optional[int]) -> Any:
+        if not self.peek():
+            raise ValueError("JSON inválido: fin de archivo inesperado")
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+                # Un número cortado por el buffer ("12" de "12.5") decodifica sin error:
+                # solo se acepta si lo sigue un delimitador o el fin del archivo
+                complete = self.buf[self.pos] in '{["' or (end < len(self.buf) and _SCALAR_END.match(self.buf, end))
+                if complete or not self._fill():
+                    self.pos = end
+                    return value
+                continue
+            except json.JSONDecodeError as e:
+                if limit is not None and len(self.buf) - self.pos >= limit:
+                    return _TOO_LARGE
+                if not self._fill():
+                    raise ValueError(f"JSON inválido: {e.msg}")
+
+    def iter_object(self) -> Iterator[str]:
+        """Yields each key; the caller must consume the value (read or skip) before resuming."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            c = self.peek()
+            self.pos += 1
+            if c == "}":
+                return
+            if c != ",":
+                raise ValueError(f"JSON inválido dentro de objeto: '{c or 'EOF'}'")
+
+    def iter_array(self) -> Iterator[None]:
+        """Yields once per element; the caller must consume the element before resuming."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            c = self.peek()
+            self.pos += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError(f"JSON inválido dentro de arreglo: '{c or 'EOF'}'")
+
+    def _scan_value(self, capture: bool = True) -> Optional[str]:
+        first = self.peek()
+        if not first:
+            raise ValueError("JSON inválido: fin de archivo inesperado")
+        pieces: List[str] = []
+
+        if first not in '{["':
+            # Escalar: número, true, false o null (termina en delimitador o EOF)
+            while True:
+                m = _SCALAR_END.search(self.buf, self.pos)
+                end = m.start() if m else len(self.buf)
+                pieces.append(self.buf[self.pos:end])
+                self.pos = end
+                if m or not self._fill():
+                    return "".join(pieces) if capture else None
+
+        depth = 0
+        in_string = False
+        start = self.pos
+        while True:
+            pattern = _STRING_SPECIAL if in_string else _STRUCTURAL
+            m = pattern.search(self.buf, self.pos)
+            if not m:
+                if capture:
+                    pieces.append(self.buf[start:])
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("JSON inválido: fin de archivo dentro de un valor")
+                start = self.pos
+                continue
+
+            c = m.group()
+            self.pos = m.end()
+            if in_string:
+                if c == "\\":
+                    # Escape: el carácter siguiente nunca cierra el string
+                    if self.pos >= len(self.buf):
+                        if capture:
+                            pieces.append(self.buf[start:])
+                        if not self._fill():
+                            raise ValueError("JSON inválido: escape al final del archivo")
+                        start = self.pos
+                    self.pos += 1
+                    continue
+                in_string = False
+                if depth == 0:
+                    break
+            elif c == '"':
+                in_string = True
+            elif c in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    break
+
+        if capture:
+            pieces.append(self.buf[start:self.pos])
+            return "".join(pieces)
+        return None
+
+
+class SessionFileReader:
+    """
+    Streaming reader for Gesell session exports ({"json": {...}}).
+    The export repeats every observation under individual_sections and
+    reports_flat; this reader only walks reports_flat and never materialises
+    the duplicated individual_sections subtree.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = 64 * 1024):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+
+    def read_session_meta(self) -> Dict[str, Any]:
+        """Reads json.session_meta and stops without scanning the rest of the file."""
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            scanner = _JsonScanner(f, self.chunk_size)
+            if self._seek_section(scanner, "session_meta"):
+                return scanner.read_value()
+        raise ValueError(f"El archivo {self.file_path} no contiene json.session_meta")
+
+    def iter_reports_flat(self) -> Iterator[Dict[str, Any]]:
+        """Yields each json.reports_flat observation one at a time."""
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            scanner = _JsonScanner(f, self.chunk_size)
+            if not self._seek_section(scanner, "reports_flat"):
+                raise ValueError(f"El archivo {self.file_path} no contiene json.reports_flat")
+            for _ in scanner.iter_array():
+                yield scanner.read_value()
+
+    @staticmethod
+    def _seek_section(scanner: _JsonScanner, section: str) -> bool:
+        # Deja el scanner posicionado en el valor de json.<section>
+        for key in scanner.iter_object():
+            if key != "json":
+                scanner.skip_value()
+                continue
+            for inner_key in scanner.iter_object():
+                if inner_key == section:
+                    return True
+                scanner.skip_value()
+            return False
+        return False
@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional
+from src.domain.ports import DistributedLockPort
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller (leader) runs
+    the function and the rest wait for its result or exception. The key is
+    released when the call finishes, so a later call runs again and relies on
+    the downstream caches.
+    With a DistributedLockPort and a `lock_key`, the leader also holds a
+    cross-process lock: leaders in other workers wait for it and then find the
+    result in the shared caches (report hash, LLM cache, render cache).
+    Followers wait at most `wait_timeout` seconds; after that they run the
+    function themselves instead of hanging on a stuck leader.
+    """
+
+    def __init__(self, distributed_lock: Optional[DistributedLockPort] = None, wait_timeout: Optional[float] = 300):
+        self.distributed_lock = distributed_lock
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "lock_waits": 0, "wait_timeouts": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], lock_key: Optional[str] = None) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            try:
+                return future.result(timeout=self.wait_timeout)
+            except FutureTimeoutError:
+                with self._lock:
+                    self._stats["wait_timeouts"] += 1
+                print(f"⚠️ [SINGLE-FLIGHT] {key} sigue en curso tras {self.wait_timeout}s. Generando sin coordinación...")
+                return fn()
+
+        try:
+            result = self._run(fn, lock_key)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
+    def _run(self, fn: Callable[[], Any], lock_key: Optional[str]) -> Any:
+        if self.distributed_lock is None or lock_key is None:
+            return fn()
+        with self.distributed_lock.hold(lock_key) as waited:
+            if waited:
+                # Otro worker generó lo mismo: fn debería resolverse desde los cachés
+                with self._lock:
+                    self._stats["lock_waits"] += 1
+            return fn()
@@ -0,0 +1,235 @@
+import json
+import warnings
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+
+class TelemetrySummarizer:
+    """
+    Pre-LLM summarization stage for cleansed biometric events.
+    Turns the raw prosody/emotion/behavior/ASR windows of each subject into
+    NumPy aggregates plus the top-k salient windows, and shrinks the result
+    until it fits `token_budget`, so prompt size no longer grows with the
+    session duration. The last reduction step keeps only the per-subject
+    aggregates, which is the floor for very small budgets.
+    """
+
+    VERSION = "1"
+
+    # Escalones de reducción: (top_k, puntos de trayectoria, segmentos ASR)
+    _REDUCTION_LADDER = [(5, 8, 8), (4, 6, 6), (3, 4, 4), (2, 3, 3), (1, 2, 2), (0, 0, 1), (0, 0, 0)]
+
+    def __init__(self, token_budget: int = 4000, top_k: int = 5, trajectory_points: int = 8, max_asr_segments: int = 8):
+        self.token_budget = token_budget
+        self.top_k = top_k
+        self.trajectory_points = trajectory_points
+        self.max_asr_segments = max_asr_segments
+
+    def identity(self) -> str:
+        """Participates in the report cache hash: a different summary means a different prompt."""
+        return f"summary:v{self.VERSION}:{self.token_budget}:{self.top_k}:{self.trajectory_points}:{self.max_asr_segments}"
+
+    def summarize(self, events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        by_subject: Dict[str, List[Dict[str, Any]]] = {}
+        context = []
+        t_min, t_max = None, None
+        for e in events:
+            obs = e.get("data") or {}
+            t_start = obs.get("t_start_ms", e.get("t_start", 0))
+            t_end = obs.get("t_end_ms", t_start)
+            t_min = t_start if t_min is None else min(t_min, t_start)
+            t_max = t_end if t_max is None else max(t_max, t_end)
+            if obs.get("stream") == "case_context":
+                if obs.get("payload") not in context:
+                    context.append(obs.get("payload"))
+                continue
+            by_subject.setdefault(obs.get("person_id", "desconocido"), []).append(obs)
+
+        limits = [(min(k, self.top_k), min(t, self.trajectory_points), min(a, self.max_asr_segments))
+                  for k, t, a in self._REDUCTION_LADDER]
+        summary = None
+        with warnings.catch_warnings():
+            # Columnas vacías (todo NaN) son esperables: se reportan como None
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for top_k, points, asr_segments in limits:
+                summary = self._build(context, by_subject, t_min, t_max, top_k, points, asr_segments)
+                if self.estimate_tokens(summary) <= self.token_budget:
+                    break
+        return summary
+
+    def _build(self, context, by_subject, t_min, t_max, top_k: int, points: int, asr_segments: int) -> Dict[str, Any]:
+        return {
+            "summary_version": self.VERSION,
+            "session_window_ms": [t_min or 0, t_max or 0],
+            "case_context": context,
+            "subjects": {
+                pid: self._summarize_subject(observations, top_k, points, asr_segments)
+                for pid, observations in sorted(by_subject.items())
+            },
+        }
+
+    @staticmethod
+    def estimate_tokens(data: Any) -> int:
+        # Aproximación estándar de ~4 caracteres por token
+        return len(json.dumps(data, ensure_ascii=False)) // 4
+
+    def _summarize_subject(self, observations: List[Dict[str, Any]], top_k: int, points: int, asr_segments: int) -> Dict[str, Any]:
+        streams: Dict[str, List[Dict[str, Any]]] = {}
+        for obs in observations:
+            streams.setdefault(obs.get("stream"), []).append(obs)
+        for items in streams.values():
+            items.sort(key=lambda o: o.get("t_start_ms", 0))
+
+        result = {
+            "name": observations[0].get("person_name"),
+            "windows": {stream: len(items) for stream, items in streams.items()},
+        }
+        if streams.get("prosody_window"):
+            result["prosody"] = self._prosody(streams["prosody_window"])
+        if streams.get("emotion_window"):
+            result["emotion"] = self._emotion(streams["emotion_window"], points)
+        if streams.get("behavior_window"):
+            result["behavior"] = self._behavior(streams["behavior_window"])
+        if streams.get("asr_segment"):
+            result["speech"] = self._speech(streams["asr_segment"], asr_segments)
+        if streams.get("diarization_segment"):
+            voiced = self._column(streams["diarization_segment"], ("speech_activity", "voiced_ratio"))
+            result["diarization"] = {"segments": len(streams["diarization_segment"]), "voiced_ratio": self._stats(voiced)}
+        if top_k:
+            result["salient_windows"] = self._salient(streams, top_k)
+        return result
+
+    def _prosody(self, windows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "pitch_hz": self._stats(self._column(windows, ("pitch_hz", "avg"))),
+            "volume_db": self._stats(self._column(windows, ("volume_db", "avg"))),
+            "volume_peak_db": self._stats(self._column(windows, ("volume_db", "peak"))),
+            "speech_rate_ppm": self._stats(self._column(windows, ("speech_rate_ppm",))),
+            "pause_ratio": self._stats(self._column(windows, ("pause_ratio",))),
+            "latency_s": self._stats(self._column(windows, ("latency_s", "avg"))),
+            "turns": int(np.nansum(self._column(windows, ("turn_taking", "turns_count")))),
+            "interruptions_made": int(np.nansum(self._column(windows, ("turn_taking", "interruptions_made")))),
+            "interruptions_received": int(np.nansum(self._column(windows, ("turn_taking", "interruptions_received")))),
+        }
+
+    def _emotion(self, windows: List[Dict[str, Any]], points: int) -> Dict[str, Any]:
+        labels = sorted({k for w in windows for k in (w.get("payload", {}).get("face_emotion_probs") or {})})
+        probs = np.array([
+            [(w.get("payload", {}).get("face_emotion_probs") or {}).get(label, np.nan) for label in labels]
+            for w in windows
+        ], dtype=float)
+        times = np.array([w.get("t_start_ms", 0) for w in windows], dtype=float)
+
+        result = {
+            "mean_probs": {label: self._round(v) for label, v in zip(labels, np.nanmean(probs, axis=0))} if labels else {},
+            "valence": dict(Counter(w.get("payload", {}).get("valence") for w in windows if w.get("payload", {}).get("valence"))),
+            "arousal": dict(Counter(w.get("payload", {}).get("arousal") for w in windows if w.get("payload", {}).get("arousal"))),
+        }
+        if labels and points:
+            # Trayectoria: la sesión se divide en tramos y se promedia cada emoción por tramo
+            trajectory = []
+            for idx in np.array_split(np.arange(len(windows)), min(points, len(windows))):
+                bucket = np.nanmean(probs[idx], axis=0)
+                if np.all(np.isnan(bucket)):
+                    continue
+                dominant = int(np.nanargmax(bucket))
+                trajectory.append({
+                    "t_ms": int(times[idx[0]]),
+                    "dominant": labels[dominant],
+                    "p": self._round(bucket[dominant]),
+                    "non_neutral": self._round(1.0 - bucket[labels.index("neutral")]) if "neutral" in labels else None,
+                })
+            result["trajectory"] = trajectory
+        return result
+
+    def _behavior(self, windows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        gestures = Counter(tag for w in windows for tag in (w.get("payload", {}).get("gesture_tags") or []))
+        return {
+            "eye_contact_pct": self._stats(self._column(windows, ("eye_contact_pct",))),
+            "agitation_index": self._stats(self._column(windows, ("agitation_index",))),
+            "fidgeting_level": self._stats(self._column(windows, ("fidgeting_level",))),
+            "posture": dict(Counter(w.get("payload", {}).get("posture") for w in windows if w.get("payload", {}).get("posture"))),
+            "gaze_target": dict(Counter(w.get("payload", {}).get("gaze_target") for w in windows if w.get("payload", {}).get("gaze_target"))),
+            "top_gestures": dict(gestures.most_common(5)),
+        }
+
+    def _speech(self, segments: List[Dict[str, Any]], max_segments: int) -> Dict[str, Any]:
+        structure = self._column(segments, ("argumentation", "structure_score"))
+        tags = Counter(tag for s in segments for tag in (s.get("payload", {}).get("semantic_tags") or []))
+        result = {
+            "segments": len(segments),
+            "structure_score": self._stats(structure),
+            "evidence_ratio": self._round(np.mean([bool((s.get("payload", {}).get("argumentation") or {}).get("evidence_flag")) for s in segments])),
+            "top_semantic_tags": dict(tags.most_common(6)),
+        }
+        if max_segments:
+            # Se conservan los segmentos mejor argumentados, en orden cronológico
+            order = np.argsort(-np.nan_to_num(structure, nan=-1.0), kind="stable")[:max_segments]
+            result["key_quotes"] = [
+                {"t_ms": segments[i].get("t_start_ms"), "text": segments[i].get("payload", {}).get("asr_text")}
+                for i in sorted(order)
+            ]
+        return result
+
+    def _salient(self, streams: Dict[str, List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+        # Puntaje de saliencia por ventana: desvío (z-score) respecto al propio sujeto
+        scored = []
+        behavior = streams.get("behavior_window", [])
+        if behavior:
+            z = self._zscore(self._column(behavior, ("agitation_index",)))
+            scored += [(score, w) for score, w in zip(z, behavior)]
+        prosody = streams.get("prosody_window", [])
+        if prosody:
+            z = self._zscore(self._column(prosody, ("volume_db", "peak")))
+            interruptions = np.nan_to_num(self._column(prosody, ("turn_taking", "interruptions_made")))
+            scored += [(score, w) for score, w in zip(z + interruptions, prosody)]
+        emotion = streams.get("emotion_window", [])
+        if emotion:
+            neutral = self._column(emotion, ("face_emotion_probs", "neutral"))
+            z = self._zscore(1.0 - neutral)
+            scored += [(score, w) for score, w in zip(z, emotion)]
+
+        scored = [(s, w) for s, w in scored if not np.isnan(s)]
+        scored.sort(key=lambda sw: -sw[0])
+        return [
+            {
+                "t_ms": w.get("t_start_ms"),
+                "stream": w.get("stream"),
+                "score": self._round(s),
+                "payload": {k: v for k, v in (w.get("payload") or {}).items() if k != "quality"},
+            }
+            for s, w in sorted(scored[:top_k], key=lambda sw: sw[1].get("t_start_ms", 0))
+        ]
+
+    @staticmethod
+    def _column(items: List[Dict[str, Any]], path) -> np.ndarray:
+        values = []
+        for item in items:
+            value = item.get("payload") or {}
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            values.append(value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan)
+        return np.array(values, dtype=float)
+
+    @staticmethod
+    def _zscore(values: np.ndarray) -> np.ndarray:
+        if values.size == 0 or np.all(np.isnan(values)):
+            return values
+        std = np.nanstd(values)
+        return (values - np.nanmean(values)) / std if std > 0 else np.zeros_like(values)
+
+    def _stats(self, values: np.ndarray) -> Optional[Dict[str, float]]:
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return None
+        return {
+            "mean": self._round(values.mean()),
+            "std": self._round(values.std()),
+            "min": self._round(values.min()),
+            "max": self._round(values.max()),
+        }
+
+    @staticmethod
+    def _round(value) -> Optional[float]:
+        return None if value is None or np.isnan(value) else round(float(value), 3)
@@ -0,0 +1,62 @@
+import uuid
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+from src.domain.ports import AsyncRepositoryPort, ReportRepositoryPort
+from src.application.generate_pdf_use_case import GeneratePdfUseCase
+
+
+class SessionDossierUseCase:
+    """
+    Builds every report of a Gesell session (one per participant plus the group
+    report) concurrently and yields each PDF as soon as it is ready.
+    Each part goes through GeneratePdfUseCase, so cached reports, LLM responses
+    and rendered PDFs are reused exactly as in /generate-pdf.
+    """
+
+    def __init__(self,
+                 repository: AsyncRepositoryPort,
+                 report_repo: ReportRepositoryPort,
+                 generate_pdf_uc: GeneratePdfUseCase,
+                 max_concurrency: int = 4):
+        self.repository = repository
+        self.report_repo = report_repo
+        self.generate_pdf_uc = generate_pdf_uc
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def resolve(self, app_session_id: str) -> Tuple[uuid.UUID, List[Tuple[Optional[uuid.UUID], str]]]:
+        """Returns (session_id, [(subject_id, label), ...]); the group report has subject_id None."""
+        session_db = await self.repository.get_session_by_app_id(app_session_id)
+        if not session_db:
+            raise LookupError(f"No se encontró la sesión con app_id: {app_session_id}")
+        participants = await self.repository.get_participants_with_roles(session_db.session_id)
+        parts = [(p["subject_id"], p["name"]) for p in participants]
+        parts.append((None, "REPORTE GRUPAL"))
+        return session_db.session_id, parts
+
+    async def iter_parts(self, session_id: uuid.UUID, parts: List[Tuple[Optional[uuid.UUID], str]], mode: Optional[str] = None) -> AsyncIterator[Tuple[str, str, Optional[bytes], Optional[str]]]:
+        """
+        Yields (label, filename, pdf_bytes, error) in completion order.
+        A failed part is reported with its error instead of aborting the dossier.
+        """
+        # Una sola lectura en lote: deja todos los informes de la sesión en el caché del repositorio
+        await self.report_repo.get_reports_batch_async([(session_id, subject_id) for subject_id, _ in parts])
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def build(subject_id: Optional[uuid.UUID], label: str):
+            async with semaphore:
+                try:
+                    filename, pdf_bytes = await asyncio.to_thread(self.generate_pdf_uc.execute_bytes, session_id, subject_id, mode)
+                    return label, filename, pdf_bytes, None
+                except Exception as e:
+                    print(f"⚠️ Dossier: falló el informe de {label}: {e}")
+                    return label, None, None, str(e)
+
+        tasks = [asyncio.ensure_future(build(subject_id, label)) for subject_id, label in parts]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Cliente desconectado: no se lanzan las partes que aún esperan turno
+            for task in tasks:
+                task.cancel()
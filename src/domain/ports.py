@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Iterable, AsyncIterator, Tuple, ContextManager
 import uuid
+import asyncio
+import hashlib
 
 class RepositoryPort(ABC):
     @abstractmethod
@@ -15,14 +17,42 @@ class RepositoryPort(ABC):
     @abstractmethod
     def save_staging_data(self, session_id: uuid.UUID, source: str, payload: Dict[str, Any]): pass
 
+    @abstractmethod
+    def save_staging_batch(self, session_id: uuid.UUID, records: List[Tuple[str, Dict[str, Any]]]) -> int: pass
+
     @abstractmethod
     def save_cleansed_event(self, event_data: Dict[str, Any]): pass
 
+    @abstractmethod
+    def promote_staging_to_cleansed(self, session_id: uuid.UUID) -> int: pass
+
     @abstractmethod
     def get_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]: pass
 
+    def iter_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Eventos Silver uno a uno; los adaptadores con cursor del lado del servidor lo sobreescriben.
+        Para lectores de un solo sujeto; el orquestador usa get_session_events_indexed (una lectura por sesión).
+        """
+        return iter(self.get_cleansed_events(session_id, subject_id))
+
+    @abstractmethod
+    def get_session_events_indexed(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, List[Dict[str, Any]]], List[Dict[str, Any]]]: pass
+
+    def get_event_fingerprints(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, str], Optional[str]]:
+        """
+        Huellas de contenido de la capa Silver: (por subject_id, de toda la sesión).
+        ({}, None) significa que no hay huellas mantenidas: el llamador hashea los eventos.
+        """
+        return {}, None
+
     @abstractmethod
-    def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str): pass
+    def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str, sha256_hash: Optional[str] = None,
+                          size_bytes: Optional[int] = None, variant_key: Optional[str] = None): pass
+
+    def get_pdf_artifact(self, report_id: uuid.UUID, variant_key: str) -> Optional[Dict[str, Any]]:
+        """{"blob_path", "sha256", "size_bytes"} of a stored render variant, or None. Default: no lookup."""
+        return None
 
     # --- NUEVOS MÉTODOS PARA CACHÉ ---
     @abstractmethod
@@ -33,6 +63,58 @@ class RepositoryPort(ABC):
     def save_report_meta(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str, markdown: str, json_data: Dict[str, Any], prompt_hash: str) -> uuid.UUID: 
         pass
 
+    def update_report_hash(self, report_id: uuid.UUID, prompt_hash: str):
+        """Re-sella un reporte vigente con otro hash sin tocar su contenido ni generated_at."""
+        pass
+
+class AsyncRepositoryPort(ABC):
+    """Contraparte asíncrona de RepositoryPort para los handlers async de la API."""
+
+    @abstractmethod
+    async def get_session_by_app_id(self, app_session_id: str): pass
+
+    @abstractmethod
+    async def get_participants_with_roles(self, session_id: uuid.UUID) -> List[Dict[str, Any]]: pass
+
+    @abstractmethod
+    async def update_session_status(self, session_id: uuid.UUID, new_status: str): pass
+
+    @abstractmethod
+    async def save_staging_data(self, session_id: uuid.UUID, source: str, payload: Dict[str, Any]): pass
+
+    @abstractmethod
+    async def save_staging_batch(self, session_id: uuid.UUID, records: List[Tuple[str, Dict[str, Any]]]) -> int: pass
+
+    @abstractmethod
+    async def save_cleansed_event(self, session_id, subject_id, source_type, payload, t_start): pass
+
+    @abstractmethod
+    async def promote_staging_to_cleansed(self, session_id: uuid.UUID) -> int: pass
+
+    @abstractmethod
+    async def get_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]: pass
+
+    @abstractmethod
+    def iter_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> AsyncIterator[Dict[str, Any]]: pass
+
+    @abstractmethod
+    async def get_session_events_indexed(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, List[Dict[str, Any]]], List[Dict[str, Any]]]: pass
+
+    async def get_event_fingerprints(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, str], Optional[str]]:
+        return {}, None
+
+    @abstractmethod
+    async def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str, sha256_hash: Optional[str] = None,
+                                size_bytes: Optional[int] = None, variant_key: Optional[str] = None): pass
+
+    @abstractmethod
+    async def get_report_by_hash(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str, data_hash: str): pass
+
+    @abstractmethod
+    async def save_report_meta(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str, markdown: str, json_data: Dict[str, Any], prompt_hash: str) -> uuid.UUID: pass
+
+    async def update_report_hash(self, report_id: uuid.UUID, prompt_hash: str): pass
+
 class ReportRepositoryPort(ABC):
     @abstractmethod
     def get_report_content(self, session_id: uuid.UUID, subject_id: uuid.UUID) -> Optional[Dict[str, Any]]:
@@ -41,14 +123,159 @@ class ReportRepositoryPort(ABC):
         """
         pass
 
+    async def get_report_content_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
+        """Default: the sync read in a worker thread. Adapters with an async client override it."""
+        return await asyncio.to_thread(self.get_report_content, session_id, subject_id)
+
+    def get_reports_batch(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        """
+        Fetches many (session_id, subject_id) reports, keyed by their string ids.
+        Default: one read per key. Adapters that can batch the request override it.
+        """
+        reports = {}
+        for session_id, subject_id in keys:
+            report = self.get_report_content(session_id, subject_id)
+            if report:
+                reports[report_key(session_id, subject_id)] = report
+        return reports
+
+    async def get_reports_batch_async(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_reports_batch, keys)
+
+    def get_report_version(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Cheap freshness probe: (report_id, generated_at) without content_json, or None.
+        Default: derived from a full read. Adapters override it with a narrow query.
+        """
+        report = self.get_report_content(session_id, subject_id)
+        return report_version(report) if report else None
+
+    async def get_report_version_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        return await asyncio.to_thread(self.get_report_version, session_id, subject_id)
+
+
+def report_key(session_id, subject_id) -> Tuple[str, Optional[str]]:
+    """Normalised (session_id, subject_id) key used by the batched report reads."""
+    return str(session_id), str(subject_id) if subject_id else None
+
+def report_version(report: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    return str(report.get("report_id")), report.get("generated_at")
+
+class LLMRateLimitError(Exception):
+    """The LLM provider rejected the call for rate limits (HTTP 429). `retry_after` in seconds, if sent."""
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class AIPort(ABC):
     @abstractmethod
     def generate_report(self, system_prompt: str, user_json_data: str, model: str) -> str: pass
 
+    def stream_report(self, system_prompt: str, user_json_data: str, model: str) -> Iterator[str]:
+        """Yields the report text as deltas. Default: the whole response as a single delta."""
+        yield self.generate_report(system_prompt, user_json_data, model)
+
+class LLMCachePort(ABC):
+    """
+    Cache-aside storage for LLM responses.
+    `scope` groups the entries derived from one source report and `version` is that
+    report's generated_at: a different version is a miss, and only a newer
+    version written with `set` invalidates the whole scope.
+    """
+    @abstractmethod
+    def get(self, key: str, scope: str, version: Optional[str] = None) -> Optional[str]: pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, scope: str, version: Optional[str] = None): pass
+
+    @abstractmethod
+    def invalidate(self, scope: str): pass
+
+    @staticmethod
+    def make_key(system_prompt: str, user_payload: str, model: str, temperature: Optional[float]) -> str:
+        """Stable key for one LLM call: any change in prompt, payload, model or temperature misses."""
+        hasher = hashlib.sha256()
+        for part in (system_prompt, user_payload, model, repr(temperature)):
+            hasher.update(part.encode("utf-8"))
+            hasher.update(b"\0")
+        return hasher.hexdigest()
+
 class PDFPort(ABC):
     @abstractmethod
     def create_pdf(self, markdown_content: str, filename_prefix: str) -> str: pass
 
+    def render_pdf_bytes(self, markdown_content: str, filename_prefix: str) -> bytes:
+        """
+        Returns the PDF as bytes. Adapters that can render into memory override this;
+        the default goes through create_pdf and reads the file back.
+        """
+        with open(self.create_pdf(markdown_content, filename_prefix), "rb") as f:
+            return f.read()
+
+    def create_pdf_from_json(self, report_kind: str, content_json: Dict[str, Any], markdown_content: str, filename_prefix: str) -> str:
+        """
+        Renders a structured report (JSON_SCHEMA_INDIVIDUAL / JSON_SCHEMA_GRUPAL).
+        Engines with a direct JSON path override this; the default renders the Markdown.
+        """
+        return self.create_pdf(markdown_content, filename_prefix)
+
+    def render_pdf_bytes_from_json(self, report_kind: str, content_json: Dict[str, Any], markdown_content: str, filename_prefix: str) -> bytes:
+        """In-memory variant of create_pdf_from_json; the default renders the Markdown."""
+        return self.render_pdf_bytes(markdown_content, filename_prefix)
+
+    @staticmethod
+    def iter_chunks(pdf_bytes: bytes, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Chunk iterator for streaming responses."""
+        view = memoryview(pdf_bytes)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+
+    def render_identity(self) -> str:
+        """
+        Identifies the engine and template that produce the PDF bytes.
+        Two adapters with the same identity render identical output for the same Markdown.
+        """
+        return f"{type(self).__name__}:{getattr(self, 'TEMPLATE_VERSION', '0')}"
+
+class ArtifactStoragePort(ABC):
+    """
+    Content-addressed storage for rendered PDFs. Blobs are keyed by the sha256
+    of their bytes, so identical renders are stored once.
+    `put_*` return {"sha256", "size_bytes", "blob_path", "created"}; `created`
+    is False when the blob already existed.
+    """
+    @abstractmethod
+    def put_stream(self, chunks: Iterable[bytes]) -> Dict[str, Any]:
+        """Stores the bytes while hashing them (never holds the whole file in memory)."""
+        pass
+
+    @abstractmethod
+    def iter_blob(self, sha256: str, chunk_size: int = 64 * 1024) -> Optional[Iterator[bytes]]:
+        """Chunks of the blob, or None if it is not stored."""
+        pass
+
+    @abstractmethod
+    def exists(self, sha256: str) -> bool: pass
+
+    @abstractmethod
+    def signed_url(self, sha256: str, expires_in: int, filename: Optional[str] = None) -> str:
+        """Expiring download URL for a stored blob that does not need the API key."""
+        pass
+
+    def put_file(self, path: str, chunk_size: int = 64 * 1024) -> Dict[str, Any]:
+        with open(path, "rb") as f:
+            return self.put_stream(iter(lambda: f.read(chunk_size), b""))
+
+    def put_bytes(self, data: bytes) -> Dict[str, Any]:
+        return self.put_stream(PDFPort.iter_chunks(data))
+
+class DistributedLockPort(ABC):
+    """Mutual exclusion by key across processes (several uvicorn workers share one database)."""
+    @abstractmethod
+    def hold(self, key: str) -> ContextManager[bool]:
+        """Context manager that holds the lock for `key`; yields True if another process held it first."""
+        pass
+
 class CaseServicePort(ABC):
     @abstractmethod
     def fetch_case_data(self, case_id: str) -> Dict[str, Any]:
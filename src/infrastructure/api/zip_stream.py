@@ -0,0 +1,37 @@
+import zipfile
+from typing import AsyncIterator, Tuple
+
+
+class _ZipChunkBuffer:
+    """Write-only, non-seekable sink: zipfile falls back to data descriptors and we drain what it wrote."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, bytes]]) -> AsyncIterator[bytes]:
+    """
+    Streams a ZIP archive entry by entry: each (name, data) pair is sent to the
+    client as soon as it arrives, without buffering the whole archive.
+    PDFs are already compressed, so entries are stored without deflate.
+    """
+    buffer = _ZipChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async for name, data in entries:
+            archive.writestr(name, data)
+            yield buffer.drain()
+    # Directorio central, escrito al cerrar el archivo
+    yield buffer.drain()
+
@@ -0,0 +1,163 @@
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+from src.domain.ports import ReportRepositoryPort, report_key, report_version
+
+
+class CachedReportRepository(ReportRepositoryPort):
+    """
+    In-process LRU read-through cache in front of any ReportRepositoryPort.
+    Entries younger than `fresh_seconds` are served without a remote call.
+    Older entries are revalidated with the inner repository's version probe
+    (report_id + generated_at only): if the probe matches, the cached content
+    is served and its freshness renewed; otherwise the full report is refetched.
+    Size is bounded by `max_entries` and by the serialized size in `max_bytes`.
+    """
+
+    def __init__(self,
+                 inner: ReportRepositoryPort,
+                 max_entries: int = 1000,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 fresh_seconds: float = 30.0):
+        self.inner = inner
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale = 0
+        self.evictions = 0
+        # key -> (report, size, checked_at)
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_report_content(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
+        key = report_key(session_id, subject_id)
+        report, fresh = self._lookup(key)
+        if report is not None and fresh:
+            return report
+        if report is not None and self._revalidated(key, report, self.inner.get_report_version(session_id, subject_id)):
+            return report
+        return self._fetched(key, self.inner.get_report_content(session_id, subject_id))
+
+    async def get_report_content_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
+        key = report_key(session_id, subject_id)
+        report, fresh = self._lookup(key)
+        if report is not None and fresh:
+            return report
+        if report is not None and self._revalidated(key, report, await self.inner.get_report_version_async(session_id, subject_id)):
+            return report
+        return self._fetched(key, await self.inner.get_report_content_async(session_id, subject_id))
+
+    def get_report_version(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        return self.inner.get_report_version(session_id, subject_id)
+
+    async def get_report_version_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        return await self.inner.get_report_version_async(session_id, subject_id)
+
+    def get_reports_batch(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        reports, missing = self._batch_lookup(keys)
+        if missing:
+            reports.update(self._batch_fetched(self.inner.get_reports_batch(missing), len(missing)))
+        return reports
+
+    async def get_reports_batch_async(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        reports, missing = self._batch_lookup(keys)
+        if missing:
+            reports.update(self._batch_fetched(await self.inner.get_reports_batch_async(missing), len(missing)))
+        return reports
+
+    def invalidate(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None):
+        with self._lock:
+            self._forget(report_key(session_id, subject_id))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "revalidations": self.revalidations,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _lookup(self, key) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Returns (cached report or None, still fresh). A fresh entry counts as a hit."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(key)
+            report, _, checked_at = entry
+            fresh = time.monotonic() - checked_at < self.fresh_seconds
+            if fresh:
+                self.hits += 1
+            return report, fresh
+
+    def _revalidated(self, key, report: Dict[str, Any], version) -> bool:
+        # El sondeo trae solo (report_id, generated_at): si coincide, el contenido sigue vigente
+        with self._lock:
+            self.revalidations += 1
+            if version is not None and version == report_version(report):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries[key] = (entry[0], entry[1], time.monotonic())
+                self.hits += 1
+                return True
+            self.stale += 1
+            self._forget(key)
+            return False
+
+    def _fetched(self, key, report: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.misses += 1
+            if report is not None:
+                self._store(key, report)
+        return report
+
+    def _batch_lookup(self, keys):
+        reports, missing = {}, []
+        for session_id, subject_id in keys:
+            key = report_key(session_id, subject_id)
+            report, fresh = self._lookup(key)
+            if report is not None and fresh:
+                reports[key] = report
+            else:
+                # En lote no se sondea clave por clave: lo no fresco se pide en la misma request
+                missing.append((session_id, subject_id))
+        return reports, missing
+
+    def _batch_fetched(self, fetched: Dict[Tuple[str, Optional[str]], Dict[str, Any]], requested: int):
+        with self._lock:
+            self.misses += requested
+            for key, report in fetched.items():
+                self._store(key, report)
+        return fetched
+
+    def _store(self, key, report: Dict[str, Any]):
+        size = len(json.dumps(report, ensure_ascii=False, default=str))
+        self._forget(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (report, size, time.monotonic())
+        self._total_bytes += size
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+            self.evictions += 1
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
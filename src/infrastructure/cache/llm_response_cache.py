@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+from datetime import datetime
+from typing import Optional
+from src.domain.ports import LLMCachePort
+
+
+class DiskLLMResponseCache(LLMCachePort):
+    """
+    Local-disk LLM response cache.
+    Layout: {cache_dir}/{sha(scope)}/_version holds the source version and
+    {key}.json holds each response. Writes use a temp file + atomic rename,
+    so concurrent workers never read half-written entries.
+    """
+
+    def __init__(self, cache_dir: str = os.path.join("artifacts", ".llm_cache"), ttl_seconds: int = 7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, key: str, scope: str, version: Optional[str] = None) -> Optional[str]:
+        scope_dir = self._scope_dir(scope)
+        if version is not None and self._read_version(scope_dir) not in (None, version):
+            # Otra versión del reporte: MISS, sin borrar nada (un lector con datos viejos no debe vaciar el scope)
+            return None
+
+        entry_path = os.path.join(scope_dir, f"{key}.json")
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove(entry_path)
+            return None
+        if version is not None and entry.get("version") not in (None, version):
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: str, scope: str, version: Optional[str] = None):
+        scope_dir = self._scope_dir(scope)
+        current = self._read_version(scope_dir)
+        if version is not None and current not in (None, version):
+            if not self._is_newer(version, current):
+                # Respuesta calculada sobre una versión anterior: no pisa el scope vigente
+                return
+            # El reporte fuente se regeneró (generated_at posterior): todo el scope queda obsoleto
+            self.invalidate(scope)
+        os.makedirs(scope_dir, exist_ok=True)
+
+        if version is not None:
+            self._atomic_write(os.path.join(scope_dir, "_version"), version)
+        entry = {"value": value, "created_at": time.time(), "version": version}
+        self._atomic_write(os.path.join(scope_dir, f"{key}.json"), json.dumps(entry, ensure_ascii=False))
+
+    def invalidate(self, scope: str):
+        shutil.rmtree(self._scope_dir(scope), ignore_errors=True)
+
+    def _scope_dir(self, scope: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(scope.encode("utf-8")).hexdigest()[:32])
+
+    @staticmethod
+    def _is_newer(version: str, current: str) -> bool:
+        # Las versiones son generated_at; si no se pueden parsear se comparan como texto
+        try:
+            return datetime.fromisoformat(version) > datetime.fromisoformat(current)
+        except (ValueError, TypeError):
+            return version > current
+
+    @staticmethod
+    def _read_version(scope_dir: str) -> Optional[str]:
+        try:
+            with open(os.path.join(scope_dir, "_version"), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _atomic_write(path: str, content: str):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from src.domain.ports import AIPort, LLMRateLimitError
+
+# Menor valor = se admite primero. /generate-pdf es interactivo; el orquestador, batch.
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class TokenBucket:
+    """Bucket of `per_minute` units refilled continuously (per_minute / 60 per second)."""
+
+    def __init__(self, per_minute: int, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.level
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class LlmScheduler:
+    """
+    Admission control shared by every LLM call of the process.
+    Each model has an RPM and a TPM token bucket; a call is admitted when both
+    have room for one request and its estimated tokens. Waiting calls are
+    served by priority (interactive before batch), then in arrival order.
+    A 429 blocks the model for the server's Retry-After (or an exponential
+    backoff with jitter) and the call is retried up to `max_attempts` times.
+    Models without configured limits are only subject to the 429 handling.
+    """
+
+    def __init__(self,
+                 limits: Dict[str, Tuple[int, int]],
+                 expected_output_tokens: int = 1500,
+                 max_attempts: int = 5,
+                 base_backoff_seconds: float = 1.0,
+                 max_backoff_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.expected_output_tokens = expected_output_tokens
+        self.max_attempts = max(1, max_attempts)
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.clock = clock
+        now = clock()
+        # model -> (bucket RPM, bucket TPM)
+        self._buckets = {model: (TokenBucket(rpm, now), TokenBucket(tpm, now)) for model, (rpm, tpm) in limits.items()}
+        self._blocked_until: Dict[str, float] = {}
+        self._queues: Dict[str, List[Tuple[int, int]]] = {}
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {p: {"admitted": 0, "wait_seconds": 0.0, "rate_limited": 0} for p in PRIORITIES}
+
+    def estimate_tokens(self, system_prompt: str, user_payload: str) -> int:
+        # ~4 caracteres por token para el prompt + la salida esperada, que OpenAI también descuenta del TPM
+        return (len(system_prompt) + len(user_payload)) // 4 + self.expected_output_tokens
+
+    def acquire(self, model: str, tokens: int, priority: str = "batch") -> float:
+        """Blocks until the call may be sent. Returns the seconds spent waiting."""
+        ticket = (PRIORITIES[priority], next(self._sequence))
+        started = self.clock()
+        with self._cond:
+            queue = self._queues.setdefault(model, [])
+            heapq.heappush(queue, ticket)
+            self._cond.notify_all()
+            try:
+                while True:
+                    timeout = None
+                    if queue[0] == ticket:
+                        timeout = self._wait_time(model, tokens)
+                        if timeout <= 0:
+                            self._admit(model, tokens)
+                            heapq.heappop(queue)
+                            break
+                    self._cond.wait(timeout)
+            except BaseException:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                raise
+            finally:
+                self._cond.notify_all()
+            waited = self.clock() - started
+            self._stats[priority]["admitted"] += 1
+            self._stats[priority]["wait_seconds"] += waited
+            return waited
+
+    def rate_limited(self, model: str, priority: str, attempt: int, retry_after: Optional[float]) -> bool:
+        """
+        Records a 429 and blocks the model until it may be retried.
+        Returns False when the call has used all its attempts.
+        """
+        delay = retry_after
+        if delay is None:
+            delay = min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.0)
+        with self._cond:
+            self._stats[priority]["rate_limited"] += 1
+            self._blocked_until[model] = max(self._blocked_until.get(model, 0.0), self.clock() + delay)
+            self._cond.notify_all()
+        print(f"⚠️ [LLM] 429 en {model} (intento {attempt}/{self.max_attempts}); en pausa {delay:.1f}s")
+        return attempt < self.max_attempts
+
+    def run(self, model: str, tokens: int, priority: str, call: Callable[[], Any]) -> Any:
+        for attempt in itertools.count(1):
+            self.acquire(model, tokens, priority)
+            try:
+                return call()
+            except LLMRateLimitError as e:
+                if not self.rate_limited(model, priority, attempt, e.retry_after):
+                    raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = self.clock()
+            models = {}
+            for model in set(self._buckets) | set(self._queues):
+                requests, tokens = self._buckets.get(model, (None, None))
+                models[model] = {
+                    "queued": len(self._queues.get(model, [])),
+                    "blocked_seconds": round(max(0.0, self._blocked_until.get(model, 0.0) - now), 3),
+                    "requests_available": round(requests.available(now), 1) if requests else None,
+                    "tokens_available": round(tokens.available(now)) if tokens else None,
+                }
+            priorities = {
+                p: {**s, "wait_seconds": round(s["wait_seconds"], 3)} for p, s in self._stats.items()
+            }
+            return {"models": models, "priorities": priorities}
+
+    def _wait_time(self, model: str, tokens: int) -> float:
+        now = self.clock()
+        wait = self._blocked_until.get(model, 0.0) - now
+        buckets = self._buckets.get(model)
+        if buckets:
+            requests, token_bucket = buckets
+            wait = max(wait, requests.wait_time(1, now), token_bucket.wait_time(tokens, now))
+        return max(0.0, wait)
+
+    def _admit(self, model: str, tokens: int):
+        buckets = self._buckets.get(model)
+        if buckets:
+            now = self.clock()
+            buckets[0].take(1, now)
+            buckets[1].take(tokens, now)
+
+
+class RateLimitedAIAdapter(AIPort):
+    """
+    AIPort decorator that sends every call through a shared LlmScheduler.
+    One scheduler is shared by several decorators, one per priority
+    (interactive for /generate-pdf, batch for the orchestrator).
+    """
+
+    def __init__(self, inner: AIPort, scheduler: LlmScheduler, priority: str = "batch"):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridad desconocida: {priority}")
+        self.inner = inner
+        self.scheduler = scheduler
+        self.priority = priority
+
+    @property
+    def temperature(self) -> Optional[float]:
+        # Forma parte de la clave del caché LLM de GeneratePdfUseCase
+        return getattr(self.inner, "temperature", None)
+
+    def generate_report(self, system_prompt: str, user_json_data: str, model: str) -> str:
+        tokens = self.scheduler.estimate_tokens(system_prompt, user_json_data)
+        return self.scheduler.run(
+            model, tokens, self.priority,
+            lambda: self.inner.generate_report(system_prompt, user_json_data, model)
+        )
+
+    def stream_report(self, system_prompt: str, user_json_data: str, model: str) -> Iterator[str]:
+        tokens = self.scheduler.estimate_tokens(system_prompt, user_json_data)
+        for attempt in itertools.count(1):
+            self.scheduler.acquire(model, tokens, self.priority)
+            started = False
+            try:
+                for delta in self.inner.stream_report(system_prompt, user_json_data, model):
+                    started = True
+                    yield delta
+                return
+            except LLMRateLimitError as e:
+                # Con deltas ya enviados al cliente no se puede reintentar sin duplicar texto
+                if started or not self.scheduler.rate_limited(model, self.priority, attempt, e.retry_after):
+                    raise
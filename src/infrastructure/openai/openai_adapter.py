@@ -1,11 +1,15 @@
-from openai import OpenAI
-from src.domain.ports import AIPort 
+from typing import Iterator, Optional
+from openai import OpenAI, RateLimitError
+from src.domain.ports import AIPort, LLMRateLimitError
 
 class OpenAIAdapter(AIPort):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, max_retries: int = 2):
         if not api_key:
             raise ValueError("The OpenAI API KEY is missing from the adapter.")
-        self.client = OpenAI(api_key=api_key)
+        # base_url permite apuntar a un servidor compatible (p. ej. fake_openai_server.py);
+        # max_retries=0 deja los reintentos al planificador de límites
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries)
+        self.temperature = 0.1
 
     def generate_report(self, system_prompt: str, user_json_data: str, model: str) -> str:
         try:
@@ -15,9 +19,51 @@ class OpenAIAdapter(AIPort):
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_json_data}
                 ],
-                temperature=0.1, 
+                temperature=self.temperature, 
             )
             return response.choices[0].message.content
             
+        except RateLimitError as e:
+            raise _rate_limit_error(e)
         except Exception as e:
-            raise Exception(f"OpenAI Adapter Error: {str(e)}")
\ No newline at end of file
+            raise Exception(f"OpenAI Adapter Error: {str(e)}")
+
+    def stream_report(self, system_prompt: str, user_json_data: str, model: str) -> Iterator[str]:
+        """stream=True: yields each content delta as soon as OpenAI sends it."""
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_json_data}
+                ],
+                temperature=self.temperature,
+                stream=True,
+            )
+        except RateLimitError as e:
+            raise _rate_limit_error(e)
+        except Exception as e:
+            raise Exception(f"OpenAI Adapter Error: {str(e)}")
+
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"OpenAI Adapter Error: {str(e)}")
+        finally:
+            # Si el cliente SSE se desconecta se cierra la conexión con OpenAI
+            stream.close()
+
+
+def _rate_limit_error(error: RateLimitError) -> LLMRateLimitError:
+    """429 -> LLMRateLimitError con el Retry-After del servidor (retry-after-ms tiene prioridad)."""
+    headers = error.response.headers if error.response is not None else {}
+    retry_after = None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            retry_after = float(headers[header]) * scale
+            break
+        except (KeyError, TypeError, ValueError):
+            continue
+    return LLMRateLimitError(f"OpenAI Adapter Error: {str(error)}", retry_after=retry_after)
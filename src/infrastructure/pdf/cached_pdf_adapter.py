@@ -0,0 +1,240 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any
+from src.domain.ports import PDFPort
+from src.infrastructure.pdf.pdf_files import write_pdf_atomic
+
+
+class CachedPdfAdapter(PDFPort):
+    """
+    Content-addressed render cache in front of any PDFPort.
+    The key is a hash of (Markdown, engine + template version), so an unchanged
+    report is copied from the cache instead of being rendered again.
+    Cache files live in `cache_dir` and survive restarts; the total size is
+    bounded with LRU eviction. The index owns every PDF in `cache_dir`, so each
+    adapter needs its own directory.
+    The bytes paths are served from an in-memory LRU (`memory_max_bytes`) and
+    only reads or writes `cache_dir` when `persist_to_disk` is enabled.
+    """
+
+    def __init__(self,
+                 inner: PDFPort,
+                 cache_dir: str = os.path.join("artifacts", ".render_cache"),
+                 max_bytes: int = 256 * 1024 * 1024,
+                 output_dir: str = "artifacts",
+                 memory_max_bytes: int = 32 * 1024 * 1024,
+                 persist_to_disk: bool = True):
+        self.inner = inner
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.output_dir = output_dir
+        self.memory_max_bytes = memory_max_bytes
+        self.persist_to_disk = persist_to_disk
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory_hits = 0
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def render_identity(self) -> str:
+        return self.inner.render_identity()
+
+    def cache_key(self, markdown_content: str) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(self.inner.render_identity().encode())
+        hasher.update(b"\0")
+        hasher.update(markdown_content.encode("utf-8"))
+        return hasher.hexdigest()
+
+    def json_cache_key(self, report_kind: str, content_json: Dict[str, Any]) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(self.inner.render_identity().encode())
+        hasher.update(f"\0json:{report_kind}\0".encode())
+        hasher.update(json.dumps(content_json, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def create_pdf(self, markdown_content: str, filename_prefix: str) -> str:
+        return self._create_cached(
+            self.cache_key(markdown_content), filename_prefix,
+            lambda: self.inner.create_pdf(markdown_content, filename_prefix)
+        )
+
+    def create_pdf_from_json(self, report_kind: str, content_json: Dict[str, Any], markdown_content: str, filename_prefix: str) -> str:
+        return self._create_cached(
+            self.json_cache_key(report_kind, content_json), filename_prefix,
+            lambda: self.inner.create_pdf_from_json(report_kind, content_json, markdown_content, filename_prefix)
+        )
+
+    def _create_cached(self, key: str, filename_prefix: str, render: Callable[[], str]) -> str:
+        cached_path = self._cached_path(key)
+
+        with self._lock:
+            hit = key in self._index
+            if hit:
+                self._index.move_to_end(key)
+
+        if hit:
+            # HIT: solo se copia el archivo al nombre esperado, sin tocar el motor PDF
+            target_path = os.path.join(self.output_dir, f"{filename_prefix}.pdf")
+            try:
+                self._atomic_copy(cached_path, target_path)
+                with self._lock:
+                    self.hits += 1
+                return target_path
+            except FileNotFoundError:
+                # Desalojado (u otro proceso lo borró) entre el índice y la copia: se renderiza
+                pass
+
+        with self._lock:
+            self._forget(key)
+            self.misses += 1
+        pdf_path = render()
+        self._store(key, pdf_path)
+        return pdf_path
+
+    def render_pdf_bytes(self, markdown_content: str, filename_prefix: str) -> bytes:
+        return self._bytes_cached(
+            self.cache_key(markdown_content),
+            lambda: self.inner.render_pdf_bytes(markdown_content, filename_prefix)
+        )
+
+    def render_pdf_bytes_from_json(self, report_kind: str, content_json: Dict[str, Any], markdown_content: str, filename_prefix: str) -> bytes:
+        return self._bytes_cached(
+            self.json_cache_key(report_kind, content_json),
+            lambda: self.inner.render_pdf_bytes_from_json(report_kind, content_json, markdown_content, filename_prefix)
+        )
+
+    def _bytes_cached(self, key: str, render: Callable[[], bytes]) -> bytes:
+
+        # Camino caliente: memoria, sin tocar el disco
+        with self._lock:
+            pdf_bytes = self._memory.get(key)
+            if pdf_bytes is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return pdf_bytes
+            hit = self.persist_to_disk and key in self._index
+            if hit:
+                self._index.move_to_end(key)
+
+        if hit:
+            try:
+                with open(self._cached_path(key), "rb") as f:
+                    pdf_bytes = f.read()
+                with self._lock:
+                    self.hits += 1
+                    self._remember(key, pdf_bytes)
+                return pdf_bytes
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            self._forget(key)
+            self.misses += 1
+        pdf_bytes = render()
+        if self.persist_to_disk:
+            self._store_bytes(key, pdf_bytes)
+        with self._lock:
+            self._remember(key, pdf_bytes)
+        return pdf_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "memory_hits": self.memory_hits,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def _cached_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _load_index(self):
+        # Reconstruye el LRU desde disco, del archivo menos reciente al más reciente
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pdf"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _store(self, key: str, pdf_path: str):
+        # Copia (no hard link): los motores reescriben el archivo de salida en sitio
+        self._atomic_copy(pdf_path, self._cached_path(key))
+        size = os.path.getsize(self._cached_path(key))
+        with self._lock:
+            self._forget(key)
+            self._index[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _store_bytes(self, key: str, pdf_bytes: bytes):
+        write_pdf_atomic(pdf_bytes, key, self.cache_dir)
+        with self._lock:
+            self._forget(key)
+            self._index[key] = len(pdf_bytes)
+            self._total_bytes += len(pdf_bytes)
+            self._evict()
+
+    def _remember(self, key: str, pdf_bytes: bytes):
+        # LRU en memoria acotado por bytes; un PDF mayor que el límite no se guarda
+        if len(pdf_bytes) > self.memory_max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = pdf_bytes
+        self._memory_bytes += len(pdf_bytes)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _forget(self, key: str):
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._cached_path(key))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _atomic_copy(src: str, dst: str):
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        tmp_path = f"{dst}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
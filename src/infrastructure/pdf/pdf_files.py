@@ -0,0 +1,22 @@
+import os
+import uuid
+
+
+def write_pdf_atomic(pdf_bytes: bytes, filename_prefix: str, output_dir: str = "artifacts") -> str:
+    """
+    Writes the PDF under a unique temp name and renames it into place.
+    Concurrent renders of the same report never expose a half-written file:
+    readers see either the previous PDF or the new one.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pdf_path = os.path.join(output_dir, f"{filename_prefix}.pdf")
+    tmp_path = f"{pdf_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, pdf_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return pdf_path
@@ -0,0 +1,237 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing as mp
+from typing import Optional
+from src.domain.ports import PDFPort
+
+
+# Módulos que el servidor forkserver precarga: los workers nacen con el motor ya importado
+_ENGINE_MODULES = {
+    "xhtml2pdf": "src.infrastructure.pdf.xhtml2pdf_adapter",
+    "reportlab": "src.infrastructure.pdf.reportlab_adapter",
+}
+
+
+def _build_engine(engine: str) -> PDFPort:
+    # Imports dentro del worker: cada proceso carga su propio motor una sola vez
+    if engine == "xhtml2pdf":
+        from src.infrastructure.pdf.xhtml2pdf_adapter import Xhtml2PdfAdapter
+        return Xhtml2PdfAdapter()
+    if engine == "reportlab":
+        from src.infrastructure.pdf.reportlab_adapter import ReportLabAdapter
+        return ReportLabAdapter()
+    raise ValueError(f"Motor PDF desconocido: {engine}")
+
+
+def _worker_main(conn, engine: str):
+    """Worker loop: warms up the engine, then renders jobs until it receives None."""
+    adapter = _build_engine(engine)
+
+    # Render de calentamiento en memoria: fuerza la carga de fuentes, CSS y módulos perezosos
+    adapter.render_pdf_bytes("# warmup", "_warmup")
+    conn.send(("ready", None))
+
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        op, markdown_content, filename_prefix = job
+        try:
+            render = adapter.render_pdf_bytes if op == "bytes" else adapter.create_pdf
+            conn.send(("ok", render(markdown_content, filename_prefix)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, ctx, engine: str):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, engine), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+
+    def wait_ready(self, timeout: float):
+        try:
+            if not self.conn.poll(timeout):
+                raise TimeoutError("El worker PDF no terminó su calentamiento a tiempo")
+            status, _ = self.conn.recv()
+        except (EOFError, OSError):
+            status = None
+        if status != "ready":
+            raise RuntimeError("El worker PDF no pudo iniciar")
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        except (BrokenPipeError, OSError):
+            pass
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+class ProcessPoolPdfAdapter(PDFPort):
+    """
+    PDFPort that dispatches renders to a pool of pre-started worker processes.
+    Each worker has already imported its engine (xhtml2pdf or reportlab) and
+    rendered a warm-up document, so jobs only pay for their own content.
+    Workers are recycled after `max_jobs_per_worker` renders to cap memory growth,
+    and a worker that exceeds `timeout` is killed and replaced in the background.
+
+    Workers start on `start()` (or the first render), not in the constructor:
+    with "spawn"/"forkserver" each child re-imports the main module, and a pool
+    built at import time would otherwise try to start itself again there.
+    """
+
+    def __init__(self,
+                 engine: str = "xhtml2pdf",
+                 pool_size: Optional[int] = None,
+                 timeout: float = 120,
+                 max_jobs_per_worker: int = 50,
+                 start_method: str = "forkserver"):
+        self.engine = engine
+        self.pool_size = pool_size or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        # fork desde un proceso con hilos (uvicorn, pools de conexiones) puede heredar locks tomados
+        self._ctx = mp.get_context(start_method)
+        if start_method == "forkserver":
+            self._ctx.set_forkserver_preload([_ENGINE_MODULES.get(engine, __name__)])
+        self._identity = _build_engine(engine).render_identity()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._closed = False
+        self._started = False
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._workers = set()
+
+    def start(self):
+        """Starts and warms up the workers; safe to call more than once."""
+        with self._start_lock:
+            if self._started or self._closed:
+                return
+            self._started = True
+            workers = [self._spawn(wait=False) for _ in range(self.pool_size)]
+            ready = 0
+            for w in workers:
+                try:
+                    w.wait_ready(self.timeout)
+                except Exception as e:
+                    print(f"⚠️ Worker PDF no arrancó ({e}); se reintenta en segundo plano")
+                    self._replace(w)
+                    continue
+                self._idle.put(w)
+                ready += 1
+            if ready == 0:
+                raise RuntimeError("Ningún worker PDF pudo iniciar")
+
+    def create_pdf(self, markdown_content: str, filename_prefix: str) -> str:
+        return self._dispatch("path", markdown_content, filename_prefix)
+
+    def render_pdf_bytes(self, markdown_content: str, filename_prefix: str) -> bytes:
+        # Los bytes vuelven por el pipe: el proceso API no toca el disco
+        return self._dispatch("bytes", markdown_content, filename_prefix)
+
+    def _dispatch(self, op: str, markdown_content: str, filename_prefix: str):
+        if self._closed:
+            raise RuntimeError("El pool de render PDF está cerrado")
+        if not self._started:
+            self.start()
+
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Ningún worker PDF libre para '{filename_prefix}' tras {self.timeout}s")
+
+        try:
+            worker.conn.send((op, markdown_content, filename_prefix))
+            if not worker.conn.poll(self.timeout):
+                # El worker está colgado: se mata y se reemplaza sin afectar a los demás
+                self._replace(worker)
+                worker = None
+                raise TimeoutError(f"El render de '{filename_prefix}' superó {self.timeout}s")
+
+            status, result = worker.conn.recv()
+            worker.jobs_done += 1
+            if worker.jobs_done >= self.max_jobs_per_worker:
+                # El reciclaje no retrasa ni hace fallar un render que ya terminó
+                self._replace(worker, graceful=True)
+                worker = None
+
+            if status == "error":
+                raise Exception(f"Error generating PDF: {result}")
+            return result
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            # El proceso murió a mitad del trabajo (p. ej. OOM): se reemplaza
+            self._replace(worker)
+            worker = None
+            raise RuntimeError(f"El worker PDF terminó inesperadamente renderizando '{filename_prefix}'")
+        finally:
+            if worker is not None and not self._closed:
+                self._idle.put(worker)
+
+    def render_identity(self) -> str:
+        # Los workers producen exactamente lo mismo que el motor en proceso
+        return self._identity
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for w in workers:
+            w.stop()
+
+    def _spawn(self, wait: bool = True) -> _Worker:
+        worker = _Worker(self._ctx, self.engine)
+        with self._lock:
+            self._workers.add(worker)
+        if wait:
+            try:
+                worker.wait_ready(self.timeout)
+            except Exception:
+                self._discard(worker)
+                raise
+        return worker
+
+    def _discard(self, worker: _Worker, graceful: bool = False):
+        with self._lock:
+            self._workers.discard(worker)
+        if graceful:
+            worker.stop()
+        else:
+            worker.kill()
+            worker.conn.close()
+
+    def _replace(self, worker: _Worker, graceful: bool = False):
+        """Retires `worker` and spawns its replacement off the request path."""
+        with self._lock:
+            self._workers.discard(worker)
+        threading.Thread(target=self._respawn, args=(worker, graceful), daemon=True, name="pdf-respawn").start()
+
+    def _respawn(self, old: _Worker, graceful: bool):
+        self._discard(old, graceful)
+        delay = 1.0
+        # Reintenta con backoff hasta recuperar el hueco: el pool nunca se queda sin workers para siempre
+        while not self._closed:
+            try:
+                worker = self._spawn()
+            except Exception as e:
+                print(f"⚠️ No se pudo reemplazar un worker PDF ({e}); reintento en {delay:.0f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            if self._closed:
+                self._discard(worker, graceful=True)
+            else:
+                self._idle.put(worker)
+            return
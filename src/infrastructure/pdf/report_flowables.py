@@ -0,0 +1,139 @@
+from typing import Any, Callable, Dict, List, Optional
+from xml.sax.saxutils import escape
+from reportlab.platypus import Paragraph, Spacer
+from src.infrastructure.pdf.reportlab_styles import get_report_styles
+
+# Mapea content_json (JSON_SCHEMA_INDIVIDUAL / JSON_SCHEMA_GRUPAL) directo a flowables,
+# con la misma estructura visual que las plantillas de src/application/services/report_templates.py.
+
+
+def _text(value: Any) -> str:
+    # Paragraph interpreta mini-HTML: el texto del LLM se escapa
+    return escape(str(value if value is not None else "N/A"))
+
+
+class _Builder:
+    def __init__(self):
+        self.styles = get_report_styles()
+        self.elements: List[Any] = []
+
+    def heading(self, level: str, text: str):
+        self.elements.append(Paragraph(_text(text), self.styles[level]))
+
+    def paragraph(self, markup: str):
+        # Texto de un solo fragmento (sin <b> en línea): ReportLab corta las líneas por su
+        # camino rápido; las negritas en línea triplican el costo de layout. La ruta
+        # Markdown tampoco las conservaba (get_text), así que el resultado visual es el mismo.
+        self.elements.append(Paragraph(markup, self.styles["body"]))
+
+    def field(self, label: str, value: Any):
+        self.paragraph(f"• {_text(label)}: {_text(value)}")
+
+    def rule(self):
+        self.elements.append(Spacer(1, 5))
+
+    def aspects(self, items: List[Dict[str, Any]]):
+        for item in items or []:
+            self.paragraph(f"• {_text(item.get('nombre'))}: {_text(item.get('justificacion'))} (Ref: {_text(item.get('ref'))})")
+        self.elements.append(Spacer(1, 5))
+
+    def cover(self, title: str):
+        self.heading("h1", title)
+        self.paragraph("CÉLULA DE INFORMES | BE-LABS ANALYTICS")
+
+
+def build_individual_flowables(data: Dict[str, Any]) -> List[Any]:
+    head = data.get("header", {})
+    tec = data.get("analisis_tecnico", {})
+    afin = data.get("afinidad", {})
+    b = _Builder()
+
+    b.cover("INFORME DE EVALUACIÓN PSICOPROFESIOGRÁFICA – CÁMARA GESELL")
+    b.heading("h3", "FICHA DE IDENTIFICACIÓN")
+    b.field("Nombre", head.get("nombre", "N/A"))
+    b.field("Edad", head.get("edad", "N/A"))
+    b.field("Género", head.get("genero", "N/A"))
+    b.field("Ciudad", head.get("ciudad", "N/A"))
+    b.field("Rol en Sesión", head.get("rol", "N/A"))
+
+    b.rule()
+    b.heading("h2", "1. ANÁLISIS DE SEÑALES TÉCNICAS (EVIDENCIA BIOMÉTRICA)")
+    b.heading("h3", "A. Perfil de Voz y Prosodia [VOZ]")
+    b.paragraph(_text(tec.get("voz", "N/A")))
+    b.heading("h3", "B. Conducta y Postura [VISIÓN – CUERPO]")
+    b.paragraph(_text(tec.get("postura", "N/A")))
+    b.heading("h3", "C. Emociones y Micro-expresiones [VISIÓN – ROSTRO]")
+    b.paragraph(_text(tec.get("emociones", "N/A")))
+
+    b.rule()
+    b.heading("h2", "2. ASPECTOS POSITIVOS DOMINANTES")
+    b.aspects(data.get("aspectos_positivos", []))
+
+    b.rule()
+    b.heading("h2", "3. ASPECTOS NEGATIVOS O LIMITANTES")
+    b.aspects(data.get("aspectos_negativos", []))
+
+    b.rule()
+    b.heading("h2", "4. AFINIDAD CON EL ROL Y ROL IDEAL")
+    b.field("Afinidad", afin.get("nivel", "N/A"))
+    b.field("Rol Ideal", afin.get("rol_ideal", "N/A"))
+
+    b.rule()
+    b.heading("h2", "5. HITOS CRONOLÓGICOS DESTACADOS")
+    for h in data.get("hitos", []) or []:
+        b.paragraph(f"• [{_text(h.get('tiempo'))}] – {_text(h.get('titulo'))}: {_text(h.get('descripcion'))} (Ref: {_text(h.get('ref'))})")
+
+    b.rule()
+    b.heading("h2", "6. OBSERVACIÓN GENERAL Y RECOMENDACIÓN")
+    b.paragraph(_text(data.get("observacion_final", "N/A")))
+    return b.elements
+
+
+def build_group_flowables(data: Dict[str, Any]) -> List[Any]:
+    col = data.get("analisis_colectivo", {})
+    inter = data.get("interaccion", {})
+    b = _Builder()
+
+    b.cover("INFORME GRUPAL - ANÁLISIS COLECTIVO GESELL")
+
+    b.rule()
+    b.heading("h2", "1. DINÁMICA DE GRUPO")
+    b.field("Perfil de Voz Colectivo", col.get("voz", "N/A"))
+    b.field("Sincronía y Ritmo", col.get("sincronia", "N/A"))
+    b.field("Clima Emocional General", col.get("clima_emocional", "N/A"))
+
+    b.rule()
+    b.heading("h2", "2. ASPECTOS POSITIVOS DEL GRUPO")
+    b.aspects(data.get("aspectos_positivos", []))
+
+    b.heading("h2", "3. ASPECTOS NEGATIVOS O LIMITANTES DEL GRUPO")
+    b.aspects(data.get("aspectos_negativos", []))
+
+    b.rule()
+    b.heading("h2", "4. INTERACCIÓN Y LIDERAZGO")
+    b.field("Patrón de Interacción", inter.get("patron", "N/A"))
+    b.field("Liderazgo Identificado", inter.get("liderazgo", "N/A"))
+
+    b.rule()
+    b.heading("h2", "5. HITOS GRUPALES DESTACADOS")
+    for h in data.get("hitos_grupales", []) or []:
+        b.paragraph(f"• [{_text(h.get('tiempo'))}] {_text(h.get('evento'))}: {_text(h.get('descripcion'))}")
+
+    b.rule()
+    b.heading("h2", "6. CONCLUSIÓN GENERAL Y OBSERVACIONES DEL GRUPO")
+    b.paragraph(_text(data.get("conclusion_grupal", "N/A")))
+    return b.elements
+
+
+_BUILDERS: Dict[str, Callable[[Dict[str, Any]], List[Any]]] = {
+    "individual": build_individual_flowables,
+    "group": build_group_flowables,
+}
+
+
+def build_report_flowables(report_kind: str, content_json: Any) -> Optional[List[Any]]:
+    """Flowables for a known report kind, or None when the caller should fall back to Markdown."""
+    builder = _BUILDERS.get(report_kind)
+    if builder is None or not isinstance(content_json, dict):
+        return None
+    return builder(content_json)
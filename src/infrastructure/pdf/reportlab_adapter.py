@@ -1,35 +1,59 @@
-import os
 import markdown2
+from io import BytesIO
 from bs4 import BeautifulSoup
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from typing import Any, Dict
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.enums import TA_JUSTIFY
-from reportlab.lib.colors import black, HexColor
 from src.domain.ports import PDFPort
+from src.infrastructure.pdf.pdf_files import write_pdf_atomic
+from src.infrastructure.pdf.reportlab_styles import get_report_styles, get_table_style
+from src.infrastructure.pdf.report_flowables import build_report_flowables
 
 class ReportLabAdapter(PDFPort):
+    # Subir la versión cuando cambien los estilos: invalida el caché de render
+    TEMPLATE_VERSION = "2"
+
+    def __init__(self, output_dir: str = "artifacts", persist_to_disk: bool = False):
+        self.output_dir = output_dir
+        # Si es True, render_pdf_bytes también deja una copia en disco
+        self.persist_to_disk = persist_to_disk
+
     def create_pdf(self, markdown_content: str, filename_prefix: str) -> str:
-        # Route configuration
-        output_dir = "artifacts"
-        os.makedirs(output_dir, exist_ok=True)
-        pdf_path = os.path.join(output_dir, f"{filename_prefix}.pdf")
-        # Document Settings
-        doc = SimpleDocTemplate(pdf_path, pagesize=letter, 
-                                rightMargin=50, leftMargin=50, 
-                                topMargin=50, bottomMargin=50)
-        styles = getSampleStyleSheet()
+        pdf_bytes = self._render(markdown_content)
+        pdf_path = write_pdf_atomic(pdf_bytes, filename_prefix, self.output_dir)
+        print(f"PDF successfully generated: {pdf_path}")
+        return pdf_path
+
+    def render_pdf_bytes(self, markdown_content: str, filename_prefix: str) -> bytes:
+        pdf_bytes = self._render(markdown_content)
+        if self.persist_to_disk:
+            write_pdf_atomic(pdf_bytes, filename_prefix, self.output_dir)
+        return pdf_bytes
+
+    def create_pdf_from_json(self, report_kind: str, content_json: Dict[str, Any], markdown_content: str, filename_prefix: str) -> str:
+        # Ruta directa JSON -> flowables: sin Markdown, HTML ni BeautifulSoup
+        flowables = build_report_flowables(report_kind, content_json)
+        if flowables is None:
+            return self.create_pdf(markdown_content, filename_prefix)
+        pdf_path = write_pdf_atomic(self._build(flowables), filename_prefix, self.output_dir)
+        print(f"PDF successfully generated: {pdf_path}")
+        return pdf_path
+
+    def render_pdf_bytes_from_json(self, report_kind: str, content_json: Dict[str, Any], markdown_content: str, filename_prefix: str) -> bytes:
+        flowables = build_report_flowables(report_kind, content_json)
+        if flowables is None:
+            return self.render_pdf_bytes(markdown_content, filename_prefix)
+        pdf_bytes = self._build(flowables)
+        if self.persist_to_disk:
+            write_pdf_atomic(pdf_bytes, filename_prefix, self.output_dir)
+        return pdf_bytes
+
+    def _render(self, markdown_content: str) -> bytes:
+        # Render en memoria: nada toca el disco hasta que se decide persistir
+        styles = get_report_styles()
+        estilo_parrafo = styles["body"]
         elements = []
 
-        # Clean paragraph style
-        estilo_parrafo = ParagraphStyle(
-            'Gessel_Normal',
-            fontName='Helvetica',
-            fontSize=10,
-            leading=12,
-            alignment=TA_JUSTIFY,
-            spaceAfter=10
-        )
         # Convert Markdown to HTML
         html_content = markdown2.markdown(markdown_content, extras=["tables"])
         soup = BeautifulSoup(html_content, 'html.parser')
@@ -37,10 +61,7 @@ class ReportLabAdapter(PDFPort):
         for element in soup.contents:
             if element.name is None: continue
             if element.name in ['h1', 'h2', 'h3']:
-                level = element.name[1]
-                size = 14 if level == '1' else 12
-                style = ParagraphStyle(f'H{level}', parent=styles['Heading1'], fontSize=size, spaceBefore=12, spaceAfter=6)
-                elements.append(Paragraph(element.get_text().strip(), style))
+                elements.append(Paragraph(element.get_text().strip(), styles[element.name]))
             
             # Paragraphs
             elif element.name == 'p':
@@ -64,21 +85,27 @@ class ReportLabAdapter(PDFPort):
                 
                 if table_data:
                     t = Table(table_data, colWidths=[120, 50, 280]) 
-                    t.setStyle(TableStyle([
-                        ('GRID', (0, 0), (-1, -1), 0.5, black),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('BACKGROUND', (0, 0), (-1, 0), HexColor('#F0F0F0')),
-                    ]))
+                    t.setStyle(get_table_style())
                     elements.append(t)
                     elements.append(Spacer(1, 10))
             elif element.name == 'hr':
                 elements.append(Spacer(1, 5))
 
+        return self._build(elements)
+
+    @staticmethod
+    def _build(elements) -> bytes:
+        buffer = BytesIO()
+        # Document Settings
+        # invariant: sin fecha ni ID aleatorio, el mismo contenido da los mismos bytes (deduplicación por sha256)
+        doc = SimpleDocTemplate(buffer, pagesize=letter, 
+                                rightMargin=50, leftMargin=50, 
+                                topMargin=50, bottomMargin=50,
+                                invariant=True)
         # Build the PDF
         try:
             doc.build(elements)
-            print(f"PDF successfully generated: {pdf_path}")
-            return pdf_path
+            return buffer.getvalue()
         except Exception as e:
             print(f"Error building PDF {e}")
             raise e
\ No newline at end of file
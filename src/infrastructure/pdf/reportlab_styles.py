@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Dict
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_JUSTIFY
+from reportlab.lib.colors import black, HexColor
+from reportlab.platypus import TableStyle
+
+
+@lru_cache(maxsize=1)
+def get_report_styles() -> Dict[str, ParagraphStyle]:
+    """
+    Estilos de los informes, construidos una sola vez por proceso.
+    getSampleStyleSheet() y los ParagraphStyle derivados son inmutables en la
+    práctica, así que todos los renders los comparten.
+    """
+    base = getSampleStyleSheet()
+    return {
+        "h1": ParagraphStyle('H1', parent=base['Heading1'], fontSize=14, spaceBefore=12, spaceAfter=6),
+        "h2": ParagraphStyle('H2', parent=base['Heading1'], fontSize=12, spaceBefore=12, spaceAfter=6),
+        "h3": ParagraphStyle('H3', parent=base['Heading1'], fontSize=12, spaceBefore=12, spaceAfter=6),
+        # Clean paragraph style
+        "body": ParagraphStyle(
+            'Gessel_Normal',
+            fontName='Helvetica',
+            fontSize=10,
+            leading=12,
+            alignment=TA_JUSTIFY,
+            spaceAfter=10
+        ),
+    }
+
+
+@lru_cache(maxsize=1)
+def get_table_style() -> TableStyle:
+    return TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('BACKGROUND', (0, 0), (-1, 0), HexColor('#F0F0F0')),
+    ])
@@ -1,14 +1,52 @@
-import os
 import re
+import threading
 import markdown
 from io import BytesIO
+from contextlib import contextmanager
+from reportlab import rl_config
 from xhtml2pdf import pisa
 from src.domain.ports import PDFPort
+from src.infrastructure.pdf.pdf_files import write_pdf_atomic
+
+_invariant_lock = threading.Lock()
+_invariant_users = 0
+_invariant_previous = None
+
+
+@contextmanager
+def _invariant_output():
+    """
+    pisa no expone `invariant`: se activa rl_config.invariant solo mientras hay renders
+    de este adaptador en curso (sin fecha ni ID aleatorio, el mismo HTML da los mismos
+    bytes para la deduplicación por sha256) y se restaura el valor previo al terminar.
+    El contador permite renders concurrentes sin serializarlos.
+    """
+    global _invariant_users, _invariant_previous
+    with _invariant_lock:
+        if _invariant_users == 0:
+            _invariant_previous = rl_config.invariant
+            rl_config.invariant = 1
+        _invariant_users += 1
+    try:
+        yield
+    finally:
+        with _invariant_lock:
+            _invariant_users -= 1
+            if _invariant_users == 0:
+                rl_config.invariant = _invariant_previous
+
 
 class Xhtml2PdfAdapter(PDFPort):
     """
     Adapter implementation using xhtml2pdf (pisa) to generate PDFs from Markdown/HTML.
     """
+    # Subir la versión cuando cambie el CSS: invalida el caché de render
+    TEMPLATE_VERSION = "2"
+
+    def __init__(self, output_dir: str = "artifacts", persist_to_disk: bool = False):
+        self.output_dir = output_dir
+        # Si es True, render_pdf_bytes también deja una copia en disco
+        self.persist_to_disk = persist_to_disk
     
     def _remove_emojis(self, text: str) -> str:
         emoji_pattern = re.compile("[" 
@@ -26,6 +64,19 @@ class Xhtml2PdfAdapter(PDFPort):
         Generates a PDF from markdown content and saves it to the artifacts directory.
         Returns the path to the generated PDF.
         """
+        return write_pdf_atomic(self._render(markdown_content), filename_prefix, self.output_dir)
+
+    def render_pdf_bytes(self, markdown_content: str, filename_prefix: str) -> bytes:
+        """
+        Generates the PDF into an in-memory buffer and returns its bytes.
+        Only writes to disk when persist_to_disk is enabled.
+        """
+        pdf_bytes = self._render(markdown_content)
+        if self.persist_to_disk:
+            write_pdf_atomic(pdf_bytes, filename_prefix, self.output_dir)
+        return pdf_bytes
+
+    def _render(self, markdown_content: str) -> bytes:
         # 1. Clean and convert to HTML
         clean_content = self._remove_emojis(markdown_content)
         
@@ -145,18 +196,15 @@ class Xhtml2PdfAdapter(PDFPort):
         </html>
         """
         
-        # 3. Generate PDF
-        output_dir = "artifacts"
-        os.makedirs(output_dir, exist_ok=True)
-        pdf_path = os.path.join(output_dir, f"{filename_prefix}.pdf")
-        
-        with open(pdf_path, "wb") as pdf_file:
+        # 3. Generate PDF (en memoria)
+        pdf_buffer = BytesIO()
+        with _invariant_output():
             pisa_status = pisa.CreatePDF(
                 BytesIO(full_html.encode("utf-8")), 
-                dest=pdf_file
+                dest=pdf_buffer
             )
             
         if pisa_status.err:
             raise Exception(f"Error generating PDF: {pisa_status.err}")
             
-        return pdf_path
+        return pdf_buffer.getvalue()
@@ -0,0 +1,87 @@
+import time
+import hashlib
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from src.domain.ports import DistributedLockPort
+
+
+def advisory_key(key: str) -> int:
+    """bigint estable para pg_advisory_lock (hashtext() de Postgres solo da 32 bits)."""
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+class PostgresAdvisoryLock(DistributedLockPort):
+    """
+    Session-level pg_advisory_lock held by the leader while it generates.
+    Uses its own small engine (`pool_size`, no overflow), so leaders can never
+    drain the application's pool. Waiters poll pg_try_advisory_lock and give
+    their connection back between attempts. After `timeout_seconds` of waiting,
+    or if the lock pool is unavailable, the caller proceeds without the lock:
+    duplicated work is preferable to a failed request.
+    """
+
+    def __init__(self, db_url: str, pool_size: int = 5, timeout_seconds: float = 300,
+                 poll_interval: float = 0.05, max_poll_interval: float = 0.5):
+        self.engine: Engine = create_engine(db_url, pool_size=pool_size, max_overflow=0, pool_timeout=5, pool_pre_ping=True)
+        self.timeout_seconds = timeout_seconds
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[bool]:
+        lock_id = advisory_key(key)
+        deadline = time.monotonic() + self.timeout_seconds
+        delay = self.poll_interval
+        waited = False
+        while True:
+            try:
+                conn = self._try_acquire(lock_id)
+            except OperationalError as e:
+                print(f"⚠️ [SINGLE-FLIGHT] Lock '{key}' no disponible ({e.__class__.__name__}). Generando sin coordinación...")
+                yield waited
+                return
+            if conn is not None:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"⚠️ [SINGLE-FLIGHT] Timeout esperando el lock '{key}'. Generando sin coordinación...")
+                yield waited
+                return
+            waited = True
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.max_poll_interval)
+
+        try:
+            yield waited
+        finally:
+            try:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": lock_id})
+                conn.commit()
+            except Exception:
+                # Una conexión que pudo quedar con el lock no vuelve al pool
+                conn.invalidate()
+            conn.close()
+
+    def _try_acquire(self, lock_id: int) -> Optional[Connection]:
+        """Connection holding the lock, or None (lock busy or lock pool exhausted)."""
+        try:
+            conn = self.engine.connect()
+        except PoolTimeoutError:
+            # Todas las conexiones del lock están en manos de líderes: se reintenta como un lock ocupado
+            return None
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": lock_id}).scalar()
+            # El lock es de sesión: sobrevive al commit y no deja la conexión 'idle in transaction'
+            conn.commit()
+        except Exception:
+            conn.invalidate()
+            conn.close()
+            raise
+        if acquired:
+            return conn
+        # Mientras se espera, la conexión vuelve al pool
+        conn.close()
+        return None
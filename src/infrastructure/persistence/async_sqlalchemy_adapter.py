@@ -0,0 +1,230 @@
+import uuid
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from datetime import datetime
+
+# Puertos
+from src.domain.ports import AsyncRepositoryPort
+
+# Modelos
+from src.infrastructure.persistence.models import (
+    User, Session, Subject, SessionSubject,
+    IngestionStaging, BiometricEvent,
+    Report
+)
+from src.infrastructure.persistence.sqlalchemy_adapter import PROMOTE_STAGING_SQL, events_projection, fingerprints_query, fingerprints_from_rows, pdf_artifact_upsert
+from src.infrastructure.storage.local_artifact_store import hash_file
+
+
+class AsyncSQLAlchemyAdapter(AsyncRepositoryPort):
+    """
+    Versión asíncrona de SQLAlchemyAdapter sobre asyncpg.
+    Las consultas se esperan en el event loop en lugar de bloquearlo, así un
+    worker de la API puede tener cientos de esperas a la base en vuelo,
+    limitadas por pool_size + max_overflow conexiones.
+    """
+
+    def __init__(self,
+                 db_url: str,
+                 pool_size: int = 20,
+                 max_overflow: int = 80,
+                 pool_timeout: int = 30,
+                 statement_cache_size: int = 100,
+                 stream_batch_size: int = 500):
+        self.engine = create_async_engine(
+            self.to_asyncpg_url(db_url),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=True,
+            # Caché de sentencias preparadas de asyncpg (0 = desactivado, requerido detrás de PgBouncer en modo transaction)
+            connect_args={"statement_cache_size": statement_cache_size},
+        )
+        self.stream_batch_size = stream_batch_size
+        self.SessionLocal = async_sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
+
+    @staticmethod
+    def to_asyncpg_url(db_url: str) -> str:
+        """Reutiliza la misma DATABASE_URL del adaptador síncrono cambiando solo el driver."""
+        url = make_url(db_url)
+        if url.get_backend_name() == "postgresql":
+            url = url.set(drivername="postgresql+asyncpg")
+        return url.render_as_string(hide_password=False)
+
+    async def dispose(self):
+        await self.engine.dispose()
+
+    # --- 1. OPERATIONAL (Users, Sessions, Subjects) ---
+
+    async def create_or_update_user(self, email: str, name: str, role: str, city: Optional[str] = None) -> User:
+        async with self.SessionLocal() as db:
+            try:
+                user = (await db.execute(select(User).filter_by(email=email))).scalars().first()
+                if user:
+                    user.name = name
+                    user.role = role
+                    user.city = city
+                    user.updated_at = datetime.now()
+                else:
+                    user = User(email=email, name=name, role=role, city=city)
+                    db.add(user)
+                await db.commit()
+                await db.refresh(user)
+                return user
+            except Exception as e:
+                await db.rollback()
+                raise e
+
+    async def create_or_update_session(self, app_session_id: str, case_id: str, status: str = 'created', created_by: Optional[uuid.UUID] = None) -> Session:
+        async with self.SessionLocal() as db:
+            session = (await db.execute(select(Session).filter_by(app_session_id=app_session_id))).scalars().first()
+            if session:
+                session.case_id = case_id
+                session.status = status
+                session.updated_at = datetime.now()
+            else:
+                session = Session(app_session_id=app_session_id, case_id=case_id, status=status, created_by=created_by)
+                db.add(session)
+            await db.commit()
+            await db.refresh(session)
+            return session
+
+    async def get_session_by_app_id(self, app_session_id: str) -> Optional[Session]:
+        async with self.SessionLocal() as db:
+            return (await db.execute(select(Session).where(Session.app_session_id == app_session_id))).scalars().first()
+
+    async def update_session_status(self, session_id: uuid.UUID, new_status: str):
+        async with self.SessionLocal() as db:
+            await db.execute(update(Session).where(Session.session_id == session_id).values(status=new_status))
+            await db.commit()
+
+    async def get_subject_by_app_id(self, app_subject_id: str) -> Optional[Subject]:
+        async with self.SessionLocal() as db:
+            return (await db.execute(select(Subject).where(Subject.app_subject_id == app_subject_id))).scalars().first()
+
+    async def get_participants_with_roles(self, session_id: uuid.UUID) -> List[Dict[str, Any]]:
+        statement = select(
+            Subject.subject_id, Subject.app_subject_id, Subject.name,
+            Subject.age, Subject.gender, Subject.city,
+            SessionSubject.role_in_session
+        ).join(
+            SessionSubject, Subject.subject_id == SessionSubject.subject_id
+        ).where(SessionSubject.session_id == session_id)
+        async with self.engine.connect() as conn:
+            results = (await conn.execute(statement)).all()
+        return [{"subject_id": r.subject_id, "app_id": r.app_subject_id, "name": r.name, "age": r.age, "gender": r.gender, "city": r.city, "role": r.role_in_session} for r in results]
+
+    # --- 2. AUDIT (Capa Bronze) ---
+
+    async def save_staging_data(self, session_id: uuid.UUID, source: str, payload: Dict[str, Any]):
+        async with self.SessionLocal() as db:
+            db.add(IngestionStaging(session_id=session_id, source_cell=source, raw_payload=payload, is_validated=False))
+            await db.commit()
+
+    async def save_staging_batch(self, session_id: uuid.UUID, records: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Lote completo en una transacción; asyncpg ejecuta el executemany como una sola sentencia preparada."""
+        if not records:
+            return 0
+        rows = [
+            {"staging_id": uuid.uuid4(), "session_id": session_id, "source_cell": source, "raw_payload": payload, "is_validated": False}
+            for source, payload in records
+        ]
+        async with self.engine.begin() as conn:
+            await conn.execute(insert(IngestionStaging), rows)
+        return len(records)
+
+    async def get_pending_audit(self, session_id: uuid.UUID):
+        async with self.SessionLocal() as db:
+            return (await db.execute(
+                select(IngestionStaging).filter_by(session_id=session_id, is_validated=False)
+            )).scalars().all()
+
+    # --- 3. CLEANSED (Capa Silver) ---
+
+    async def save_cleansed_event(self, session_id, subject_id, source_type, payload, t_start):
+        async with self.SessionLocal() as db:
+            db.add(BiometricEvent(
+                session_id=session_id,
+                subject_id=subject_id,
+                source_type=source_type,
+                processed_payload=payload,
+                t_start_ms=t_start
+            ))
+            await db.commit()
+
+    async def promote_staging_to_cleansed(self, session_id: uuid.UUID) -> int:
+        """Misma promoción Bronze -> Silver que el adaptador síncrono, en una sola sentencia."""
+        async with self.engine.begin() as conn:
+            result = await conn.execute(PROMOTE_STAGING_SQL, {"session_id": session_id})
+            return result.rowcount
+
+    async def get_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+        return [event async for event in self.iter_cleansed_events(session_id, subject_id)]
+
+    async def iter_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> AsyncIterator[Dict[str, Any]]:
+        statement = events_projection(session_id)
+        if subject_id:
+            statement = statement.where(BiometricEvent.subject_id == subject_id)
+        async for row in self._stream(statement):
+            yield {"source": row.source_type, "t_start": row.t_start_ms, "data": row.processed_payload}
+
+    async def get_session_events_indexed(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        by_subject: Dict[uuid.UUID, List[Dict[str, Any]]] = {}
+        timeline: List[Dict[str, Any]] = []
+        async for row in self._stream(events_projection(session_id, with_subject=True)):
+            event = {"source": row.source_type, "t_start": row.t_start_ms, "data": row.processed_payload}
+            timeline.append(event)
+            by_subject.setdefault(row.subject_id, []).append(event)
+        return by_subject, timeline
+
+    async def get_event_fingerprints(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, str], Optional[str]]:
+        async with self.engine.connect() as conn:
+            return fingerprints_from_rows(await conn.execute(fingerprints_query(session_id)))
+
+    async def _stream(self, statement) -> AsyncIterator[Any]:
+        # Cursor del lado del servidor de asyncpg, leído en lotes de stream_batch_size
+        async with self.engine.connect() as conn:
+            # En AsyncConnection, execution_options() es una corrutina: las opciones van en stream()
+            result = await conn.stream(statement, execution_options={"yield_per": self.stream_batch_size})
+            async for row in result:
+                yield row
+
+    # --- 4. ARTIFACTS & CACHE (Capa Gold) ---
+
+    async def get_report_by_hash(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str, data_hash: str):
+        async with self.SessionLocal() as db:
+            return (await db.execute(
+                select(Report).filter_by(session_id=session_id, subject_id=subject_id, kind=kind, prompt_hash=data_hash)
+            )).scalars().first()
+
+    async def save_report_meta(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str, markdown: str, json_data: Dict[str, Any], prompt_hash: str) -> uuid.UUID:
+        async with self.SessionLocal() as db:
+            existing = (await db.execute(
+                select(Report).filter_by(session_id=session_id, subject_id=subject_id, kind=kind)
+            )).scalars().first()
+            if existing:
+                existing.content_markdown = markdown
+                existing.content_json = json_data
+                existing.prompt_hash = prompt_hash
+                existing.generated_at = datetime.now()
+                await db.commit()
+                return existing.report_id
+            new_report = Report(session_id=session_id, subject_id=subject_id, kind=kind, content_markdown=markdown, content_json=json_data, prompt_hash=prompt_hash)
+            db.add(new_report)
+            await db.commit()
+            await db.refresh(new_report)
+            return new_report.report_id
+
+    async def update_report_hash(self, report_id: uuid.UUID, prompt_hash: str):
+        async with self.engine.begin() as conn:
+            await conn.execute(update(Report).where(Report.report_id == report_id).values(prompt_hash=prompt_hash))
+
+    async def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str, sha256_hash: Optional[str] = None,
+                                size_bytes: Optional[int] = None, variant_key: Optional[str] = None):
+        if sha256_hash is None:
+            sha256_hash, size_bytes = await asyncio.to_thread(hash_file, blob_path)
+        async with self.engine.begin() as conn:
+            await conn.execute(pdf_artifact_upsert(report_id, blob_path, sha256_hash, size_bytes, variant_key))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Numeric, Boolean, DateTime, ForeignKey, Text, LargeBinary, BigInteger
+from sqlalchemy import Column, String, Integer, Numeric, Boolean, DateTime, ForeignKey, Text, LargeBinary, BigInteger, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
@@ -102,6 +102,22 @@ class BiometricEvent(Base):
     processed_payload = Column(JSONB)
     t_start_ms = Column(BigInteger, nullable=False)
 
+class EventFingerprint(Base):
+    # Huella incremental por (sesión, sujeto), mantenida por triggers sobre biometric_events
+    __tablename__ = 'event_fingerprints'
+    __table_args__ = (
+        UniqueConstraint('session_id', 'subject_id', name='uq_event_fingerprints_scope', postgresql_nulls_not_distinct=True),
+        {"schema": "cleansed"},
+    )
+    # server_default: las filas las inserta el trigger, no el ORM
+    fingerprint_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=func.gen_random_uuid())
+    session_id = Column(UUID(as_uuid=True), ForeignKey('operational.sessions.session_id', ondelete='CASCADE'), nullable=False)
+    subject_id = Column(UUID(as_uuid=True), ForeignKey('operational.subjects.subject_id', ondelete='CASCADE'))
+    event_count = Column(BigInteger, nullable=False, default=0)
+    digest_hi = Column(BigInteger, nullable=False, default=0)
+    digest_lo = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
 # 4. SCHEMA: STORAGE & LOGS (Outputs)
 class Report(Base):
     __tablename__ = 'reports'
@@ -117,12 +133,20 @@ class Report(Base):
     generated_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class PDFArtifact(Base):
+    # sha256 de los bytes del PDF: un mismo blob puede pertenecer a varios reportes
     __tablename__ = 'pdf_artifacts'
-    __table_args__ = {"schema": "artifacts"}
+    __table_args__ = (
+        UniqueConstraint('report_id', 'sha256_hash', name='uq_pdf_artifacts_report_hash'),
+        Index('ix_pdf_artifacts_report_variant', 'report_id', 'variant_key'),
+        {"schema": "artifacts"},
+    )
     artifact_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     report_id = Column(UUID(as_uuid=True), ForeignKey('artifacts.reports.report_id'))
     blob_path = Column(Text, nullable=False)
-    sha256_hash = Column(String(64), unique=True, nullable=False)
+    sha256_hash = Column(String(64), nullable=False, index=True)
+    size_bytes = Column(BigInteger)
+    # sha256 de (versión del reporte, modo, motor y plantillas): /generate-pdf-url reutiliza el blob sin re-renderizar
+    variant_key = Column(String(64))
     generated_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class LlmRun(Base):
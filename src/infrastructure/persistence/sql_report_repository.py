@@ -0,0 +1,121 @@
+import uuid
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import and_, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.domain.ports import ReportRepositoryPort, report_key
+from src.infrastructure.persistence.models import Report, Session, Case
+
+
+class SqlReportRepository(ReportRepositoryPort):
+    """
+    Same read as vw_reports (reports + sessions + cases), executed directly on
+    the SQLAlchemy engine the API already holds. Removes the PostgREST hop and
+    its JSON round trip; rows keep the shape SupabaseReportRepository returns.
+    """
+
+    def __init__(self, engine: Engine, async_engine: Optional[AsyncEngine] = None):
+        self.engine = engine
+        self.async_engine = async_engine
+
+    def get_report_content(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(self._report_query(session_id, subject_id)).mappings().first()
+        return self._to_dict(row) if row else None
+
+    async def get_report_content_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
+        if self.async_engine is None:
+            return await super().get_report_content_async(session_id, subject_id)
+        async with self.async_engine.connect() as conn:
+            row = (await conn.execute(self._report_query(session_id, subject_id))).mappings().first()
+        return self._to_dict(row) if row else None
+
+    def get_report_version(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(self._version_query(session_id, subject_id)).first()
+        return self._to_version(row) if row else None
+
+    async def get_report_version_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        if self.async_engine is None:
+            return await super().get_report_version_async(session_id, subject_id)
+        async with self.async_engine.connect() as conn:
+            row = (await conn.execute(self._version_query(session_id, subject_id))).first()
+        return self._to_version(row) if row else None
+
+    def get_reports_batch(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        if not keys:
+            return {}
+        with self.engine.connect() as conn:
+            rows = conn.execute(self._batch_query(keys)).mappings().all()
+        return self._index_rows(rows)
+
+    async def get_reports_batch_async(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        if not keys:
+            return {}
+        if self.async_engine is None:
+            return self.get_reports_batch(keys)
+        async with self.async_engine.connect() as conn:
+            rows = (await conn.execute(self._batch_query(keys))).mappings().all()
+        return self._index_rows(rows)
+
+    @staticmethod
+    def _view():
+        # Equivalente a public.vw_reports (database/scripts/05_final_storage_and_reports.sql)
+        return select(
+            Report.report_id, Report.session_id, Report.subject_id, Report.kind,
+            Report.content_json, Report.generated_at,
+            Session.app_session_id, Case.title.label("case_title")
+        ).join(
+            Session, Session.session_id == Report.session_id
+        ).join(
+            Case, Case.case_id == Session.case_id
+        )
+
+    @staticmethod
+    def _version_query(session_id: uuid.UUID, subject_id: Optional[uuid.UUID]):
+        # Sondeo de frescura: sin joins ni content_json
+        return select(Report.report_id, Report.generated_at).where(
+            Report.session_id == session_id,
+            Report.subject_id == subject_id if subject_id else Report.subject_id.is_(None)
+        ).limit(1)
+
+    @staticmethod
+    def _to_version(row) -> Tuple[str, Optional[str]]:
+        return str(row.report_id), row.generated_at.isoformat() if row.generated_at else None
+
+    def _report_query(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]):
+        return self._view().where(
+            Report.session_id == session_id,
+            Report.subject_id == subject_id if subject_id else Report.subject_id.is_(None)
+        ).limit(1)
+
+    def _batch_query(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]):
+        conditions = [
+            and_(
+                Report.session_id == session_id,
+                Report.subject_id == subject_id if subject_id else Report.subject_id.is_(None)
+            )
+            for session_id, subject_id in set(keys)
+        ]
+        return self._view().where(or_(*conditions))
+
+    def _index_rows(self, rows) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        reports = {}
+        for row in rows:
+            report = self._to_dict(row)
+            reports[report_key(report["session_id"], report["subject_id"])] = report
+        return reports
+
+    @staticmethod
+    def _to_dict(row) -> Dict[str, Any]:
+        # Mismos tipos que entrega PostgREST: ids y fechas como texto
+        return {
+            "report_id": str(row["report_id"]),
+            "session_id": str(row["session_id"]),
+            "subject_id": str(row["subject_id"]) if row["subject_id"] else None,
+            "kind": row["kind"],
+            "content_json": row["content_json"],
+            "generated_at": row["generated_at"].isoformat() if row["generated_at"] else None,
+            "app_session_id": row["app_session_id"],
+            "case_title": row["case_title"],
+        }
@@ -1,23 +1,122 @@
 import uuid
-import hashlib
-from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine
+import json
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+from sqlalchemy import create_engine, insert, select, text, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
 # Puertos
 from src.domain.ports import RepositoryPort
+from src.infrastructure.storage.local_artifact_store import hash_file
 
 # Modelos
 from src.infrastructure.persistence.models import (
     User, Session, Subject, SessionSubject, 
     IngestionStaging, BiometricEvent, 
-    Report, PDFArtifact, LlmRun
+    Report, PDFArtifact, LlmRun, EventFingerprint
 )
 
+# Promoción Bronze -> Silver compartida por los adaptadores sync y async
+PROMOTE_STAGING_SQL = text("""
+    WITH pending AS (
+        SELECT st.staging_id, st.source_cell, st.raw_payload, sub.subject_id
+        FROM audit.ingestion_staging st
+        JOIN operational.subjects sub
+          ON sub.app_subject_id = st.raw_payload->>'person_id'
+        WHERE st.session_id = :session_id
+          AND st.is_validated = false
+        FOR UPDATE OF st
+    ),
+    promoted AS (
+        INSERT INTO cleansed.biometric_events
+            (event_id, session_id, subject_id, source_type, processed_payload, t_start_ms)
+        SELECT gen_random_uuid(), :session_id, p.subject_id, p.source_cell, p.raw_payload,
+               COALESCE((p.raw_payload->>'t_start_ms')::bigint, 0)
+        FROM pending p
+    )
+    UPDATE audit.ingestion_staging st
+       SET is_validated = true
+      FROM pending p
+     WHERE st.staging_id = p.staging_id
+""")
+
+
+def events_projection(session_id: uuid.UUID, with_subject: bool = False):
+    """Proyección Core de la capa Silver (sin hidratar BiometricEvent), ordenada por t_start_ms."""
+    columns = [BiometricEvent.source_type, BiometricEvent.t_start_ms, BiometricEvent.processed_payload]
+    if with_subject:
+        columns.insert(0, BiometricEvent.subject_id)
+    return (
+        select(*columns)
+        .where(BiometricEvent.session_id == session_id)
+        .order_by(BiometricEvent.t_start_ms.asc(), BiometricEvent.event_id.asc())
+    )
+
+
+def pdf_artifact_upsert(report_id: uuid.UUID, blob_path: str, sha256_hash: str, size_bytes: Optional[int],
+                        variant_key: Optional[str] = None):
+    """Upsert por (reporte, contenido): volver a generar el mismo PDF solo refresca la fila."""
+    stmt = pg_insert(PDFArtifact).values(
+        report_id=report_id, blob_path=blob_path, sha256_hash=sha256_hash, size_bytes=size_bytes, variant_key=variant_key
+    )
+    return stmt.on_conflict_do_update(
+        constraint="uq_pdf_artifacts_report_hash",
+        set_={
+            "blob_path": stmt.excluded.blob_path,
+            "size_bytes": stmt.excluded.size_bytes,
+            "variant_key": func.coalesce(stmt.excluded.variant_key, PDFArtifact.variant_key),
+            "generated_at": func.now(),
+        },
+    )
+
+
+def pdf_artifact_lookup(report_id: uuid.UUID, variant_key: str):
+    """Artefacto más reciente de una variante del reporte (índice report_id, variant_key)."""
+    return (
+        select(PDFArtifact.blob_path, PDFArtifact.sha256_hash, PDFArtifact.size_bytes)
+        .where(PDFArtifact.report_id == report_id, PDFArtifact.variant_key == variant_key)
+        .order_by(PDFArtifact.generated_at.desc())
+        .limit(1)
+    )
+
+
+_DIGEST_MASK = (1 << 64) - 1
+
+
+def format_fingerprint(event_count: int, digest_hi: int, digest_lo: int) -> str:
+    """'v1:<eventos>:<xor de 128 bits>'; los bigint con signo se leen como 64 bits sin signo."""
+    return f"v1:{event_count}:{digest_hi & _DIGEST_MASK:016x}{digest_lo & _DIGEST_MASK:016x}"
+
+
+def fingerprints_from_rows(rows) -> Tuple[Dict[uuid.UUID, str], Optional[str]]:
+    """
+    Filas de cleansed.event_fingerprints -> (huella por subject_id, huella de la sesión).
+    La huella de la sesión es el XOR de todas las filas: cubre la línea de tiempo grupal.
+    """
+    by_subject: Dict[uuid.UUID, str] = {}
+    total, hi, lo, seen = 0, 0, 0, False
+    for row in rows:
+        seen = True
+        total += row.event_count
+        hi ^= row.digest_hi
+        lo ^= row.digest_lo
+        if row.subject_id is not None:
+            by_subject[row.subject_id] = format_fingerprint(row.event_count, row.digest_hi, row.digest_lo)
+    return by_subject, (format_fingerprint(total, hi, lo) if seen else None)
+
+
+def fingerprints_query(session_id: uuid.UUID):
+    return select(
+        EventFingerprint.subject_id, EventFingerprint.event_count,
+        EventFingerprint.digest_hi, EventFingerprint.digest_lo
+    ).where(EventFingerprint.session_id == session_id)
+
+
 class SQLAlchemyAdapter(RepositoryPort):
-    def __init__(self, db_url: str):
+    def __init__(self, db_url: str, stream_batch_size: int = 500):
         self.engine = create_engine(db_url, pool_pre_ping=True)
+        self.stream_batch_size = stream_batch_size
         self.SessionLocal = sessionmaker(bind=self.engine, autoflush=False, expire_on_commit=False)
 
     # --- 1. OPERATIONAL (Users, Sessions, Subjects) ---
@@ -110,6 +209,50 @@ class SQLAlchemyAdapter(RepositoryPort):
         finally:
             db.close()
 
+    def save_staging_batch(self, session_id: uuid.UUID, records: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Inserta un lote completo de (source, payload) en una sola transacción.
+        Con psycopg2 usa execute_values (un INSERT multi-fila por página);
+        con otros drivers cae a un executemany de SQLAlchemy Core.
+        """
+        if not records:
+            return 0
+
+        if self.engine.dialect.driver == "psycopg2":
+            from psycopg2.extras import execute_values
+            rows = [
+                (str(uuid.uuid4()), str(session_id), source, json.dumps(payload, ensure_ascii=False), False)
+                for source, payload in records
+            ]
+            conn = self.engine.raw_connection()
+            try:
+                cursor = conn.cursor()
+                try:
+                    execute_values(
+                        cursor,
+                        "INSERT INTO audit.ingestion_staging "
+                        "(staging_id, session_id, source_cell, raw_payload, is_validated) VALUES %s",
+                        rows,
+                        template="(%s::uuid, %s::uuid, %s, %s::jsonb, %s)",
+                        page_size=len(rows)
+                    )
+                finally:
+                    cursor.close()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        else:
+            rows = [
+                {"staging_id": uuid.uuid4(), "session_id": session_id, "source_cell": source, "raw_payload": payload, "is_validated": False}
+                for source, payload in records
+            ]
+            with self.engine.begin() as conn:
+                conn.execute(insert(IngestionStaging), rows)
+        return len(records)
+
     def get_pending_audit(self, session_id: uuid.UUID):
         """MÉTODO FALTANTE CORREGIDO: Retorna datos de staging para la refinería"""
         db = self.SessionLocal()
@@ -135,16 +278,59 @@ class SQLAlchemyAdapter(RepositoryPort):
         finally:
             db.close()
 
+    def promote_staging_to_cleansed(self, session_id: uuid.UUID) -> int:
+        """
+        Promoción Bronze -> Silver en una sola sentencia y una sola transacción:
+        resuelve el subject_id uniendo raw_payload->>'person_id' con operational.subjects,
+        inserta en cleansed.biometric_events y marca el staging como validado.
+        Los registros sin sujeto conocido quedan pendientes. Retorna las filas promovidas.
+        """
+        with self.engine.begin() as conn:
+            result = conn.execute(PROMOTE_STAGING_SQL, {"session_id": session_id})
+            return result.rowcount
+
     def get_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
-        db = self.SessionLocal()
-        try:
-            query = db.query(BiometricEvent).filter(BiometricEvent.session_id == session_id)
-            if subject_id:
-                query = query.filter(BiometricEvent.subject_id == subject_id)
-            events = query.order_by(BiometricEvent.t_start_ms.asc()).all()
-            return [{"source": e.source_type, "t_start": e.t_start_ms, "data": e.processed_payload} for e in events]
-        finally:
-            db.close()
+        return list(self.iter_cleansed_events(session_id, subject_id))
+
+    def iter_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Proyección Core (sin hidratar BiometricEvent) leída con cursor del lado del servidor.
+        La memoria queda acotada por stream_batch_size y no por la duración de la sesión.
+        """
+        statement = events_projection(session_id)
+        if subject_id:
+            statement = statement.where(BiometricEvent.subject_id == subject_id)
+        for row in self._stream(statement):
+            yield {"source": row.source_type, "t_start": row.t_start_ms, "data": row.processed_payload}
+
+    def get_session_events_indexed(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Carga los eventos Silver de la sesión con UNA consulta ordenada por t_start_ms.
+        Retorna (índice por subject_id, línea de tiempo grupal). Ambas estructuras
+        comparten los mismos dicts: los payloads no se copian.
+        """
+        by_subject: Dict[uuid.UUID, List[Dict[str, Any]]] = {}
+        timeline: List[Dict[str, Any]] = []
+        for row in self._stream(events_projection(session_id, with_subject=True)):
+            event = {"source": row.source_type, "t_start": row.t_start_ms, "data": row.processed_payload}
+            timeline.append(event)
+            by_subject.setdefault(row.subject_id, []).append(event)
+        return by_subject, timeline
+
+    def get_event_fingerprints(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, str], Optional[str]]:
+        """Una fila pequeña por sujeto, mantenida por triggers: no toca cleansed.biometric_events."""
+        with self.engine.connect() as conn:
+            return fingerprints_from_rows(conn.execute(fingerprints_query(session_id)))
+
+    def _stream(self, statement) -> Iterator[Any]:
+        # stream_results abre un cursor con nombre (server-side) en psycopg2;
+        # yield_per trae las filas en lotes de stream_batch_size
+        with self.engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=self.stream_batch_size
+            ).execute(statement)
+            for row in result:
+                yield row
 
     # --- 4. ARTIFACTS & CACHE (Capa Gold) ---
 
@@ -175,14 +361,21 @@ class SQLAlchemyAdapter(RepositoryPort):
         finally:
             db.close()
 
-    def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str):
-        db = self.SessionLocal()
-        try:
-            file_hash = hashlib.sha256(blob_path.encode()).hexdigest()
-            artifact = PDFArtifact(report_id=report_id, blob_path=blob_path, sha256_hash=file_hash)
-            db.add(artifact)
-            db.commit()
-        except Exception:
-            db.rollback()
-        finally:
-            db.close()
\ No newline at end of file
+    def update_report_hash(self, report_id: uuid.UUID, prompt_hash: str):
+        with self.engine.begin() as conn:
+            conn.execute(update(Report).where(Report.report_id == report_id).values(prompt_hash=prompt_hash))
+
+    def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str, sha256_hash: Optional[str] = None,
+                          size_bytes: Optional[int] = None, variant_key: Optional[str] = None):
+        if sha256_hash is None:
+            # Sin almacén de blobs: se hashean los bytes del archivo, no su ruta
+            sha256_hash, size_bytes = hash_file(blob_path)
+        with self.engine.begin() as conn:
+            conn.execute(pdf_artifact_upsert(report_id, blob_path, sha256_hash, size_bytes, variant_key))
+
+    def get_pdf_artifact(self, report_id: uuid.UUID, variant_key: str) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(pdf_artifact_lookup(report_id, variant_key)).first()
+        if row is None:
+            return None
+        return {"blob_path": row.blob_path, "sha256": row.sha256_hash, "size_bytes": row.size_bytes}
@@ -1,51 +1,196 @@
 import os
 import uuid
+import threading
 import httpx
-from typing import Optional, Dict, Any, List
-from src.domain.ports import ReportRepositoryPort
+from typing import Optional, Dict, Any, List, Tuple
+from src.domain.ports import ReportRepositoryPort, report_key, report_version
+
+try:
+    import h2  # noqa: F401  (extra httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+REPORT_COLUMNS = "report_id,session_id,subject_id,content_json,kind,app_session_id,case_title,generated_at"
+VERSION_COLUMNS = "report_id,generated_at"
+
 
 class SupabaseReportRepository(ReportRepositoryPort):
-    def __init__(self, supabase_url: str, supabase_key: str):
+    """
+    Lee informes desde la vista vw_reports vía PostgREST.
+    Mantiene un cliente httpx de larga vida (sync y async) con keep-alive y HTTP/2,
+    así cada lectura reutiliza la conexión TLS en lugar de abrir una nueva.
+    """
+
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 timeout_seconds: float = 10.0,
+                 connect_timeout_seconds: float = 5.0,
+                 max_connections: int = 50,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry_seconds: float = 30.0,
+                 http2: bool = True):
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
-
-    def get_report_content(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
         # 1. Limpiamos la URL para evitar el doble slash //
-        base_url = self.supabase_url.rstrip('/')
-        endpoint = f"{base_url}/rest/v1/vw_reports"
-        
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
+        self.endpoint = f"{supabase_url.rstrip('/')}/rest/v1/vw_reports"
+        self.headers = {
+            "apikey": supabase_key,
+            "Authorization": f"Bearer {supabase_key}",
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
-        
+        if http2 and not HTTP2_AVAILABLE:
+            print("⚠️ Paquete 'h2' no instalado: el cliente de Supabase usará HTTP/1.1 (pip install 'httpx[http2]').")
+        self._client_options = {
+            "headers": self.headers,
+            "http2": http2 and HTTP2_AVAILABLE,
+            "timeout": httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds),
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry_seconds,
+            ),
+        }
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                self._client = httpx.Client(**self._client_options)
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Se crea en el primer uso, dentro del event loop que lo va a usar
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(**self._client_options)
+        return self._async_client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def get_report_content(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.client.get(self.endpoint, params=self._report_params(session_id, subject_id))
+            return self._first_row(response)
+        except Exception as e:
+            print(f"Error técnico en Supabase Repo: {e}")
+        return None
+
+    async def get_report_content_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self.async_client.get(self.endpoint, params=self._report_params(session_id, subject_id))
+            return self._first_row(response)
+        except Exception as e:
+            print(f"Error técnico en Supabase Repo: {e}")
+        return None
+
+    def get_report_version(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        """Sondeo liviano para la caché: solo report_id y generated_at, sin content_json."""
+        try:
+            response = self.client.get(self.endpoint, params=self._report_params(session_id, subject_id, VERSION_COLUMNS))
+            row = self._first_row(response)
+            return report_version(row) if row else None
+        except Exception as e:
+            print(f"Error técnico en Supabase Repo: {e}")
+        return None
+
+    async def get_report_version_async(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID]) -> Optional[Tuple[str, Optional[str]]]:
+        try:
+            response = await self.async_client.get(self.endpoint, params=self._report_params(session_id, subject_id, VERSION_COLUMNS))
+            row = self._first_row(response)
+            return report_version(row) if row else None
+        except Exception as e:
+            print(f"Error técnico en Supabase Repo: {e}")
+        return None
+
+    def get_reports_batch(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        """Todos los informes pedidos en UNA request PostgREST (filtros in.(...))."""
+        if not keys:
+            return {}
+        try:
+            response = self.client.get(self.endpoint, params=self._batch_params(keys))
+            return self._index_rows(response, keys)
+        except Exception as e:
+            print(f"Error técnico en Supabase Repo (batch): {e}")
+        return {}
+
+    async def get_reports_batch_async(self, keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        if not keys:
+            return {}
+        try:
+            response = await self.async_client.get(self.endpoint, params=self._batch_params(keys))
+            return self._index_rows(response, keys)
+        except Exception as e:
+            print(f"Error técnico en Supabase Repo (batch): {e}")
+        return {}
+
+    @staticmethod
+    def _report_params(session_id: uuid.UUID, subject_id: Optional[uuid.UUID], columns: str = REPORT_COLUMNS) -> Dict[str, str]:
         # 2. SELECT SIMPLE (Porque la vista ya tiene las columnas unidas)
         params = {
             "session_id": f"eq.{session_id}",
-            "select": "report_id,content_json,kind,app_session_id,case_title"
+            "select": columns
         }
-
         if subject_id:
             params["subject_id"] = f"eq.{subject_id}"
         else:
             params["subject_id"] = "is.null"
+        return params
 
-        with httpx.Client() as client:
-            try:
-                response = client.get(endpoint, headers=headers, params=params)
-                # Si esto da error, lo imprimimos para saber EXACTO qué dice Supabase
-                if response.status_code != 200:
-                    print(f"Error de Supabase ({response.status_code}): {response.text}")
-                
-                response.raise_for_status()
-                data = response.json()
-                if data and len(data) > 0:
-                    return data[0]
-            except Exception as e:
-                print(f"Error técnico en Supabase Repo: {e}")
-        return None
+    @staticmethod
+    def _batch_params(keys: List[Tuple[uuid.UUID, Optional[uuid.UUID]]]) -> Dict[str, str]:
+        session_ids = sorted({str(session_id) for session_id, _ in keys})
+        subject_ids = sorted({str(subject_id) for _, subject_id in keys if subject_id})
+        want_group = any(not subject_id for _, subject_id in keys)
+
+        params = {
+            "session_id": f"in.({','.join(session_ids)})",
+            "select": REPORT_COLUMNS
+        }
+        # El informe grupal tiene subject_id NULL, que no entra en un filtro in.(...)
+        subject_filters = []
+        if subject_ids:
+            subject_filters.append(f"subject_id.in.({','.join(subject_ids)})")
+        if want_group:
+            subject_filters.append("subject_id.is.null")
+        params["or"] = f"({','.join(subject_filters)})"
+        return params
+
+    def _first_row(self, response: httpx.Response) -> Optional[Dict[str, Any]]:
+        data = self._json_rows(response)
+        return data[0] if data else None
+
+    def _index_rows(self, response: httpx.Response, keys) -> Dict[Tuple[str, Optional[str]], Dict[str, Any]]:
+        # Los filtros in.(...) son un producto cruzado: se devuelven solo los pares pedidos
+        wanted = {report_key(session_id, subject_id) for session_id, subject_id in keys}
+        reports = {}
+        for row in self._json_rows(response):
+            key = report_key(row.get("session_id"), row.get("subject_id"))
+            if key in wanted:
+                reports[key] = row
+        return reports
+
+    @staticmethod
+    def _json_rows(response: httpx.Response) -> List[Dict[str, Any]]:
+        # Si esto da error, lo imprimimos para saber EXACTO qué dice Supabase
+        if response.status_code != 200:
+            print(f"Error de Supabase ({response.status_code}): {response.text}")
+        response.raise_for_status()
+        return response.json() or []
 
     # --- MÉTODOS OBLIGATORIOS PARA CUMPLIR EL PORT (Mantenlos así) ---
 
@@ -58,13 +203,23 @@ class SupabaseReportRepository(ReportRepositoryPort):
     def save_staging_data(self, session_id: uuid.UUID, source: str, payload: Dict[str, Any]):
         pass
 
+    def save_staging_batch(self, session_id: uuid.UUID, records: List[Tuple[str, Dict[str, Any]]]) -> int:
+        return 0
+
     def save_cleansed_event(self, event_data: Dict[str, Any]):
         pass
 
+    def promote_staging_to_cleansed(self, session_id: uuid.UUID) -> int:
+        return 0
+
     def get_cleansed_events(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
         return []
 
-    def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str):
+    def get_session_events_indexed(self, session_id: uuid.UUID) -> Tuple[Dict[uuid.UUID, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        return {}, []
+
+    def save_pdf_artifact(self, report_id: uuid.UUID, blob_path: str, sha256_hash: Optional[str] = None,
+                          size_bytes: Optional[int] = None, variant_key: Optional[str] = None):
         pass
 
     def get_report_by_hash(self, session_id: uuid.UUID, subject_id: Optional[uuid.UUID], kind: str, data_hash: str):
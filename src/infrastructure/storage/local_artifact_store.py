@@ -0,0 +1,108 @@
+import os
+import re
+import hmac
+import time
+import uuid
+import hashlib
+from urllib.parse import urlencode
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from src.domain.ports import ArtifactStoragePort
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def hash_file(path: str, chunk_size: int = 64 * 1024) -> Tuple[str, int]:
+    """(sha256, tamaño) de un archivo leído por bloques."""
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+class LocalArtifactStore(ArtifactStoragePort):
+    """
+    Blobs on the local filesystem under `root/<2 hex>/<sha256>.pdf`.
+    Bytes go to a temp file in the same directory tree while they are hashed
+    and are renamed into place only if that content is not stored yet.
+    Signed URLs point at `url_prefix` (GET /files/{sha256} in the API) and carry
+    an HMAC-SHA256 of (hash, expiry, filename) with `signing_key`.
+    """
+
+    def __init__(self,
+                 root: str = os.path.join("artifacts", "blobs"),
+                 signing_key: Optional[str] = None,
+                 url_prefix: str = "/files"):
+        self.root = root
+        self.signing_key = signing_key.encode("utf-8") if signing_key else None
+        self.url_prefix = url_prefix.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> str:
+        if not SHA256_RE.match(sha256):
+            raise ValueError(f"Hash sha256 inválido: {sha256}")
+        return os.path.join(self.root, sha256[:2], f"{sha256}.pdf")
+
+    def put_stream(self, chunks: Iterable[bytes]) -> Dict[str, Any]:
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.root, f".{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            sha256 = hasher.hexdigest()
+            path = self.blob_path(sha256)
+            created = not os.path.exists(path)
+            if created:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Dos escrituras simultáneas del mismo contenido dejan bytes idénticos
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return {"sha256": sha256, "size_bytes": size, "blob_path": path, "created": created}
+
+    def iter_blob(self, sha256: str, chunk_size: int = 64 * 1024) -> Optional[Iterator[bytes]]:
+        path = self.local_path(sha256)
+        if path is None:
+            return None
+
+        def chunks():
+            with open(path, "rb") as f:
+                yield from iter(lambda: f.read(chunk_size), b"")
+        return chunks()
+
+    def exists(self, sha256: str) -> bool:
+        return self.local_path(sha256) is not None
+
+    def signed_url(self, sha256: str, expires_in: int, filename: Optional[str] = None) -> str:
+        expires = int(time.time()) + expires_in
+        params = {"expires": expires, "signature": self._signature(sha256, expires, filename or "")}
+        if filename:
+            params["filename"] = filename
+        return f"{self.url_prefix}/{sha256}?{urlencode(params)}"
+
+    def verify(self, sha256: str, expires: int, signature: str, filename: Optional[str] = None) -> bool:
+        """True if the URL was signed by this store and has not expired."""
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(sha256, expires, filename or ""), signature)
+
+    def _signature(self, sha256: str, expires: int, filename: str) -> str:
+        if self.signing_key is None:
+            raise RuntimeError("LocalArtifactStore sin signing_key: no puede firmar URLs")
+        message = f"{sha256}\n{expires}\n{filename}".encode("utf-8")
+        return hmac.new(self.signing_key, message, hashlib.sha256).hexdigest()
+
+    def local_path(self, sha256: str) -> Optional[str]:
+        """Path of a stored blob (for FileResponse), or None."""
+        try:
+            path = self.blob_path(sha256)
+        except ValueError:
+            return None
+        return path if os.path.exists(path) else None
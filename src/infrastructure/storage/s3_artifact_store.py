@@ -0,0 +1,101 @@
+import hashlib
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, Optional
+from src.domain.ports import ArtifactStoragePort
+from src.infrastructure.storage.local_artifact_store import SHA256_RE
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # dependencia opcional: solo hace falta con ARTIFACT_STORAGE_BACKEND=s3
+    boto3 = None
+
+
+class S3ArtifactStore(ArtifactStoragePort):
+    """
+    Content-addressed blobs in an S3-compatible bucket (AWS S3, MinIO) under
+    `prefix<sha256>.pdf`. The bytes are hashed while they are spooled to a
+    temp file, and uploaded only if the key does not exist yet.
+    Signed URLs are S3 presigned GETs, so downloads never touch the API.
+    `public_endpoint_url` signs for the host clients reach (e.g. MinIO behind
+    docker-compose is http://minio:9000 inside and http://localhost:9000 outside).
+    Credentials come from the standard AWS environment variables or profile.
+    """
+
+    def __init__(self,
+                 bucket: str,
+                 prefix: str = "pdf/",
+                 endpoint_url: Optional[str] = None,
+                 public_endpoint_url: Optional[str] = None,
+                 region_name: Optional[str] = None,
+                 spool_max_bytes: int = 8 * 1024 * 1024):
+        if boto3 is None:
+            raise RuntimeError("ARTIFACT_STORAGE_BACKEND=s3 requiere boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.spool_max_bytes = spool_max_bytes
+        # path-style: MinIO y la mayoría de los S3 compatibles no resuelven buckets como subdominio
+        config = Config(signature_version="s3v4", s3={"addressing_style": "path"})
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name, config=config)
+        self.signing_client = self.client
+        if public_endpoint_url:
+            # Firmar no hace peticiones: este cliente solo arma URLs con el host público
+            self.signing_client = boto3.client("s3", endpoint_url=public_endpoint_url, region_name=region_name, config=config)
+
+    def key_for(self, sha256: str) -> str:
+        if not SHA256_RE.match(sha256):
+            raise ValueError(f"Hash sha256 inválido: {sha256}")
+        return f"{self.prefix}{sha256}.pdf"
+
+    def put_stream(self, chunks: Iterable[bytes]) -> Dict[str, Any]:
+        hasher = hashlib.sha256()
+        size = 0
+        # La clave depende del contenido: hay que terminar de hashear antes de subir
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes) as spool:
+            for chunk in chunks:
+                hasher.update(chunk)
+                size += len(chunk)
+                spool.write(chunk)
+            sha256 = hasher.hexdigest()
+            key = self.key_for(sha256)
+            created = not self._head(key)
+            if created:
+                spool.seek(0)
+                self.client.upload_fileobj(
+                    spool, self.bucket, key,
+                    ExtraArgs={"ContentType": "application/pdf", "Metadata": {"sha256": sha256}}
+                )
+        return {"sha256": sha256, "size_bytes": size, "blob_path": f"s3://{self.bucket}/{key}", "created": created}
+
+    def iter_blob(self, sha256: str, chunk_size: int = 64 * 1024) -> Optional[Iterator[bytes]]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.key_for(sha256))
+        except ValueError:
+            return None
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return response["Body"].iter_chunks(chunk_size)
+
+    def exists(self, sha256: str) -> bool:
+        try:
+            return self._head(self.key_for(sha256))
+        except ValueError:
+            return False
+
+    def signed_url(self, sha256: str, expires_in: int, filename: Optional[str] = None) -> str:
+        params = {"Bucket": self.bucket, "Key": self.key_for(sha256), "ResponseContentType": "application/pdf"}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        return self.signing_client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+    def _head(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
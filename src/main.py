@@ -1,6 +1,5 @@
 import os
 import sys
-import json
 from dotenv import load_dotenv
 # 1.Route Configuration for Hexagonal Architecture
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,11 +9,21 @@ if project_root not in sys.path:
 # Import of Adapters (Infrastructure)
 from src.infrastructure.persistence.sqlalchemy_adapter import SQLAlchemyAdapter
 from src.infrastructure.openai.openai_adapter import OpenAIAdapter
+from src.infrastructure.openai.llm_scheduler import LlmScheduler, RateLimitedAIAdapter
 from src.infrastructure.pdf.reportlab_adapter import ReportLabAdapter
+from src.infrastructure.pdf.cached_pdf_adapter import CachedPdfAdapter
+from src.infrastructure.storage.local_artifact_store import LocalArtifactStore
+from src.infrastructure.storage.s3_artifact_store import S3ArtifactStore
 # Importing the Use Case (Application)
 from src.application.orchestrator_use_case import OrchestratorUseCase
+from src.application.services.session_file_reader import SessionFileReader
 # Configuration Import
-from config import API_KEY, MODELO_INDIVIDUAL, MODELO_GRUPAL, SYSTEM_PROMPT, GROUP_SYSTEM_PROMPT
+from config import API_KEY, MODELO_INDIVIDUAL, MODELO_GRUPAL, SYSTEM_PROMPT, GROUP_SYSTEM_PROMPT, RENDER_CACHE_DIR, RENDER_CACHE_MAX_MB, DB_STREAM_BATCH_SIZE
+from config import (
+    OPENAI_BASE_URL, LLM_SCHEDULER_ENABLED, LLM_RPM_INDIVIDUAL, LLM_TPM_INDIVIDUAL, LLM_RPM_GRUPAL, LLM_TPM_GRUPAL,
+    LLM_EXPECTED_OUTPUT_TOKENS, LLM_MAX_ATTEMPTS, ARTIFACT_STORAGE_BACKEND, ARTIFACT_STORE_DIR,
+    ARTIFACT_S3_BUCKET, ARTIFACT_S3_PREFIX, ARTIFACT_S3_ENDPOINT_URL, ARTIFACT_S3_REGION
+)
 def run_pipeline():
     """
     Ingesta -> Auditoría -> Refinería -> OpenAI -> Storage
@@ -30,12 +39,27 @@ def run_pipeline():
 
     try:
         # 2.Adapter Initialization
-        db_adapter = SQLAlchemyAdapter(db_url)
-        ai_adapter = OpenAIAdapter(api_key=API_KEY) 
-        pdf_adapter = ReportLabAdapter()
+        db_adapter = SQLAlchemyAdapter(db_url, stream_batch_size=DB_STREAM_BATCH_SIZE)
+        ai_adapter = OpenAIAdapter(api_key=API_KEY, base_url=OPENAI_BASE_URL, max_retries=0 if LLM_SCHEDULER_ENABLED else 2)
+        if LLM_SCHEDULER_ENABLED:
+            # Admisión por RPM/TPM: las llamadas en paralelo del orquestador no disparan ráfagas de 429
+            scheduler = LlmScheduler(
+                {MODELO_INDIVIDUAL: (LLM_RPM_INDIVIDUAL, LLM_TPM_INDIVIDUAL), MODELO_GRUPAL: (LLM_RPM_GRUPAL, LLM_TPM_GRUPAL)},
+                expected_output_tokens=LLM_EXPECTED_OUTPUT_TOKENS,
+                max_attempts=LLM_MAX_ATTEMPTS
+            )
+            ai_adapter = RateLimitedAIAdapter(ai_adapter, scheduler, priority="batch")
+        # Caché de render: si el Markdown no cambió, el PDF no se vuelve a generar
+        pdf_adapter = CachedPdfAdapter(ReportLabAdapter(), cache_dir=os.path.join(RENDER_CACHE_DIR, "reportlab"), max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024)
+
+        # PDF guardados una sola vez por sha256 (mismo almacén que sirve /generate-pdf-url)
+        if ARTIFACT_STORAGE_BACKEND == "s3":
+            artifact_store = S3ArtifactStore(ARTIFACT_S3_BUCKET, prefix=ARTIFACT_S3_PREFIX, endpoint_url=ARTIFACT_S3_ENDPOINT_URL, region_name=ARTIFACT_S3_REGION)
+        else:
+            artifact_store = LocalArtifactStore(ARTIFACT_STORE_DIR)
 
         # 3. Use Case Initialization
-        orchestrator = OrchestratorUseCase(db_adapter, ai_adapter, pdf_adapter)
+        orchestrator = OrchestratorUseCase(db_adapter, ai_adapter, pdf_adapter, artifact_store=artifact_store)
 
         # 4.Input File Selection
         data_dir = "Data"
@@ -53,10 +77,8 @@ def run_pipeline():
         json_path = os.path.join(data_dir, selected_file)
         # 5. PROCESS EXECUTION N+1
         print(f"\n Starting processing of: {selected_file}")  
-        # We read the JSON to identify the session.
-        with open(json_path, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
-            app_session_id = raw_data["json"]["session_meta"]["session_id"]
+        # We read only session_meta to identify the session (the rest of the export is not loaded).
+        app_session_id = SessionFileReader(json_path).read_session_meta()["session_id"]
         results = orchestrator.run_full_session_process(app_session_id, json_path)
 
         # 6. Execution Summary
@@ -65,9 +87,11 @@ def run_pipeline():
         print("*"*50)
         print(f"Individual Reports: {len(results) - 1}")
         print(f"Group Reports: 1")
-        print(f"Location: Folder 'artifacts/'")
+        print(f"Location: {'s3://' + ARTIFACT_S3_BUCKET if ARTIFACT_STORAGE_BACKEND == 's3' else ARTIFACT_STORE_DIR} (por sha256)")
+        cache_stats = pdf_adapter.stats()
+        print(f"Render cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
         for r in results:
-            print(f"{r['name']}: {r['path']}")
+            print(f"{r['name']}: {r['path']} (sha256 {r['sha256'][:12]})")
         
         print("\n" + "="*60 + "\n")
     except Exception as e:
@@ -1,28 +1,66 @@
 import os
 import json
 import uuid
+import time
+import secrets
 import uvicorn
 from fastapi import FastAPI, HTTPException, Depends, Request, status
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader # <--- NUEVO
-from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 from io import BytesIO
 from dotenv import load_dotenv
 
 # Imports de tu arquitectura
 from src.infrastructure.persistence.sqlalchemy_adapter import SQLAlchemyAdapter
+from src.infrastructure.persistence.async_sqlalchemy_adapter import AsyncSQLAlchemyAdapter
 from src.infrastructure.persistence.supabase_report_repository import SupabaseReportRepository
+from src.infrastructure.persistence.sql_report_repository import SqlReportRepository
+from src.infrastructure.persistence.advisory_lock import PostgresAdvisoryLock
+from src.infrastructure.storage.local_artifact_store import LocalArtifactStore
+from src.infrastructure.storage.s3_artifact_store import S3ArtifactStore
 from src.infrastructure.openai.openai_adapter import OpenAIAdapter
+from src.infrastructure.openai.llm_scheduler import LlmScheduler, RateLimitedAIAdapter
 from src.infrastructure.pdf.reportlab_adapter import ReportLabAdapter
 from src.infrastructure.pdf.xhtml2pdf_adapter import Xhtml2PdfAdapter
+from src.infrastructure.pdf.process_pool_adapter import ProcessPoolPdfAdapter
+from src.infrastructure.pdf.cached_pdf_adapter import CachedPdfAdapter
+from src.infrastructure.cache.llm_response_cache import DiskLLMResponseCache
+from src.infrastructure.cache.cached_report_repository import CachedReportRepository
 from src.application.orchestrator_use_case import OrchestratorUseCase
 from src.application.generate_pdf_use_case import GeneratePdfUseCase
+from src.application.session_dossier_use_case import SessionDossierUseCase
 from src.application.services.ingestor import TelemetryIngestor
 from src.application.services.refinery import DataRefinery
+from src.application.services.pdf_job_manager import PdfJobManager, JobQueueFullError
+from src.application.services.single_flight import SingleFlight
+from src.infrastructure.api.zip_stream import stream_zip
 from src.infrastructure.api.schemas import UserUpsert, SessionUpsert, SubjectUpsert, ResponseBase
 from src.infrastructure.clients.case_service_client import CaseServiceClient
+from config import (
+    PDF_JOB_WORKERS, PDF_JOB_MAX_PENDING, PDF_JOB_TTL_SECONDS,
+    PDF_RENDER_POOL_SIZE, PDF_RENDER_TIMEOUT_SECONDS, PDF_RENDER_MAX_JOBS_PER_WORKER,
+    RENDER_CACHE_DIR, RENDER_CACHE_MAX_MB, RENDER_CACHE_MEMORY_MB,
+    LLM_CACHE_ENABLED, LLM_CACHE_DIR, LLM_CACHE_TTL_SECONDS,
+    PDF_PERSIST_TO_DISK, DB_STREAM_BATCH_SIZE,
+    ASYNC_DB_POOL_SIZE, ASYNC_DB_MAX_OVERFLOW, ASYNC_DB_POOL_TIMEOUT, ASYNC_DB_STATEMENT_CACHE_SIZE,
+    SUPABASE_HTTP_TIMEOUT_SECONDS, SUPABASE_HTTP_CONNECT_TIMEOUT_SECONDS,
+    SUPABASE_HTTP_MAX_CONNECTIONS, SUPABASE_HTTP_MAX_KEEPALIVE, SUPABASE_HTTP2,
+    REPORT_REPOSITORY_BACKEND,
+    REPORT_CACHE_ENABLED, REPORT_CACHE_MAX_ENTRIES, REPORT_CACHE_MAX_MB, REPORT_CACHE_FRESH_SECONDS,
+    DOSSIER_MAX_CONCURRENCY,
+    PDF_REPORT_MODE,
+    MODELO_INDIVIDUAL, MODELO_GRUPAL, OPENAI_BASE_URL,
+    LLM_SCHEDULER_ENABLED, LLM_RPM_INDIVIDUAL, LLM_TPM_INDIVIDUAL, LLM_RPM_GRUPAL, LLM_TPM_GRUPAL,
+    LLM_EXPECTED_OUTPUT_TOKENS, LLM_MAX_ATTEMPTS,
+    SINGLE_FLIGHT_BACKEND, SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS, SINGLE_FLIGHT_LOCK_POOL_SIZE, SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS,
+    ARTIFACT_STORAGE_BACKEND, ARTIFACT_STORE_DIR, ARTIFACT_URL_TTL_SECONDS, ARTIFACT_URL_SIGNING_KEY, ARTIFACT_PUBLIC_BASE_URL,
+    ARTIFACT_S3_BUCKET, ARTIFACT_S3_PREFIX, ARTIFACT_S3_ENDPOINT_URL, ARTIFACT_S3_PUBLIC_ENDPOINT_URL, ARTIFACT_S3_REGION
+)
 
 load_dotenv()
 
@@ -58,58 +96,217 @@ app.add_middleware(
 
 # --- Adaptadores ---
 db_url = os.getenv("DATABASE_URL")
-db_adapter = SQLAlchemyAdapter(db_url)
-ai_adapter = OpenAIAdapter(api_key=os.getenv("OPENAI_API_KEY"))
+db_adapter = SQLAlchemyAdapter(db_url, stream_batch_size=DB_STREAM_BATCH_SIZE)
+# Los handlers async usan el adaptador asyncpg para no bloquear el event loop
+async_db_adapter = AsyncSQLAlchemyAdapter(
+    db_url,
+    pool_size=ASYNC_DB_POOL_SIZE,
+    max_overflow=ASYNC_DB_MAX_OVERFLOW,
+    pool_timeout=ASYNC_DB_POOL_TIMEOUT,
+    statement_cache_size=ASYNC_DB_STATEMENT_CACHE_SIZE,
+    stream_batch_size=DB_STREAM_BATCH_SIZE
+)
+# Con planificador, los 429 se reintentan ahí (respetando Retry-After) y no en el cliente
+ai_adapter = OpenAIAdapter(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    base_url=OPENAI_BASE_URL,
+    max_retries=0 if LLM_SCHEDULER_ENABLED else 2
+)
+llm_scheduler = None
+interactive_ai = batch_ai = ai_adapter
+if LLM_SCHEDULER_ENABLED:
+    # Un solo planificador por proceso: /generate-pdf (interactivo) pasa antes que el orquestador (batch)
+    llm_scheduler = LlmScheduler(
+        {MODELO_INDIVIDUAL: (LLM_RPM_INDIVIDUAL, LLM_TPM_INDIVIDUAL), MODELO_GRUPAL: (LLM_RPM_GRUPAL, LLM_TPM_GRUPAL)},
+        expected_output_tokens=LLM_EXPECTED_OUTPUT_TOKENS,
+        max_attempts=LLM_MAX_ATTEMPTS
+    )
+    interactive_ai = RateLimitedAIAdapter(ai_adapter, llm_scheduler, priority="interactive")
+    batch_ai = RateLimitedAIAdapter(ai_adapter, llm_scheduler, priority="batch")
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_KEY")
-report_repo = SupabaseReportRepository(supabase_url, supabase_key)
+# Lectura de informes: "sql" consulta vw_reports sobre el engine propio, "supabase" vía PostgREST
+if REPORT_REPOSITORY_BACKEND == "sql":
+    report_repo = SqlReportRepository(db_adapter.engine, async_engine=async_db_adapter.engine)
+else:
+    report_repo = SupabaseReportRepository(
+        supabase_url, supabase_key,
+        timeout_seconds=SUPABASE_HTTP_TIMEOUT_SECONDS,
+        connect_timeout_seconds=SUPABASE_HTTP_CONNECT_TIMEOUT_SECONDS,
+        max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE,
+        http2=SUPABASE_HTTP2
+    )
+source_report_repo = report_repo
+
+# Caché LRU de lectura: /generate-pdf-url y /generate-pdf piden los mismos IDs con segundos de diferencia
+if REPORT_CACHE_ENABLED:
+    report_repo = CachedReportRepository(
+        source_report_repo,
+        max_entries=REPORT_CACHE_MAX_ENTRIES,
+        max_bytes=REPORT_CACHE_MAX_MB * 1024 * 1024,
+        fresh_seconds=REPORT_CACHE_FRESH_SECONDS
+    )
 
 # PDF Adapters
-pdf_adapter = ReportLabAdapter()
-xhtml2pdf_adapter = Xhtml2PdfAdapter()
+pdf_adapter = CachedPdfAdapter(ReportLabAdapter(), cache_dir=os.path.join(RENDER_CACHE_DIR, "reportlab"), max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024)
+if PDF_RENDER_POOL_SIZE > 0:
+    # Render en procesos precalentados: escala con los núcleos de la máquina
+    xhtml2pdf_adapter = ProcessPoolPdfAdapter(
+        engine="xhtml2pdf",
+        pool_size=PDF_RENDER_POOL_SIZE,
+        timeout=PDF_RENDER_TIMEOUT_SECONDS,
+        max_jobs_per_worker=PDF_RENDER_MAX_JOBS_PER_WORKER
+    )
+else:
+    xhtml2pdf_adapter = Xhtml2PdfAdapter(persist_to_disk=PDF_PERSIST_TO_DISK)
+xhtml2pdf_adapter = CachedPdfAdapter(
+    xhtml2pdf_adapter,
+    cache_dir=os.path.join(RENDER_CACHE_DIR, "xhtml2pdf"),
+    max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024,
+    memory_max_bytes=RENDER_CACHE_MEMORY_MB * 1024 * 1024,
+    persist_to_disk=PDF_PERSIST_TO_DISK
+)
+
+# Caché persistente de respuestas LLM (descargas repetidas sin llamar a OpenAI)
+llm_cache = DiskLLMResponseCache(LLM_CACHE_DIR, ttl_seconds=LLM_CACHE_TTL_SECONDS) if LLM_CACHE_ENABLED else None
+
+# Generaciones idénticas en curso se comparten (doble clic, reintentos); con varios workers, vía pg_advisory_lock
+distributed_lock = None
+if SINGLE_FLIGHT_BACKEND == "postgres":
+    # Engine propio: los locks retenidos durante la generación no consumen el pool de db_adapter
+    distributed_lock = PostgresAdvisoryLock(db_url, pool_size=SINGLE_FLIGHT_LOCK_POOL_SIZE, timeout_seconds=SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS)
+single_flight = SingleFlight(distributed_lock, wait_timeout=SINGLE_FLIGHT_WAIT_TIMEOUT_SECONDS)
+
+# PDF guardados por sha256 de sus bytes; /generate-pdf-url entrega URLs firmadas a estos blobs
+if ARTIFACT_STORAGE_BACKEND == "s3":
+    artifact_store = S3ArtifactStore(
+        ARTIFACT_S3_BUCKET,
+        prefix=ARTIFACT_S3_PREFIX,
+        endpoint_url=ARTIFACT_S3_ENDPOINT_URL,
+        public_endpoint_url=ARTIFACT_S3_PUBLIC_ENDPOINT_URL,
+        region_name=ARTIFACT_S3_REGION
+    )
+else:
+    # /files solo confía en el HMAC: la clave no puede derivarse de API_KEY_SECRET (tiene un valor por defecto público)
+    artifact_signing_key = ARTIFACT_URL_SIGNING_KEY
+    if not artifact_signing_key:
+        artifact_signing_key = secrets.token_hex(32)
+        print("⚠️ ARTIFACT_URL_SIGNING_KEY no definida: se usa una clave aleatoria de este proceso. "
+              "Las URLs firmadas no valen en otros workers ni tras un reinicio; defínela en producción.")
+    artifact_store = LocalArtifactStore(
+        ARTIFACT_STORE_DIR,
+        signing_key=artifact_signing_key,
+        url_prefix=f"{ARTIFACT_PUBLIC_BASE_URL}/files"
+    )
 
 # Use Cases
-orchestrator = OrchestratorUseCase(db_adapter, ai_adapter, pdf_adapter)
-generate_pdf_uc = GeneratePdfUseCase(report_repo, ai_adapter, xhtml2pdf_adapter)
+orchestrator = OrchestratorUseCase(db_adapter, batch_ai, pdf_adapter, single_flight=single_flight, artifact_store=artifact_store)
+generate_pdf_uc = GeneratePdfUseCase(
+    report_repo, interactive_ai, xhtml2pdf_adapter,
+    llm_cache=llm_cache, default_mode=PDF_REPORT_MODE, single_flight=single_flight,
+    artifact_store=artifact_store, artifact_repo=db_adapter
+)
+
+dossier_uc = SessionDossierUseCase(async_db_adapter, report_repo, generate_pdf_uc, max_concurrency=DOSSIER_MAX_CONCURRENCY)
+
+# Trabajos asíncronos de PDF (pool acotado fuera del event loop)
+pdf_jobs = PdfJobManager(
+    generate_pdf_uc.execute,
+    max_workers=PDF_JOB_WORKERS,
+    max_pending=PDF_JOB_MAX_PENDING,
+    ttl_seconds=PDF_JOB_TTL_SECONDS
+)
+
+@app.on_event("startup")
+def start_pdf_render_pool():
+    # Los workers arrancan aquí y no al importar: con forkserver cada hijo reimporta este módulo
+    if isinstance(xhtml2pdf_adapter.inner, ProcessPoolPdfAdapter):
+        xhtml2pdf_adapter.inner.start()
+
+@app.on_event("shutdown")
+def shutdown_pdf_jobs():
+    pdf_jobs.shutdown()
+    if isinstance(xhtml2pdf_adapter.inner, ProcessPoolPdfAdapter):
+        xhtml2pdf_adapter.inner.shutdown()
+
+@app.on_event("shutdown")
+async def shutdown_db_pools():
+    await async_db_adapter.dispose()
+    if isinstance(source_report_repo, SupabaseReportRepository):
+        source_report_repo.close()
+        await source_report_repo.aclose()
 
 # --- MODELOS DE REQUEST/RESPONSE ---
 class GeneratePDFRequest(BaseModel):
     session_id: str
     subject_id: Optional[str] = None
+    # None usa PDF_REPORT_MODE; "narrative" pide la redacción al LLM
+    mode: Optional[Literal["template", "narrative"]] = None
 
 class GeneratePDFResponse(BaseModel):
     success: bool
     message: str
     report_id: str | None = None
     download_url: str | None = None
+    sha256: str | None = None
+    size_bytes: int | None = None
+    expires_at: str | None = None
+
+class PdfJobResponse(BaseModel):
+    job_id: str
+    status: str
+    session_id: str
+    subject_id: str | None = None
+    created_at: str
+    started_at: str | None = None
+    finished_at: str | None = None
+    timings: dict
+    error: str | None = None
+    status_url: str
+    download_url: str | None = None
+
+def _parse_report_ids(request: GeneratePDFRequest):
+    """Convierte los IDs del request; subject_id nulo o 'null' significa reporte grupal."""
+    session_uuid = uuid.UUID(request.session_id)
+    subject_uuid = None
+    if request.subject_id and request.subject_id.lower() != "null":
+        subject_uuid = uuid.UUID(request.subject_id)
+    return session_uuid, subject_uuid
+
+def _job_response(job: dict) -> PdfJobResponse:
+    download_url = f"/jobs/{job['job_id']}/download" if job["status"] == "done" else None
+    return PdfJobResponse(
+        **{k: v for k, v in job.items() if k in PdfJobResponse.model_fields},
+        status_url=f"/jobs/{job['job_id']}",
+        download_url=download_url
+    )
 
 # --- ENDPOINTS PROTEGIDOS (Requieren X-API-KEY) ---
 
 @app.post("/generate-pdf", tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
 async def generate_pdf(request: GeneratePDFRequest):
     try:
-        # 1. Convertir session_id (este siempre debe estar)
-        session_uuid = uuid.UUID(request.session_id)
+        # 1. Convertir IDs (subject_id queda en None si es grupal)
+        session_uuid, subject_uuid = _parse_report_ids(request)
         
-        # 2. Solo convertir subject_id si NO es nulo
-        # Si es nulo o vacío, lo dejamos como None
-        subject_uuid = None
-        if request.subject_id and request.subject_id.lower() != "null":
-            subject_uuid = uuid.UUID(request.subject_id)
+        # 2. Ejecutar Caso de Uso en el threadpool; el PDF se renderiza en memoria
+        filename, pdf_bytes = await run_in_threadpool(generate_pdf_uc.execute_bytes, session_uuid, subject_uuid, request.mode)
         
-        # 3. Ejecutar Caso de Uso (ahora recibirá None si es grupal)
-        pdf_path = generate_pdf_uc.execute(session_uuid, subject_uuid)
-        
-        if not pdf_path or not os.path.exists(pdf_path):
+        if not pdf_bytes:
             raise HTTPException(status_code=500, detail="El archivo PDF no pudo ser generado")
-            
-        filename = os.path.basename(pdf_path)
         
-        return FileResponse(
-            path=pdf_path, 
-            filename=filename,
-            media_type="application/pdf"
+        # 3. Streaming directo del buffer, sin pasar por artifacts/
+        return StreamingResponse(
+            xhtml2pdf_adapter.iter_chunks(pdf_bytes),
+            media_type="application/pdf",
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "Content-Length": str(len(pdf_bytes)),
+            }
         )
+    except HTTPException:
+        raise
     except ValueError as e:
         # Error si el formato del UUID es inválido
         raise HTTPException(status_code=400, detail=f"Formato de ID inválido: {str(e)}")
@@ -117,18 +314,154 @@ async def generate_pdf(request: GeneratePDFRequest):
         print(f"Error en generate_pdf: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/generate-pdf/stream", tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
+async def generate_pdf_stream(request: GeneratePDFRequest):
+    """
+    Vista previa progresiva (Server-Sent Events): envía el Markdown a medida que
+    el LLM lo escribe y, al terminar, renderiza el PDF. En modo plantilla llega en un solo `delta`.
+    Eventos: `delta` {text}, `done` {filename, size_bytes, cached, mode, download_url}, `error` {detail}.
+    El PDF queda en caché: POST /generate-pdf con los mismos IDs lo descarga sin volver a llamar al LLM.
+    """
+    try:
+        session_uuid, subject_uuid = _parse_report_ids(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Formato de ID inválido: {str(e)}")
+
+    def events():
+        # Generador síncrono: Starlette lo itera en el threadpool, fuera del event loop
+        try:
+            for kind, payload in generate_pdf_uc.execute_stream(session_uuid, subject_uuid, request.mode):
+                if kind == "delta":
+                    yield _sse("delta", {"text": payload})
+                else:
+                    yield _sse("done", {**payload, "download_url": "/generate-pdf"})
+        except Exception as e:
+            print(f"Error en generate_pdf_stream: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/sessions/{app_session_id}/dossier", tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
+async def build_session_dossier(app_session_id: str, mode: Optional[Literal["template", "narrative"]] = None):
+    """
+    Genera todos los informes de la sesión (individuales + grupal) en paralelo
+    y devuelve un ZIP que se transmite a medida que cada PDF queda listo.
+    `mode` (query) elige plantillas o redacción por LLM; por defecto PDF_REPORT_MODE.
+    """
+    try:
+        session_id, parts = await dossier_uc.resolve(app_session_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def entries():
+        errors = []
+        async for label, filename, pdf_bytes, error in dossier_uc.iter_parts(session_id, parts, mode=mode):
+            if error:
+                errors.append(f"{label}: {error}")
+                continue
+            yield filename, pdf_bytes
+        # El stream ya empezó: los informes fallidos se informan dentro del ZIP
+        if errors:
+            yield "ERRORES.txt", "\n".join(errors).encode("utf-8")
+
+    return StreamingResponse(
+        stream_zip(entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="dossier_{app_session_id}.zip"'}
+    )
+
+@app.post("/jobs/pdf", response_model=PdfJobResponse, status_code=status.HTTP_202_ACCEPTED, tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
+async def create_pdf_job(request: GeneratePDFRequest):
+    """
+    Encola la generación del PDF y responde de inmediato con el ID del trabajo.
+    El estado se consulta en GET /jobs/{job_id}.
+    """
+    try:
+        session_uuid, subject_uuid = _parse_report_ids(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Formato de ID inválido: {str(e)}")
+
+    try:
+        job = pdf_jobs.submit(session_uuid, subject_uuid, mode=request.mode)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    return _job_response(job)
+
+@app.get("/jobs/{job_id}", response_model=PdfJobResponse, tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
+async def get_pdf_job(job_id: str):
+    job = pdf_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado o expirado")
+    return _job_response(job)
+
+@app.get("/jobs/{job_id}/download", tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
+async def download_pdf_job(job_id: str):
+    job = pdf_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado o expirado")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"El trabajo aún no está listo (estado: {job['status']})")
+
+    pdf_path = job["result_path"]
+    if not pdf_path or not os.path.exists(pdf_path):
+        raise HTTPException(status_code=410, detail="El archivo PDF ya no está disponible")
+    return FileResponse(path=pdf_path, filename=os.path.basename(pdf_path), media_type="application/pdf")
+
+@app.get("/artifacts/{sha256}", tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
+async def download_artifact(sha256: str):
+    """Descarga un PDF ya generado por el hash de su contenido (pdf_artifacts.sha256_hash)."""
+    sha256 = sha256.lower()
+    if not isinstance(artifact_store, LocalArtifactStore):
+        # Almacén remoto: el cliente descarga directo del bucket
+        if not await run_in_threadpool(artifact_store.exists, sha256):
+            raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+        return RedirectResponse(artifact_store.signed_url(sha256, ARTIFACT_URL_TTL_SECONDS, f"{sha256}.pdf"))
+    pdf_path = artifact_store.local_path(sha256)
+    if not pdf_path:
+        raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+    # Direccionado por contenido: la misma URL siempre devuelve los mismos bytes
+    return FileResponse(
+        path=pdf_path, filename=f"{sha256}.pdf", media_type="application/pdf",
+        headers={"ETag": f'"{sha256}"', "Cache-Control": "private, max-age=31536000, immutable"}
+    )
+
+@app.get("/files/{sha256}", tags=["PDF Generation"])
+async def download_signed_artifact(sha256: str, expires: int, signature: str, filename: Optional[str] = None):
+    """
+    Destino de las URLs firmadas del almacén local. No pide X-API-KEY:
+    la autoriza la firma HMAC, válida hasta `expires`. No toca LLM ni render.
+    """
+    if not isinstance(artifact_store, LocalArtifactStore) or not artifact_store.verify(sha256, expires, signature, filename):
+        raise HTTPException(status_code=403, detail="URL inválida o vencida")
+    pdf_path = artifact_store.local_path(sha256)
+    if not pdf_path:
+        raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+    return FileResponse(
+        path=pdf_path, filename=filename or f"{sha256}.pdf", media_type="application/pdf",
+        headers={"ETag": f'"{sha256}"', "Cache-Control": f"private, max-age={max(0, expires - int(time.time()))}"}
+    )
+
 @app.post("/generate-pdf-url", response_model=GeneratePDFResponse, tags=["PDF Generation"], dependencies=[Depends(validate_api_key)])
 async def generate_pdf_url(request: GeneratePDFRequest):
     """
-    Verifica si el reporte existe y construye la URL de descarga.
+    Deja el PDF en el almacén de artefactos (renderizado una vez por versión del reporte
+    y modo; luego se reutiliza el blob registrado en pdf_artifacts) y devuelve una URL
+    firmada con vencimiento. Las descargas van directo al almacén,
+    sin pasar por el LLM ni el renderizador.
     Requiere header X-API-KEY.
     """
     try:
-        session_uuid = uuid.UUID(request.session_id)
-        subject_uuid = uuid.UUID(request.subject_id)
+        session_uuid, subject_uuid = _parse_report_ids(request)
         
-        # Verificamos existencia en Supabase usando el puerto del repositorio
-        report = report_repo.get_report_content(session_uuid, subject_uuid)
+        # Verificamos existencia usando el puerto del repositorio
+        report = await report_repo.get_report_content_async(session_uuid, subject_uuid)
         
         if not report:
             return GeneratePDFResponse(
@@ -139,24 +472,50 @@ async def generate_pdf_url(request: GeneratePDFRequest):
             )
         
         report_id = report.get("report_id")
-        # Simulación de URL relativa (el cliente debe llamar luego a /generate-pdf)
-        download_url = f"/generate-pdf?session_id={request.session_id}&subject_id={request.subject_id}"
+        # El reporte ya leído se pasa al caso de uso; si pdf_artifacts tiene el blob de esta versión y modo, no se renderiza
+        artifact = await run_in_threadpool(generate_pdf_uc.execute_artifact, session_uuid, subject_uuid, request.mode, report)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ARTIFACT_URL_TTL_SECONDS)
+        download_url = artifact_store.signed_url(artifact["sha256"], ARTIFACT_URL_TTL_SECONDS, artifact["filename"])
         
         return GeneratePDFResponse(
             success=True,
-            message="Reporte encontrado.",
+            message="Reporte listo para descarga.",
             report_id=str(report_id),
-            download_url=download_url
+            download_url=download_url,
+            sha256=artifact["sha256"],
+            size_bytes=artifact["size_bytes"],
+            expires_at=expires_at.isoformat()
         )
     except Exception as e:
         return GeneratePDFResponse(success=False, message=f"Error: {str(e)}")
 
+# --- MÉTRICAS (protegidas) ---
+
+@app.get("/metrics/caches", tags=["Metrics"], dependencies=[Depends(validate_api_key)])
+async def cache_metrics():
+    """Contadores de hit/miss de los cachés en memoria del proceso."""
+    metrics = {
+        "render_cache_reportlab": pdf_adapter.stats(),
+        "render_cache_xhtml2pdf": xhtml2pdf_adapter.stats(),
+        "single_flight": {"backend": SINGLE_FLIGHT_BACKEND, **single_flight.stats()},
+    }
+    if isinstance(report_repo, CachedReportRepository):
+        metrics["report_cache"] = report_repo.stats()
+    return metrics
+
+@app.get("/metrics/llm", tags=["Metrics"], dependencies=[Depends(validate_api_key)])
+async def llm_metrics():
+    """Estado del planificador de OpenAI: cola y capacidad por modelo, esperas y 429 por prioridad."""
+    if llm_scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_scheduler.stats()}
+
 # --- ENDPOINTS DE INGESTA (protegidos) ---
 
 @app.post("/ingest/user", response_model=ResponseBase, dependencies=[Depends(validate_api_key)], tags=["Ingestion"])
 async def upsert_user(payload: UserUpsert):
     try:
-        user = db_adapter.create_or_update_user(email=payload.email, name=payload.name, role=payload.role, city=payload.city)
+        user = await async_db_adapter.create_or_update_user(email=payload.email, name=payload.name, role=payload.role, city=payload.city)
         return {"status": "success", "id": str(user.id), "message": "User upserted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
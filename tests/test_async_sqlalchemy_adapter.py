@@ -0,0 +1,66 @@
+import uuid
+import asyncio
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from src.infrastructure.persistence.async_sqlalchemy_adapter import AsyncSQLAlchemyAdapter
+
+
+def _sqlite_adapter(tmp_path, stream_batch_size: int) -> AsyncSQLAlchemyAdapter:
+    """Adaptador real sobre un engine async (aiosqlite); el esquema 'cleansed' es una base adjunta."""
+    adapter = AsyncSQLAlchemyAdapter.__new__(AsyncSQLAlchemyAdapter)
+    adapter.stream_batch_size = stream_batch_size
+    adapter.engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'main.db'}")
+
+    @event.listens_for(adapter.engine.sync_engine, "connect")
+    def attach_cleansed(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{tmp_path / 'cleansed.db'}' AS cleansed")
+
+    return adapter
+
+
+async def _seed(adapter, session_id, subjects, per_subject):
+    async with adapter.engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE cleansed.biometric_events ("
+            " event_id CHAR(32) PRIMARY KEY, session_id CHAR(32), subject_id CHAR(32),"
+            " source_type VARCHAR(50) NOT NULL, processed_payload JSON, t_start_ms BIGINT NOT NULL)"
+        ))
+        rows = [
+            {"e": uuid.uuid4().hex, "s": session_id.hex, "p": subject.hex, "t": t * len(subjects) + i,
+             "d": f'{{"person_id": "{subject}", "n": {t}}}'}
+            for t in range(per_subject) for i, subject in enumerate(subjects)
+        ]
+        await conn.execute(text(
+            "INSERT INTO cleansed.biometric_events VALUES (:e, :s, :p, 'video', :d, :t)"
+        ), rows)
+
+
+def test_streamed_reads_run_on_a_real_async_engine(tmp_path):
+    session_id = uuid.uuid4()
+    subjects = [uuid.uuid4(), uuid.uuid4()]
+    # Lotes más chicos que el total: el cursor se lee en varias vueltas
+    adapter = _sqlite_adapter(tmp_path, stream_batch_size=3)
+
+    async def scenario():
+        await _seed(adapter, session_id, subjects, per_subject=5)
+        try:
+            streamed = [e async for e in adapter.iter_cleansed_events(session_id, subjects[0])]
+            listed = await adapter.get_cleansed_events(session_id)
+            by_subject, timeline = await adapter.get_session_events_indexed(session_id)
+        finally:
+            await adapter.dispose()
+        return streamed, listed, by_subject, timeline
+
+    streamed, listed, by_subject, timeline = asyncio.run(scenario())
+
+    assert [e["data"]["n"] for e in streamed] == [0, 1, 2, 3, 4]
+    assert all(e["source"] == "video" for e in streamed)
+    assert len(listed) == 10
+    assert [e["t_start"] for e in timeline] == sorted(e["t_start"] for e in timeline)
+    assert {k: len(v) for k, v in by_subject.items()} == {subjects[0]: 5, subjects[1]: 5}
+    assert timeline == listed